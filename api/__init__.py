@@ -1 +1,7 @@
 # FastAPI Backend for Laser Equipment Intelligence Platform
+import os
+import sys
+
+# The Scrapy project lives next to the API; make laser_intelligence (shared
+# Listing model, spiders) importable from every API module
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "laser-equipment-intelligence"))
@@ -1,11 +1,15 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import os
+import asyncio
 from contextlib import asynccontextmanager
 
 # SIMPLIFIED API - VERSION 1.0.6 - NO DATABASE DEPENDENCIES
-from api.routers import search, configuration, spiders, lasermatch, exhaustive_search
+from api.utils.responses import FastJSONResponse
+from api.utils.timing import TimingMiddleware
+from api.utils.metrics import REGISTRY
+from api.routers import search, configuration, spiders, lasermatch, exhaustive_search, dashboard, saved_searches, demand
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -20,15 +24,21 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️ Database unavailable, using in-memory mode: {e}")
     
+    # Discover spiders off the event loop so the first status poll is served from memory
+    from api.utils.spider_registry import registry
+    asyncio.get_running_loop().run_in_executor(None, registry.discover)
+    
     yield
     # Shutdown
-    pass
+    from api.models.database import close_pool
+    await close_pool()
 
 app = FastAPI(
     title="Laser Equipment Intelligence API",
     description="API for managing laser equipment procurement and intelligence",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware for frontend communication
@@ -47,12 +57,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request span collection, Server-Timing headers and opt-in profiling
+app.add_middleware(TimingMiddleware)
+
 # Include routers
 app.include_router(search.router, prefix="/api/v1/search", tags=["search"])
 app.include_router(configuration.router, prefix="/api/v1/config", tags=["configuration"])
 app.include_router(spiders.router, prefix="/api/v1/spiders", tags=["spiders"])
 app.include_router(lasermatch.router, prefix="/api/v1/lasermatch", tags=["lasermatch"])
 app.include_router(exhaustive_search.router, prefix="/api/v1/exhaustive-search", tags=["exhaustive-search"])
+app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["dashboard"])
+app.include_router(saved_searches.router, prefix="/api/v1/saved-searches", tags=["saved-searches"])
+app.include_router(demand.router, prefix="/api/v1/demand", tags=["demand"])
 
 @app.get("/")
 async def root():
@@ -62,6 +78,11 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "laser-intelligence-api", "timestamp": "2025-09-21-02:47:00", "magic_find_fix": "v3"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of the in-process metrics registry"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/db-test")
 async def db_test():
     import os
@@ -117,7 +138,7 @@ async def search_equipment_direct(search_request: dict):
         
         # If spiders return results, use them
         if spider_results.get("results") and len(spider_results.get("results", [])) > 0:
-            return spider_results.get("results", [])
+            return FastJSONResponse(spider_results.get("results", []))
         
         # If no spider results, fall through to mock data
         print("No spider results found, using realistic mock data")
@@ -128,6 +149,8 @@ async def search_equipment_direct(search_request: dict):
         # Fallback to realistic mock data if spiders fail
         from datetime import datetime
         import random
+        from laser_intelligence.items import Listing
+        from laser_intelligence.scoring import score_listings
         
         # Generate realistic laser equipment data based on the search query
         query_lower = search_request.get('query', '').lower()
@@ -205,25 +228,24 @@ async def search_equipment_direct(search_request: dict):
             source = random.choice(sources)
             location = random.choice(locations)
             
-            mock_results.append({
-                "id": f"mock_{brand.lower()}_{i+1}",
-                "title": f"{brand} {model} Laser System",
-                "brand": brand,
-                "model": model,
-                "condition": condition,
-                "price": float(price),
-                "source": source,
-                "location": location,
-                "description": f"Professional {brand} {model} laser system in {condition.lower()} condition. Perfect for aesthetic treatments.",
-                "images": [f"https://example.com/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}.jpg"],
-                "discovered_at": datetime.now().isoformat(),
-                "margin_estimate": random.uniform(20.0, 40.0),
-                "score_overall": random.randint(80, 95),
-                "url": f"https://{source.lower().replace(' ', '')}.com/listing/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}",
-                "status": "active"
-            })
-        
-        return mock_results
+            mock_results.append(Listing(
+                id=f"mock_{brand.lower()}_{i+1}",
+                title=f"{brand} {model} Laser System",
+                brand=brand,
+                model=model,
+                condition=condition,
+                price=float(price),
+                source=source,
+                location=location,
+                description=f"Professional {brand} {model} laser system in {condition.lower()} condition. Perfect for aesthetic treatments.",
+                images=[f"https://example.com/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}.jpg"],
+                discovered_at=datetime.now().isoformat(),
+                url=f"https://{source.lower().replace(' ', '')}.com/listing/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}",
+                status="active"
+            ))
+        
+        score_listings(mock_results)
+        return FastJSONResponse(mock_results)
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
@@ -0,0 +1,38 @@
+"""
+Resumable progress of long-running worker jobs
+
+A job that works through a list in chunks saves its position after every
+chunk, so a worker that is stopped or redeployed mid-crawl picks up where it
+left off instead of starting over.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+
+async def init_worker_checkpoints(conn) -> None:
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS worker_checkpoints (
+            job VARCHAR(100) PRIMARY KEY,
+            state JSONB NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        )
+    """)
+
+
+async def load_checkpoint(conn, job: str) -> Optional[Dict[str, Any]]:
+    """Saved state of an unfinished run of the job, if any"""
+    state = await conn.fetchval("SELECT state FROM worker_checkpoints WHERE job = $1", job)
+    return json.loads(state) if state is not None else None
+
+
+async def save_checkpoint(conn, job: str, state: Dict[str, Any]) -> None:
+    await conn.execute("""
+        INSERT INTO worker_checkpoints (job, state, updated_at) VALUES ($1, $2::jsonb, NOW())
+        ON CONFLICT (job) DO UPDATE SET state = EXCLUDED.state, updated_at = NOW()
+    """, job, json.dumps(state))
+
+
+async def clear_checkpoint(conn, job: str) -> None:
+    """Forget the job's progress once a run has finished"""
+    await conn.execute("DELETE FROM worker_checkpoints WHERE job = $1", job)
@@ -0,0 +1,444 @@
+"""
+Crawl job queue shared by worker nodes
+
+Crawls are enqueued as jobs (one source, a batch of queries, a crawl budget)
+and claimed by any worker. The Postgres backend claims with
+SELECT ... FOR UPDATE SKIP LOCKED, so workers never block on each other's
+rows; a per-source transaction advisory lock serializes claims of one source
+so its concurrency cap holds across the whole cluster. A claim is a lease:
+the worker extends it while the crawl runs, and a lease that expires (the
+worker died) makes the job claimable again. Failed jobs are retried with
+jittered exponential backoff until max_attempts. Results are written in the
+same transaction that completes the job and only while the worker still
+holds the lease, so a job that was taken over is never written twice.
+
+MemoryCrawlQueue is a single-process stand-in with the same semantics, for
+local runs without a database; other backends implement CrawlQueue.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from api.models.database import get_db_connection
+
+DEFAULT_LEASE = 600.0                  # seconds; extended while the crawl runs
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 60.0
+BACKOFF_MAX = 3600.0
+DEFAULT_SOURCE_CONCURRENCY = int(os.getenv("CRAWL_SOURCE_CONCURRENCY", "2"))
+
+QUEUE_LOCK_ID = 71823                  # advisory lock namespace for per-source claims
+
+# Writes a finished job's results on the given connection; returns rows written
+ResultWriter = Callable[[Any], Awaitable[int]]
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before retry number `attempts`: exponential, capped, with jitter so retries spread out"""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def job_key(kind: str, spider: str, queries: Iterable[str]) -> str:
+    """Dedupe key: the same crawl is queued at most once while pending or running"""
+    digest = hashlib.sha1(json.dumps(sorted(queries)).encode()).hexdigest()[:16]
+    return f"{kind}:{spider}:{digest}"
+
+
+@dataclass
+class CrawlJob:
+    spider: str
+    queries: List[str]
+    kind: str = "discover"
+    budget: Dict[str, Any] = field(default_factory=dict)
+    priority: int = 100                # lower runs first
+    max_attempts: int = MAX_ATTEMPTS
+    dedupe_key: Optional[str] = None
+    generation: Optional[int] = None   # crawl generation of the pass the job belongs to (see generations.py)
+    id: Optional[int] = None
+    attempts: int = 0
+    lease_owner: Optional[str] = None
+
+    def __post_init__(self):
+        if self.dedupe_key is None:
+            self.dedupe_key = job_key(self.kind, self.spider, self.queries)
+
+    @classmethod
+    def from_row(cls, row) -> "CrawlJob":
+        return cls(
+            spider=row['spider'],
+            queries=json.loads(row['queries']),
+            kind=row['kind'],
+            budget=json.loads(row['budget']),
+            priority=row['priority'],
+            max_attempts=row['max_attempts'],
+            dedupe_key=row['dedupe_key'],
+            generation=row.get('generation'),
+            id=row['id'],
+            attempts=row['attempts'],
+            lease_owner=row['lease_owner']
+        )
+
+
+class CrawlQueue:
+    """Backend interface used by the worker"""
+
+    name = "base"
+
+    def __init__(self, concurrency: Optional[Dict[str, int]] = None,
+                 default_concurrency: int = DEFAULT_SOURCE_CONCURRENCY):
+        self.concurrency = dict(concurrency or {})
+        self.default_concurrency = default_concurrency
+
+    def cap(self, spider: str) -> int:
+        return self.concurrency.get(spider, self.default_concurrency)
+
+    async def enqueue(self, jobs: Iterable[CrawlJob]) -> int:
+        """Queue jobs, skipping any whose dedupe key is already pending or running; returns jobs added"""
+        raise NotImplementedError
+
+    async def claim(self, owner: str, lease: float = DEFAULT_LEASE) -> Optional[CrawlJob]:
+        """Lease the next runnable job whose source is under its concurrency cap"""
+        raise NotImplementedError
+
+    async def extend(self, job: CrawlJob, lease: float = DEFAULT_LEASE) -> bool:
+        """Extend a held lease; False if it was lost"""
+        raise NotImplementedError
+
+    async def complete(self, job: CrawlJob, write: Optional[ResultWriter] = None) -> bool:
+        """Write results and mark the job done, only if the lease is still held"""
+        raise NotImplementedError
+
+    async def fail(self, job: CrawlJob, error: str) -> None:
+        """Release the job for a backed-off retry, or give up after max_attempts"""
+        raise NotImplementedError
+
+    async def stats(self) -> Dict[str, Dict[str, int]]:
+        """Job counts per source and status"""
+        raise NotImplementedError
+
+
+ENQUEUE_SQL = """
+    INSERT INTO crawl_jobs (kind, spider, queries, budget, priority, max_attempts, dedupe_key, generation)
+    VALUES ($1, $2, $3::jsonb, $4::jsonb, $5, $6, $7, $8)
+    ON CONFLICT (dedupe_key) WHERE status IN ('queued', 'running') DO NOTHING
+"""
+
+# Sources with runnable jobs, most urgent first: queued and due, or leased to a worker that is gone
+CLAIMABLE_SPIDERS_SQL = """
+    SELECT spider FROM crawl_jobs
+    WHERE (status = 'queued' AND run_after <= NOW()) OR (status = 'running' AND lease_expires <= NOW())
+    GROUP BY spider
+    ORDER BY MIN(priority), MIN(run_after)
+"""
+
+RUNNING_SQL = """
+    SELECT COUNT(*) FROM crawl_jobs WHERE spider = $1 AND status = 'running' AND lease_expires > NOW()
+"""
+
+CLAIM_SQL = """
+    UPDATE crawl_jobs SET
+        status = 'running', lease_owner = $2, lease_expires = NOW() + $3::interval, attempts = attempts + 1
+    WHERE id = (
+        SELECT id FROM crawl_jobs
+        WHERE spider = $1
+          AND ((status = 'queued' AND run_after <= NOW()) OR (status = 'running' AND lease_expires <= NOW()))
+        ORDER BY priority, run_after
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING *
+"""
+
+# Jobs whose last attempt's worker vanished get no further attempt
+EXPIRE_SQL = """
+    UPDATE crawl_jobs SET status = 'failed', finished_at = NOW(), last_error = 'lease expired'
+    WHERE status = 'running' AND lease_expires <= NOW() AND attempts >= max_attempts
+"""
+
+FAIL_SQL = """
+    UPDATE crawl_jobs SET
+        status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+        finished_at = CASE WHEN attempts >= max_attempts THEN NOW() END,
+        run_after = NOW() + $3::interval,
+        lease_owner = NULL, lease_expires = NULL, last_error = $4
+    WHERE id = $1 AND lease_owner = $2 AND status = 'running'
+"""
+
+
+async def init_crawl_queue(conn) -> None:
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS crawl_jobs (
+            id BIGSERIAL PRIMARY KEY,
+            kind VARCHAR(50) NOT NULL,
+            spider VARCHAR(100) NOT NULL,
+            queries JSONB NOT NULL,
+            budget JSONB NOT NULL DEFAULT '{}',
+            priority INTEGER NOT NULL DEFAULT 100,
+            status VARCHAR(20) NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 5,
+            dedupe_key TEXT NOT NULL,
+            run_after TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+            lease_owner TEXT,
+            lease_expires TIMESTAMP WITH TIME ZONE,
+            last_error TEXT,
+            result_count INTEGER,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            finished_at TIMESTAMP WITH TIME ZONE
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_crawl_jobs_pending_key
+            ON crawl_jobs (dedupe_key) WHERE status IN ('queued', 'running');
+        CREATE INDEX IF NOT EXISTS idx_crawl_jobs_claim
+            ON crawl_jobs (spider, priority, run_after) WHERE status IN ('queued', 'running');
+    """)
+
+
+class PostgresCrawlQueue(CrawlQueue):
+    """crawl_jobs table claimed with FOR UPDATE SKIP LOCKED"""
+
+    name = "postgres"
+
+    async def _connect(self):
+        conn = await get_db_connection()
+        if not conn:
+            raise ConnectionError("crawl queue requires the database")
+        return conn
+
+    async def enqueue(self, jobs: Iterable[CrawlJob]) -> int:
+        jobs = list(jobs)
+        if not jobs:
+            return 0
+        conn = await self._connect()
+        try:
+            added = 0
+            async with conn.transaction():
+                for job in jobs:
+                    result = await conn.execute(
+                        ENQUEUE_SQL, job.kind, job.spider, json.dumps(job.queries), json.dumps(job.budget),
+                        job.priority, job.max_attempts, job.dedupe_key, job.generation
+                    )
+                    added += int(result.split()[-1])
+            return added
+        finally:
+            await conn.close()
+
+    async def claim(self, owner: str, lease: float = DEFAULT_LEASE) -> Optional[CrawlJob]:
+        conn = await self._connect()
+        try:
+            await conn.execute(EXPIRE_SQL)
+            async with conn.transaction():
+                for row in await conn.fetch(CLAIMABLE_SPIDERS_SQL):
+                    spider = row['spider']
+                    # Held to commit: no other worker counts or claims this source meanwhile
+                    locked = await conn.fetchval(
+                        "SELECT pg_try_advisory_xact_lock($1, hashtext($2))", QUEUE_LOCK_ID, spider
+                    )
+                    if not locked or await conn.fetchval(RUNNING_SQL, spider) >= self.cap(spider):
+                        continue
+                    claimed = await conn.fetchrow(CLAIM_SQL, spider, owner, timedelta(seconds=lease))
+                    if claimed is not None:
+                        return CrawlJob.from_row(claimed)
+            return None
+        finally:
+            await conn.close()
+
+    async def extend(self, job: CrawlJob, lease: float = DEFAULT_LEASE) -> bool:
+        conn = await self._connect()
+        try:
+            result = await conn.execute(
+                "UPDATE crawl_jobs SET lease_expires = NOW() + $3::interval "
+                "WHERE id = $1 AND lease_owner = $2 AND status = 'running'",
+                job.id, job.lease_owner, timedelta(seconds=lease)
+            )
+            return result == "UPDATE 1"
+        finally:
+            await conn.close()
+
+    async def complete(self, job: CrawlJob, write: Optional[ResultWriter] = None) -> bool:
+        conn = await self._connect()
+        try:
+            async with conn.transaction():
+                held = await conn.fetchval(
+                    "SELECT id FROM crawl_jobs WHERE id = $1 AND lease_owner = $2 AND status = 'running' FOR UPDATE",
+                    job.id, job.lease_owner
+                )
+                if held is None:
+                    return False
+                written = await write(conn) if write is not None else 0
+                await conn.execute(
+                    "UPDATE crawl_jobs SET status = 'done', finished_at = NOW(), lease_expires = NULL, "
+                    "result_count = $2, last_error = NULL WHERE id = $1",
+                    job.id, written
+                )
+            return True
+        finally:
+            await conn.close()
+
+    async def fail(self, job: CrawlJob, error: str) -> None:
+        conn = await self._connect()
+        try:
+            await conn.execute(FAIL_SQL, job.id, job.lease_owner, timedelta(seconds=retry_delay(job.attempts)), error)
+        finally:
+            await conn.close()
+
+    async def stats(self) -> Dict[str, Dict[str, int]]:
+        conn = await self._connect()
+        try:
+            rows = await conn.fetch(
+                "SELECT spider, status, COUNT(*) AS jobs FROM crawl_jobs "
+                "WHERE status IN ('queued', 'running') OR finished_at > NOW() - INTERVAL '1 day' "
+                "GROUP BY spider, status"
+            )
+        finally:
+            await conn.close()
+        stats: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            stats.setdefault(row['spider'], {})[row['status']] = row['jobs']
+        return stats
+
+
+class _LeaseLost(Exception):
+    """Rolls back a result write whose job was taken over while it ran"""
+
+
+class MemoryCrawlQueue(CrawlQueue):
+    """In-process stand-in: same leases, caps and retries, for one worker without a shared backend"""
+
+    name = "memory"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._jobs: Dict[int, Dict[str, Any]] = {}
+        self._ids = 0
+        self._lock = asyncio.Lock()
+
+    def _pending(self, dedupe_key: str) -> bool:
+        return any(
+            entry["job"].dedupe_key == dedupe_key and entry["status"] in ("queued", "running")
+            for entry in self._jobs.values()
+        )
+
+    async def enqueue(self, jobs: Iterable[CrawlJob]) -> int:
+        added = 0
+        async with self._lock:
+            for job in jobs:
+                if self._pending(job.dedupe_key):
+                    continue
+                self._ids += 1
+                job.id = self._ids
+                self._jobs[job.id] = {"job": job, "status": "queued", "run_after": time.time(), "lease_expires": None}
+                added += 1
+        return added
+
+    async def claim(self, owner: str, lease: float = DEFAULT_LEASE) -> Optional[CrawlJob]:
+        now = time.time()
+        async with self._lock:
+            running: Dict[str, int] = {}
+            claimable = []
+            for entry in self._jobs.values():
+                job = entry["job"]
+                live = entry["status"] == "running" and entry["lease_expires"] > now
+                if live:
+                    running[job.spider] = running.get(job.spider, 0) + 1
+                elif entry["status"] == "running" and job.attempts >= job.max_attempts:
+                    entry["status"] = "failed"
+                elif (entry["status"] == "queued" and entry["run_after"] <= now) or entry["status"] == "running":
+                    claimable.append(entry)
+            for entry in sorted(claimable, key=lambda entry: (entry["job"].priority, entry["run_after"])):
+                job = entry["job"]
+                if running.get(job.spider, 0) >= self.cap(job.spider):
+                    continue
+                job.attempts += 1
+                job.lease_owner = owner
+                entry.update(status="running", lease_expires=now + lease)
+                return CrawlJob(**{**job.__dict__})
+        return None
+
+    def _held(self, job: CrawlJob) -> Optional[Dict[str, Any]]:
+        entry = self._jobs.get(job.id)
+        if entry is None or entry["status"] != "running" or entry["job"].lease_owner != job.lease_owner:
+            return None
+        return entry
+
+    async def extend(self, job: CrawlJob, lease: float = DEFAULT_LEASE) -> bool:
+        async with self._lock:
+            entry = self._held(job)
+            if entry is not None:
+                entry["lease_expires"] = time.time() + lease
+            return entry is not None
+
+    async def complete(self, job: CrawlJob, write: Optional[ResultWriter] = None) -> bool:
+        # The write runs outside the lock so claims and extends are not held up by it;
+        # the lease is checked again before the write commits, as the Postgres backend does
+        async with self._lock:
+            if self._held(job) is None:
+                return False
+        if write is None:
+            return self._finish(job)
+        conn = await get_db_connection()
+        if not conn:
+            raise ConnectionError("results require the database")
+        try:
+            try:
+                async with conn.transaction():
+                    await write(conn)
+                    async with self._lock:
+                        if not self._finish(job):
+                            raise _LeaseLost()
+            except _LeaseLost:
+                return False
+            except BaseException:
+                # The commit failed after the job was marked done; it is still ours to fail or retry
+                async with self._lock:
+                    entry = self._jobs.get(job.id)
+                    if entry is not None and entry["status"] == "done" and entry["job"].lease_owner == job.lease_owner:
+                        entry.update(status="running", lease_expires=time.time() + DEFAULT_LEASE)
+                raise
+        finally:
+            await conn.close()
+        return True
+
+    def _finish(self, job: CrawlJob) -> bool:
+        entry = self._held(job)
+        if entry is not None:
+            entry.update(status="done", lease_expires=None)
+        return entry is not None
+
+    async def fail(self, job: CrawlJob, error: str) -> None:
+        async with self._lock:
+            entry = self._held(job)
+            if entry is None:
+                return
+            entry["job"].lease_owner = None
+            if job.attempts >= job.max_attempts:
+                entry.update(status="failed", lease_expires=None)
+            else:
+                entry.update(status="queued", lease_expires=None, run_after=time.time() + retry_delay(job.attempts))
+
+    async def stats(self) -> Dict[str, Dict[str, int]]:
+        stats: Dict[str, Dict[str, int]] = {}
+        for entry in self._jobs.values():
+            counts = stats.setdefault(entry["job"].spider, {})
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return stats
+
+
+BACKENDS = {"postgres": PostgresCrawlQueue, "memory": MemoryCrawlQueue}
+
+
+def get_crawl_queue(backend: Optional[str] = None, **kwargs) -> Optional[CrawlQueue]:
+    """Queue for CRAWL_QUEUE (postgres or memory), or None when crawls run inline"""
+    backend = (backend or os.getenv("CRAWL_QUEUE") or "").strip().lower()
+    if not backend:
+        return None
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown CRAWL_QUEUE backend '{backend}'")
+    return BACKENDS[backend](**kwargs)
@@ -1,9 +1,91 @@
 import os
+import time
+import asyncio
 import asyncpg
 from typing import Optional
 
+from api.utils.metrics import REGISTRY
+from api.utils.timing import span
+
+# Shared connection pool; get_db_connection() hands out checkouts from it
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "10"))
+
+_pool: Optional[asyncpg.Pool] = None
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _pool_usage():
+    if _pool is None:
+        return {}
+    size, idle = _pool.get_size(), _pool.get_idle_size()
+    return {("size",): size, ("in_use",): size - idle, ("max",): DB_POOL_MAX_SIZE}
+
+
+DB_POOL_CONNECTIONS = REGISTRY.gauge("db_pool_connections", "Database pool connections", ("state",), callback=_pool_usage)
+DB_POOL_ACQUIRE = REGISTRY.histogram(
+    "db_pool_acquire_seconds", "Time waiting for a pooled database connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+)
+
+
+class _PooledConnection:
+    """A connection checked out of the shared pool.
+
+    Proxies the asyncpg connection API; close() returns the connection to the
+    pool, so callers keep their connect/close pattern. A checkout dropped
+    without close() is released when garbage collected.
+    """
+
+    __slots__ = ("_pool", "_conn", "_loop")
+
+    def __init__(self, pool: asyncpg.Pool, conn, loop: asyncio.AbstractEventLoop):
+        self._pool = pool
+        self._conn = conn
+        self._loop = loop
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise asyncpg.InterfaceError("connection has been released back to the pool")
+        return getattr(self._conn, name)
+
+    def is_closed(self) -> bool:
+        return self._conn is None
+
+    async def close(self, *, timeout: Optional[float] = None) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            await self._pool.release(conn, timeout=timeout)
+
+    def __del__(self):
+        conn = getattr(self, "_conn", None)
+        if conn is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(lambda: self._loop.create_task(self._pool.release(conn)))
+
+
+async def get_pool() -> Optional[asyncpg.Pool]:
+    """The shared pool for the running event loop, created on first use"""
+    global _pool, _pool_loop
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        return None
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool_loop is not loop:
+        # Pools are bound to the loop that created them (tests and scripts run several loops)
+        _pool = await asyncpg.create_pool(database_url, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE)
+        _pool_loop = loop
+    return _pool
+
+
+async def close_pool() -> None:
+    global _pool, _pool_loop
+    if _pool is not None and _pool_loop is asyncio.get_running_loop():
+        await _pool.close()
+    _pool, _pool_loop = None, None
+
 async def init_db():
-    """Initialize database connection and create tables"""
+    """Initialize the database schema through run-once migrations"""
     try:
         database_url = os.getenv("DATABASE_URL")
         if not database_url:
@@ -13,81 +95,15 @@ async def init_db():
         print(f"🔗 Connecting to database...")
         conn = await asyncpg.connect(database_url)
         
-        # Create lasermatch_items table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS lasermatch_items (
-                id SERIAL PRIMARY KEY,
-                title VARCHAR(500) NOT NULL,
-                brand VARCHAR(100),
-                model VARCHAR(100),
-                condition VARCHAR(50),
-                price DECIMAL(12,2),
-                location VARCHAR(200),
-                description TEXT,
-                url TEXT UNIQUE,
-                images TEXT[],
-                discovered_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                last_updated TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                source VARCHAR(100) DEFAULT 'LaserMatch.io',
-                status VARCHAR(50) DEFAULT 'active',
-                category VARCHAR(100),
-                availability VARCHAR(50),
-                assigned_rep VARCHAR(100),
-                target_price DECIMAL(12,2),
-                notes TEXT,
-                spider_urls TEXT
-            )
-        """)
-        
-        # Create notes table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS notes (
-                id SERIAL PRIMARY KEY,
-                item_id INTEGER REFERENCES lasermatch_items(id) ON DELETE CASCADE,
-                user_name VARCHAR(100) NOT NULL,
-                note_text TEXT NOT NULL,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-            )
-        """)
+        # Versioned schema changes; a single SELECT when the schema is current
+        from api.models.migrations import run_migrations
+        try:
+            applied = await run_migrations(conn)
+        finally:
+            await conn.close()
+        if applied:
+            print(f"🗄️ Applied {len(applied)} migrations: {', '.join(applied)}")
         
-        # Create sources table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS sources (
-                id SERIAL PRIMARY KEY,
-                item_id INTEGER REFERENCES lasermatch_items(id) ON DELETE CASCADE,
-                source_name VARCHAR(100) NOT NULL,
-                contact_info TEXT,
-                price DECIMAL(12,2),
-                follow_up_date DATE,
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-            )
-        """)
-        
-        # Create spider_urls table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS spider_urls (
-                id SERIAL PRIMARY KEY,
-                item_id INTEGER REFERENCES lasermatch_items(id) ON DELETE CASCADE,
-                url TEXT NOT NULL,
-                source_name VARCHAR(100),
-                status VARCHAR(50) DEFAULT 'pending',
-                created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-                updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-            )
-        """)
-        
-        # Create indexes for better performance
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_lasermatch_items_brand ON lasermatch_items(brand);
-            CREATE INDEX IF NOT EXISTS idx_lasermatch_items_model ON lasermatch_items(model);
-            CREATE INDEX IF NOT EXISTS idx_lasermatch_items_status ON lasermatch_items(status);
-            CREATE INDEX IF NOT EXISTS idx_lasermatch_items_assigned_rep ON lasermatch_items(assigned_rep);
-            CREATE INDEX IF NOT EXISTS idx_lasermatch_items_discovered_at ON lasermatch_items(discovered_at);
-        """)
-        
-        await conn.close()
         print("✅ Database initialized successfully")
         return True
         
@@ -96,12 +112,19 @@ async def init_db():
         return False
 
 async def get_db_connection():
-    """Get database connection"""
+    """Check out a pooled database connection, or None to fall back to in-memory storage.
+
+    Callers must await conn.close() to return it to the pool.
+    """
     try:
-        database_url = os.getenv("DATABASE_URL")
-        if not database_url:
-            return None
-        return await asyncpg.connect(database_url)
+        with span("db_connect"):
+            pool = await get_pool()
+            if pool is None:
+                return None
+            started = time.perf_counter()
+            conn = await pool.acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT)
+            DB_POOL_ACQUIRE.observe(time.perf_counter() - started)
+            return _PooledConnection(pool, conn, asyncio.get_running_loop())
     except Exception as e:
         print(f"Database connection failed: {e}")
         return None
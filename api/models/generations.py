@@ -0,0 +1,137 @@
+"""
+Crawl generations: mark-and-sweep liveness for lasermatch_items
+
+A full pass over a source (the LaserMatch import, a discovery crawl of the
+standing queries) opens a generation, and every listing written or re-seen
+by upsert_listings is stamped with it in one set-based UPDATE, including the
+unchanged rows the content-hash check skips. Listings seen outside a full
+pass (searches, recrawls) only get last_seen_at bumped. Once a pass
+completes, one UPDATE marks the source's active listings stale when an
+earlier pass of that source saw them but none of its last
+STALE_AFTER_GENERATIONS completed passes did, so dead listings leave the hot
+set without a per-row HTTP check. Listings no pass has ever seen (ad-hoc
+searches) are never swept. A stale listing that turns up again is
+reactivated by the next stamp. A row also counts as seen when the url of
+one of its offers (sources rows merged into it by dedup) is, so a listing
+whose own url has gone but which is still offered elsewhere stays live.
+"""
+
+import os
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from laser_intelligence.scheduler import DAY, FIXED_MAX_INTERVAL
+
+STALE_AFTER_GENERATIONS = int(os.getenv("STALE_AFTER_GENERATIONS", "3"))
+# Never sweep listings seen more recently than this, however often their source is crawled;
+# longer than the slowest recrawl interval, so a listing still being recrawled is never swept
+STALE_MIN_AGE = timedelta(hours=float(os.getenv("STALE_MIN_AGE_HOURS", str((FIXED_MAX_INTERVAL + DAY) / 3600))))
+
+# Stamp with the given generation (if any); rows already carrying that stamp
+# and seen within the hour are left alone
+MARK_SEEN_SQL = """
+    UPDATE lasermatch_items SET
+        last_seen_generation = COALESCE($2::bigint, last_seen_generation),
+        last_seen_at = NOW(),
+        status = CASE WHEN status = 'stale' THEN 'active' ELSE status END
+    WHERE (url = ANY($1::text[])
+           OR id IN (SELECT item_id FROM sources WHERE url = ANY($1::text[])))
+      AND (($2::bigint IS NOT NULL AND last_seen_generation IS DISTINCT FROM $2::bigint)
+           OR status = 'stale' OR last_seen_at IS NULL OR last_seen_at < NOW() - INTERVAL '1 hour')
+"""
+
+# Generation ids only grow, so "unseen in the last K completed passes" is one range
+# predicate; only rows last stamped by an earlier pass of this scope are candidates
+SWEEP_SQL = """
+    UPDATE lasermatch_items SET status = 'stale'
+    WHERE source = $1 AND status = 'active'
+      AND last_seen_generation < $2
+      AND last_seen_generation IN (SELECT id FROM crawl_generations WHERE scope = $1 AND id < $2)
+      AND last_seen_at < NOW() - $3::interval
+"""
+
+
+async def init_generations(conn) -> None:
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS crawl_generations (
+            id BIGSERIAL PRIMARY KEY,
+            scope VARCHAR(100) NOT NULL,
+            started_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            finished_at TIMESTAMP WITH TIME ZONE,
+            complete BOOLEAN NOT NULL DEFAULT FALSE,
+            seen INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_crawl_generations_scope ON crawl_generations (scope, id DESC);
+
+        ALTER TABLE lasermatch_items ADD COLUMN IF NOT EXISTS last_seen_generation BIGINT;
+        ALTER TABLE lasermatch_items ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP WITH TIME ZONE;
+
+        -- Queued discovery chunks carry the generation of the pass they belong to
+        ALTER TABLE crawl_jobs ADD COLUMN IF NOT EXISTS generation BIGINT;
+        CREATE INDEX IF NOT EXISTS idx_crawl_jobs_generation ON crawl_jobs (generation) WHERE generation IS NOT NULL;
+    """)
+    # Existing rows were seen when last written; no pass has seen them yet, so none is swept
+    await conn.execute("""
+        UPDATE lasermatch_items SET last_seen_at = COALESCE(last_updated, NOW())
+        WHERE last_seen_at IS NULL
+    """)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_lasermatch_items_sweep
+            ON lasermatch_items (source, last_seen_generation) WHERE status = 'active'
+    """)
+
+
+async def start_generation(conn, scope: str) -> int:
+    """Open a generation for a full pass over a source (scope is its Listing.source)"""
+    return await conn.fetchval("INSERT INTO crawl_generations (scope) VALUES ($1) RETURNING id", scope)
+
+
+async def mark_seen(conn, urls: Iterable[str], generation: Optional[int] = None) -> None:
+    """Stamp listings as seen now, and by the given generation if they were seen by a full pass"""
+    urls = [url for url in urls if url]
+    if urls:
+        await conn.execute(MARK_SEEN_SQL, urls, generation)
+
+
+async def finish_generation(conn, generation: int, sweep: bool = True) -> int:
+    """Close a completed pass and sweep its source; returns listings marked stale"""
+    scope = await conn.fetchval("""
+        UPDATE crawl_generations SET
+            complete = TRUE,
+            finished_at = NOW(),
+            seen = (
+                SELECT COUNT(*) FROM lasermatch_items
+                WHERE source = crawl_generations.scope AND status = 'active' AND last_seen_generation = $1
+            )
+        WHERE id = $1 AND NOT complete
+        RETURNING scope
+    """, generation)
+    if scope is None or not sweep:
+        return 0
+    return await sweep_stale(conn, scope)
+
+
+async def sweep_stale(conn, scope: str, keep: int = STALE_AFTER_GENERATIONS,
+                      min_age: timedelta = STALE_MIN_AGE) -> int:
+    """Mark the scope's active listings stale if none of its last `keep` completed passes saw them"""
+    oldest_kept = await conn.fetchval("""
+        SELECT MIN(id) FROM (
+            SELECT id FROM crawl_generations WHERE scope = $1 AND complete ORDER BY id DESC LIMIT $2
+        ) kept
+        HAVING COUNT(*) >= $2
+    """, scope, keep)
+    if oldest_kept is None:
+        return 0
+    result = await conn.execute(SWEEP_SQL, scope, oldest_kept, min_age)
+    swept = int(result.split()[-1])
+    if swept:
+        print(f"🧹 Marked {swept} {scope} listings stale (unseen in {keep} crawls)")
+    return swept
+
+
+async def finish_queued_generation(conn, generation: int) -> int:
+    """Finish a pass run through the crawl queue once every one of its jobs is done"""
+    all_done = await conn.fetchval(
+        "SELECT bool_and(status = 'done') FROM crawl_jobs WHERE generation = $1", generation
+    )
+    return await finish_generation(conn, generation) if all_done else 0
@@ -0,0 +1,261 @@
+"""
+Persistence helpers for Listing objects stored in lasermatch_items
+"""
+
+import asyncio
+from typing import Iterable, List, Any, Dict, Optional, TYPE_CHECKING
+
+from laser_intelligence.items import Listing, DB_COLUMNS
+from laser_intelligence.fingerprints import content_hash, remember_written
+from api.models.price_history import record_prices
+from api.models.saved_searches import percolate
+from api.models.price_comps import record_sold
+from api.models.recrawl import track_listings
+from api.models.generations import mark_seen
+
+if TYPE_CHECKING:
+    from laser_intelligence.dedup import EquipmentCluster
+
+# laser_intelligence.dedup pulls in numpy, so it is imported on first write rather than at API startup
+
+UPSERT_LISTING_SQL = f"""
+    INSERT INTO lasermatch_items ({', '.join(DB_COLUMNS)}, dedupe_bands, content_hash)
+    VALUES ({', '.join(f'${i}' for i in range(1, len(DB_COLUMNS) + 3))})
+    ON CONFLICT (url) DO UPDATE SET
+        title = EXCLUDED.title,
+        brand = EXCLUDED.brand,
+        model = EXCLUDED.model,
+        condition = EXCLUDED.condition,
+        price = EXCLUDED.price,
+        location = EXCLUDED.location,
+        description = EXCLUDED.description,
+        dedupe_bands = EXCLUDED.dedupe_bands,
+        content_hash = EXCLUDED.content_hash,
+        -- a crawl may report a sale; other statuses belong to reps and the liveness checks
+        status = CASE WHEN EXCLUDED.status = 'sold' THEN 'sold' ELSE lasermatch_items.status END,
+        last_updated = NOW()
+    WHERE lasermatch_items.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+       OR (EXCLUDED.status = 'sold' AND lasermatch_items.status IS DISTINCT FROM 'sold')
+"""
+
+UPSERT_OFFER_SQL = """
+    INSERT INTO sources (item_id, source_name, url, price, content_hash)
+    VALUES ($1, $2, $3, $4, $5)
+    ON CONFLICT (item_id, url) DO UPDATE SET
+        source_name = EXCLUDED.source_name,
+        price = EXCLUDED.price,
+        content_hash = COALESCE(EXCLUDED.content_hash, sources.content_hash),
+        updated_at = NOW()
+"""
+
+# Stored state of the batch's urls: their own rows, and offers merged into another source's row
+STORED_STATE_SQL = """
+    SELECT url, content_hash, status FROM lasermatch_items WHERE url = ANY($1::text[])
+    UNION ALL
+    SELECT s.url, s.content_hash, NULL FROM sources s
+    JOIN lasermatch_items i ON i.id = s.item_id
+    WHERE s.url = ANY($1::text[]) AND s.url <> i.url
+"""
+
+# Existing items sharing at least one LSH band with the batch (GIN index on dedupe_bands)
+CANDIDATE_SQL = """
+    SELECT id, title, brand, model, price, location, url, source
+    FROM lasermatch_items
+    WHERE dedupe_bands && $1::bigint[] AND status = 'active'
+"""
+
+
+async def init_dedup_schema(conn) -> None:
+    """Add the LSH band, content hash and per-source offer columns used on ingest"""
+    await conn.execute("""
+        ALTER TABLE lasermatch_items ADD COLUMN IF NOT EXISTS dedupe_bands BIGINT[];
+        CREATE INDEX IF NOT EXISTS idx_lasermatch_items_dedupe_bands ON lasermatch_items USING GIN (dedupe_bands);
+        ALTER TABLE sources ADD COLUMN IF NOT EXISTS url TEXT;
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_sources_item_url ON sources(item_id, url);
+        ALTER TABLE lasermatch_items ADD COLUMN IF NOT EXISTS content_hash TEXT;
+    """)
+
+
+async def init_offer_hashes(conn) -> None:
+    """Content hashes on offers and a url index, so merged offers are recognised on the next crawl"""
+    await conn.execute("""
+        ALTER TABLE sources ADD COLUMN IF NOT EXISTS content_hash TEXT;
+        CREATE INDEX IF NOT EXISTS idx_sources_url ON sources(url);
+    """)
+
+
+def _db_row(listing: Listing) -> tuple:
+    from laser_intelligence.dedup import minhash, lsh_band_keys
+    if listing.content_hash is None:
+        listing.content_hash = content_hash(listing)
+    return listing.to_db_row() + (lsh_band_keys(minhash(listing)), listing.content_hash)
+
+
+async def _changed_listings(conn, listings: List[Listing]) -> List[Listing]:
+    """Listings that are new, whose content hash differs from the stored row or offer, or that newly sold"""
+    for listing in listings:
+        if listing.content_hash is None:
+            listing.content_hash = content_hash(listing)
+    rows = await conn.fetch(STORED_STATE_SQL, [listing.url for listing in listings])
+    stored = {}
+    for row in rows:
+        # A url's own row wins over an offer of the same url
+        if row['url'] not in stored or row['status'] is not None:
+            stored[row['url']] = row
+    return [
+        listing for listing in listings
+        if listing.url not in stored
+        or stored[listing.url]['content_hash'] != listing.content_hash
+        or (listing.status == 'sold' and stored[listing.url]['status'] not in (None, 'sold'))
+    ]
+
+
+async def upsert_listings(conn, listings: Iterable[Listing], dedupe: bool = True,
+                          generation: Optional[int] = None) -> int:
+    """Insert or update listings, collapsing cross-source duplicates into one row per item.
+
+    Listings are clustered with MinHash/LSH against each other and against
+    existing rows that share an LSH band. Each cluster writes one
+    lasermatch_items row and one sources row per offer; written rows then
+    feed listing_price_history and the recrawl schedule and are percolated
+    against saved searches.
+    Listings whose url is stored with the same content hash are skipped
+    before any of that. Every url in the batch, written or skipped, is then
+    stamped as seen by the crawl generation (see generations.py), along with
+    the row it is an offer of, and its fingerprint recorded for incremental
+    crawls.
+    Returns the number of listing rows written.
+    """
+    listings = [listing for listing in listings if listing.url]
+    if not listings:
+        return 0
+    batch = listings
+    seen = [listing.url for listing in listings]
+    listings = await _changed_listings(conn, listings)
+    written = await _write_listings(conn, listings, dedupe) if listings else 0
+    await mark_seen(conn, seen, generation)
+    # Incremental crawls skip a listing only once the database holds its current content.
+    # The SQLite store may be write-locked by a spider, so it is written off the event loop
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, remember_written, batch)
+    except Exception as e:
+        print(f"⚠️ Could not record crawl fingerprints: {e}")
+    return written
+
+
+async def _write_listings(conn, listings: List[Listing], dedupe: bool) -> int:
+    if not dedupe:
+        await conn.executemany(UPSERT_LISTING_SQL, [_db_row(listing) for listing in listings])
+        await _after_write(conn, listings)
+        return len(listings)
+
+    from laser_intelligence.dedup import ListingDeduplicator
+    deduplicator = ListingDeduplicator()
+    deduplicator.add_all(listings)
+    existing = await conn.fetch(CANDIDATE_SQL, deduplicator.all_band_keys())
+    for row in existing:
+        deduplicator.add(Listing.from_mapping(row), existing_id=row['id'])
+    if deduplicator.skipped_comparisons:
+        print(f"⚠️ Dedup skipped {deduplicator.skipped_comparisons} candidate comparisons over the per-listing cap")
+    # Clusters made only of already stored rows have nothing new to write
+    batch = {id(listing) for listing in listings}
+    clusters = [
+        cluster for cluster in deduplicator.clusters()
+        if any(id(member) in batch for member in cluster.members)
+    ]
+
+    written = []
+    for cluster in clusters:
+        if cluster.existing_id is None:
+            written.append(cluster.canonical)
+        else:
+            # Fresh scrapes of the already stored url update that row in place
+            written.extend(
+                member for member in cluster.members
+                if member.url == cluster.canonical.url and member is not cluster.canonical
+            )
+    if written:
+        await conn.executemany(UPSERT_LISTING_SQL, [_db_row(listing) for listing in written])
+        await _after_write(conn, written)
+
+    await _upsert_offers(conn, clusters)
+    return len(written)
+
+
+async def _after_write(conn, written: List[Listing]) -> None:
+    """Append price changes to the price history, record sales as comps, (re)schedule recrawls and raise saved-search alerts"""
+    await record_prices(conn, [(listing.url, listing.price) for listing in written])
+    await track_listings(conn, [listing for listing in written if listing.status == 'active'])
+    sold = [listing.url for listing in written if listing.status == 'sold']
+    if sold:
+        await record_sold(conn, urls=sold)
+    alerts = await percolate(conn, written)
+    if alerts:
+        print(f"🔔 {alerts} saved search alerts")
+
+
+async def _upsert_offers(conn, clusters: List["EquipmentCluster"]) -> None:
+    """Record every listing of a cluster as a per-source offer of its canonical item"""
+    new_urls = [cluster.canonical.url for cluster in clusters if cluster.existing_id is None]
+    item_ids: Dict[str, int] = {}
+    if new_urls:
+        id_rows = await conn.fetch("SELECT id, url FROM lasermatch_items WHERE url = ANY($1::text[])", new_urls)
+        item_ids = {row['url']: row['id'] for row in id_rows}
+
+    offer_rows = []
+    for cluster in clusters:
+        item_id = cluster.existing_id or item_ids.get(cluster.canonical.url)
+        if item_id is None:
+            continue
+        hashes = {member.url: member.content_hash for member in cluster.members if member.content_hash}
+        for offer in cluster.offers:
+            offer_rows.append((item_id, offer["source"] or "Unknown", offer["url"], offer["price"],
+                               hashes.get(offer["url"])))
+    if offer_rows:
+        await conn.executemany(UPSERT_OFFER_SQL, offer_rows)
+
+
+async def reset_dedupe_bands(conn) -> int:
+    """Recompute every row's LSH bands, e.g. after the signature or band layout changed"""
+    await conn.execute("UPDATE lasermatch_items SET dedupe_bands = NULL WHERE dedupe_bands IS NOT NULL")
+    return await backfill_dedupe_bands(conn)
+
+
+async def backfill_dedupe_bands(conn, batch_size: int = 5000) -> int:
+    """Compute LSH bands for rows stored before deduplication existed"""
+    from laser_intelligence.dedup import minhash, lsh_band_keys
+    updated = 0
+    while True:
+        rows = await conn.fetch(
+            "SELECT id, title, brand, model FROM lasermatch_items WHERE dedupe_bands IS NULL LIMIT $1",
+            batch_size
+        )
+        if not rows:
+            return updated
+        await conn.executemany(
+            "UPDATE lasermatch_items SET dedupe_bands = $2 WHERE id = $1",
+            [(row['id'], lsh_band_keys(minhash(Listing.from_mapping(row)))) for row in rows]
+        )
+        updated += len(rows)
+
+
+async def fetch_offers(conn, item_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Per-source offers for the given items, cheapest first"""
+    rows = await conn.fetch("""
+        SELECT item_id, source_name, url, price FROM sources
+        WHERE item_id = ANY($1::int[]) AND url IS NOT NULL
+        ORDER BY item_id, price NULLS LAST
+    """, item_ids)
+    offers: Dict[int, List[Dict[str, Any]]] = {}
+    for row in rows:
+        offers.setdefault(row['item_id'], []).append({
+            "source": row['source_name'],
+            "url": row['url'],
+            "price": float(row['price']) if row['price'] is not None else None
+        })
+    return offers
+
+
+def records_to_listings(rows: Iterable[Any]) -> List[Listing]:
+    """Convert asyncpg records to listings"""
+    return [Listing.from_mapping(row) for row in rows]
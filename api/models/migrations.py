@@ -0,0 +1,224 @@
+"""
+Versioned, run-once schema migrations
+
+Each migration runs once per database, inside a transaction, and is recorded
+in schema_migrations. On boot run_migrations() costs a single SELECT when the
+schema is current, instead of re-issuing every CREATE ... IF NOT EXISTS.
+Add new schema changes as a new entry at the end of MIGRATIONS; never edit
+one that has shipped.
+
+The first migrations are the DDL init_db() used to run on every start, all
+written with IF NOT EXISTS, so databases created before this module adopt it
+cleanly.
+"""
+
+from typing import Awaitable, Callable, List, Tuple
+
+import asyncpg
+
+# pg_advisory_lock key so concurrent workers don't race the same migration
+MIGRATION_LOCK_ID = 7_340_021
+
+
+async def _base_tables(conn) -> None:
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS lasermatch_items (
+            id SERIAL PRIMARY KEY,
+            title VARCHAR(500) NOT NULL,
+            brand VARCHAR(100),
+            model VARCHAR(100),
+            condition VARCHAR(50),
+            price DECIMAL(12,2),
+            location VARCHAR(200),
+            description TEXT,
+            url TEXT UNIQUE,
+            images TEXT[],
+            discovered_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            last_updated TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            source VARCHAR(100) DEFAULT 'LaserMatch.io',
+            status VARCHAR(50) DEFAULT 'active',
+            category VARCHAR(100),
+            availability VARCHAR(50),
+            assigned_rep VARCHAR(100),
+            target_price DECIMAL(12,2),
+            notes TEXT,
+            spider_urls TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS notes (
+            id SERIAL PRIMARY KEY,
+            item_id INTEGER REFERENCES lasermatch_items(id) ON DELETE CASCADE,
+            user_name VARCHAR(100) NOT NULL,
+            note_text TEXT NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        );
+
+        CREATE TABLE IF NOT EXISTS sources (
+            id SERIAL PRIMARY KEY,
+            item_id INTEGER REFERENCES lasermatch_items(id) ON DELETE CASCADE,
+            source_name VARCHAR(100) NOT NULL,
+            contact_info TEXT,
+            price DECIMAL(12,2),
+            follow_up_date DATE,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        );
+
+        CREATE TABLE IF NOT EXISTS spider_urls (
+            id SERIAL PRIMARY KEY,
+            item_id INTEGER REFERENCES lasermatch_items(id) ON DELETE CASCADE,
+            url TEXT NOT NULL,
+            source_name VARCHAR(100),
+            status VARCHAR(50) DEFAULT 'pending',
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_lasermatch_items_brand ON lasermatch_items(brand);
+        CREATE INDEX IF NOT EXISTS idx_lasermatch_items_model ON lasermatch_items(model);
+        CREATE INDEX IF NOT EXISTS idx_lasermatch_items_status ON lasermatch_items(status);
+        CREATE INDEX IF NOT EXISTS idx_lasermatch_items_assigned_rep ON lasermatch_items(assigned_rep);
+        CREATE INDEX IF NOT EXISTS idx_lasermatch_items_discovered_at ON lasermatch_items(discovered_at);
+    """)
+
+
+async def _dedup_schema(conn) -> None:
+    from api.models.listings import init_dedup_schema
+    await init_dedup_schema(conn)
+
+
+async def _dedup_backfill(conn) -> None:
+    from api.models.listings import backfill_dedupe_bands
+    backfilled = await backfill_dedupe_bands(conn)
+    if backfilled:
+        print(f"🔁 Backfilled dedupe bands for {backfilled} items")
+
+
+async def _stats_rollup(conn) -> None:
+    from api.models.stats import init_stats_rollup
+    await init_stats_rollup(conn)
+
+
+async def _price_history(conn) -> None:
+    from api.models.price_history import init_price_history
+    await init_price_history(conn)
+
+
+async def _saved_searches(conn) -> None:
+    from api.models.saved_searches import init_saved_searches
+    await init_saved_searches(conn)
+
+
+async def _price_comps(conn) -> None:
+    from api.models.price_comps import init_price_comps
+    await init_price_comps(conn)
+
+
+async def _recrawl_schedule(conn) -> None:
+    from api.models.recrawl import init_recrawl_schedule
+    await init_recrawl_schedule(conn)
+
+
+async def _worker_checkpoints(conn) -> None:
+    from api.models.checkpoints import init_worker_checkpoints
+    await init_worker_checkpoints(conn)
+
+
+async def _crawl_queue(conn) -> None:
+    from api.models.crawl_queue import init_crawl_queue
+    await init_crawl_queue(conn)
+
+
+async def _crawl_generations(conn) -> None:
+    from api.models.generations import init_generations
+    await init_generations(conn)
+
+
+async def _url_checks(conn) -> None:
+    from api.models.url_checks import init_url_checks
+    await init_url_checks(conn)
+
+
+async def _partitioned_price_history(conn) -> None:
+    from api.models.price_history import partition_price_history
+    await partition_price_history(conn)
+
+
+async def _stats_rollup_null_groups(conn) -> None:
+    from api.models.stats import rebuild_stats_rollup
+    await rebuild_stats_rollup(conn)
+
+
+async def _dedupe_bands_4_rows(conn) -> None:
+    from api.models.listings import reset_dedupe_bands
+    rebuilt = await reset_dedupe_bands(conn)
+    if rebuilt:
+        print(f"🔁 Recomputed dedupe bands for {rebuilt} items")
+
+
+async def _offer_hashes(conn) -> None:
+    from api.models.listings import init_offer_hashes
+    await init_offer_hashes(conn)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[..., Awaitable[None]]]] = [
+    (1, "base_tables", _base_tables),
+    (2, "dedup_schema", _dedup_schema),
+    (3, "dedup_backfill", _dedup_backfill),
+    (4, "stats_rollup", _stats_rollup),
+    (5, "price_history", _price_history),
+    (6, "saved_searches", _saved_searches),
+    (7, "price_comps", _price_comps),
+    (8, "recrawl_schedule", _recrawl_schedule),
+    (9, "worker_checkpoints", _worker_checkpoints),
+    (10, "crawl_queue", _crawl_queue),
+    (11, "crawl_generations", _crawl_generations),
+    (12, "url_checks", _url_checks),
+    (13, "partitioned_price_history", _partitioned_price_history),
+    (14, "stats_rollup_null_groups", _stats_rollup_null_groups),
+    (15, "dedupe_bands_4_rows", _dedupe_bands_4_rows),
+    (16, "offer_hashes", _offer_hashes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+async def _applied_versions(conn) -> set:
+    rows = await conn.fetch("SELECT version FROM schema_migrations")
+    return {row['version'] for row in rows}
+
+
+async def run_migrations(conn) -> List[str]:
+    """Apply pending migrations in order; returns the names of those applied"""
+    try:
+        current = await conn.fetchval("SELECT MAX(version) FROM schema_migrations")
+        if current is not None and current >= LATEST_VERSION:
+            return []
+    except asyncpg.exceptions.UndefinedTableError:
+        pass
+
+    applied = []
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+    try:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+            )
+        """)
+        done = await _applied_versions(conn)
+        for version, name, migrate in MIGRATIONS:
+            if version in done:
+                continue
+            print(f"🗄️ Applying migration {version}: {name}")
+            async with conn.transaction():
+                await migrate(conn)
+                await conn.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)", version, name
+                )
+            applied.append(name)
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+    return applied
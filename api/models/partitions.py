@@ -0,0 +1,136 @@
+"""
+Monthly range partitions for append-only, time-keyed tables
+
+A partitioned table gets one child per calendar month, named
+<table>_pYYYYMM, plus a default partition (<table>_default) that catches
+rows outside the created range so writes never fail. Partitions are created
+a few months ahead; retention detaches (and by default drops) whole months
+past the cutoff, which costs the same however many rows they hold and leaves
+no bloat behind, instead of a DELETE that scans and cascades. Queries
+filtered on the partition key only read the months they cover.
+
+Rows that landed in the default partition are moved into their month's
+partition when it is created, so retention reaches them too.
+"""
+
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+PARTITION_MONTHS_AHEAD = 3
+# 'drop' removes expired months; 'detach' keeps them as standalone tables to archive elsewhere
+PARTITION_RETENTION = os.getenv("PARTITION_RETENTION", "drop")
+
+_PARTITION_RE = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+async def _partition_key(conn, table: str) -> str:
+    """Column a RANGE-partitioned table is partitioned on"""
+    definition = await conn.fetchval("SELECT pg_get_partkeydef($1::regclass)", table)
+    return definition[definition.index('(') + 1:definition.rindex(')')].strip()
+
+
+async def create_month_partition(conn, table: str, month: date) -> bool:
+    """Create the table's partition for the month; False if it already exists
+
+    Postgres refuses the partition while the default partition holds rows of
+    that month, so the default is detached, its rows for the month moved into
+    the new partition and the default reattached. Call inside a transaction.
+    """
+    name = partition_name(table, month)
+    if await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", name):
+        return False
+    start, end = f"{month.isoformat()} 00:00+00", f"{add_months(month, 1).isoformat()} 00:00+00"
+    create = f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM ('{start}') TO ('{end}')"
+    default = default_partition_name(table)
+    key = await _partition_key(conn, table)
+    in_default = await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", default) and await conn.fetchval(
+        f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {key} >= '{start}' AND {key} < '{end}')"
+    )
+    if not in_default:
+        await conn.execute(create)
+        return True
+    await conn.execute(f"ALTER TABLE {table} DETACH PARTITION {default}")
+    await conn.execute(create)
+    moved = await conn.execute(f"""
+        WITH moved AS (
+            DELETE FROM {default} WHERE {key} >= '{start}' AND {key} < '{end}' RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """)
+    await conn.execute(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+    print(f"📦 Moved {moved.split()[-1]} {table} rows from the default partition into {name}")
+    return True
+
+
+async def ensure_partitions(conn, table: str, start: Optional[date] = None,
+                            months_ahead: int = PARTITION_MONTHS_AHEAD) -> int:
+    """Create monthly partitions from start (default: this month) to months_ahead; returns partitions created
+
+    Starts earlier when the default partition holds older rows, so those
+    move into months that retention can expire.
+    """
+    current = month_start(datetime.now(timezone.utc).date())
+    month = month_start(start) if start else current
+    default = default_partition_name(table)
+    if await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", default):
+        key = await _partition_key(conn, table)
+        oldest = await conn.fetchval(f"SELECT MIN({key}) FROM {default}")
+        if oldest is not None:
+            month = min(month, month_start(oldest.astimezone(timezone.utc).date()))
+    created = 0
+    while month <= add_months(current, months_ahead):
+        try:
+            async with conn.transaction():
+                created += await create_month_partition(conn, table, month)
+        except Exception as e:
+            # Its rows stay in the default partition until a later run creates the month
+            print(f"⚠️ Could not create partition {partition_name(table, month)}: {e}")
+        month = add_months(month, 1)
+    return created
+
+
+async def list_partitions(conn, table: str) -> List[str]:
+    """Monthly partitions of the table, oldest first"""
+    rows = await conn.fetch("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = $1::regclass
+    """, table)
+    return sorted(row['relname'] for row in rows if _PARTITION_RE.search(row['relname']))
+
+
+async def expire_partitions(conn, table: str, keep_months: int, mode: str = PARTITION_RETENTION) -> List[str]:
+    """Detach (and unless mode is 'detach', drop) months older than the last keep_months; returns them"""
+    cutoff = add_months(month_start(datetime.now(timezone.utc).date()), -keep_months)
+    expired = []
+    for name in await list_partitions(conn, table):
+        year, month = _PARTITION_RE.search(name).groups()
+        if date(int(year), int(month), 1) >= cutoff:
+            continue
+        await conn.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+        if mode != "detach":
+            await conn.execute(f"DROP TABLE {name}")
+        expired.append(name)
+    if expired:
+        action = "Detached" if mode == "detach" else "Dropped"
+        print(f"🗑️ {action} {len(expired)} {table} partitions before {cutoff:%Y-%m}")
+    return expired
@@ -0,0 +1,90 @@
+"""
+Comparable sales (price_comps) recorded from sold listings, mirrored into the in-memory comps index
+"""
+
+from typing import List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from laser_intelligence.comps import CompsIndex
+
+COMP_COLUMNS = ('brand', 'model', 'condition', 'year', 'sold_price', 'sold_date', 'source', 'url')
+
+# One statement for the batch; RETURNING names the comps actually inserted, so a
+# sale another process recorded first is not added to the in-memory index twice
+INSERT_COMPS_SQL = f"""
+    INSERT INTO price_comps ({', '.join(COMP_COLUMNS)})
+    SELECT * FROM unnest($1::text[], $2::text[], $3::text[], $4::int[], $5::numeric[],
+                         $6::timestamptz[], $7::text[], $8::text[])
+    ON CONFLICT (url) DO NOTHING
+    RETURNING url
+"""
+
+# Sold lasermatch_items rows that have not been recorded as comps yet
+SOLD_ITEMS_SQL = """
+    SELECT i.title, i.description, i.brand, i.model, i.condition, i.price, i.last_updated, i.source, i.url
+    FROM lasermatch_items i
+    WHERE i.status = 'sold' AND i.price > 0 AND i.url IS NOT NULL
+      AND ($1::text[] IS NULL OR i.url = ANY($1))
+      AND ($2::int[] IS NULL OR i.id = ANY($2))
+      AND NOT EXISTS (SELECT 1 FROM price_comps c WHERE c.url = i.url)
+"""
+
+
+async def init_price_comps(conn) -> None:
+    """Create price_comps and seed it with listings already marked sold"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS price_comps (
+            id SERIAL PRIMARY KEY,
+            brand VARCHAR(100),
+            model VARCHAR(100),
+            modality VARCHAR(100),
+            condition VARCHAR(50),
+            year INTEGER,
+            sold_price DECIMAL(12,2) NOT NULL,
+            sold_date TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            source VARCHAR(100),
+            url TEXT UNIQUE
+        );
+        CREATE INDEX IF NOT EXISTS idx_price_comps_brand_model ON price_comps(brand, model);
+    """)
+    await record_sold(conn)
+
+
+async def record_sold(conn, urls: Optional[List[str]] = None, item_ids: Optional[List[int]] = None) -> int:
+    """Record sold listings (all, or those with the given urls/ids) as comps; returns comps added"""
+    from laser_intelligence.comps import Comp, add_comps
+    rows = await conn.fetch(SOLD_ITEMS_SQL, urls, item_ids)
+    comps = [Comp.from_mapping(row) for row in rows]
+    if not comps:
+        return 0
+    inserted = await conn.fetch(INSERT_COMPS_SQL,
+        [comp.brand for comp in comps],
+        [comp.model for comp in comps],
+        [comp.condition for comp in comps],
+        [comp.year for comp in comps],
+        [comp.sold_price for comp in comps],
+        [row['last_updated'] for row in rows],
+        [comp.source for comp in comps],
+        [comp.url for comp in comps]
+    )
+    inserted_urls = {row['url'] for row in inserted}
+    comps = [comp for comp in comps if comp.url in inserted_urls]
+    if not comps:
+        return 0
+    try:
+        add_comps(comps)
+    except OSError as e:
+        print(f"⚠️ Could not write comps cache: {e}")
+    return len(comps)
+
+
+async def refresh_comps(conn) -> "CompsIndex":
+    """Rebuild the comps cache from the whole price_comps table"""
+    from laser_intelligence.comps import Comp, CompsIndex, replace_comps
+    rows = await conn.fetch(f"SELECT {', '.join(COMP_COLUMNS)} FROM price_comps")
+    comps = [Comp.from_mapping(row) for row in rows]
+    try:
+        return replace_comps(comps)
+    except OSError as e:
+        print(f"⚠️ Could not write comps cache: {e}")
+        return CompsIndex(comps)
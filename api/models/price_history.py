@@ -0,0 +1,187 @@
+"""
+Append-only price history for lasermatch_items
+
+Every observed price change appends a row to listing_price_history, and
+listing_latest_price caches the current price per item so a batch can be
+compared against it without touching the history. History is time-ordered
+on insert, so a BRIN index on observed_at covers range scans at a fraction of
+a B-tree's size; per-item lookups use the (item_id, observed_at) index.
+
+The history is partitioned by month of observed_at (see partitions.py):
+windowed queries read only the months in their window, and retention drops
+whole months. History rows carry no foreign key, so deleting an item does not
+cascade into every partition; its rows age out with their month.
+"""
+
+import os
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from api.models.partitions import ensure_partitions, expire_partitions
+
+HISTORY_RETENTION_MONTHS = int(os.getenv("PRICE_HISTORY_RETENTION_MONTHS", "24"))
+
+# Schema as first created; partition_price_history later rebuilds the history partitioned
+PRICE_HISTORY_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS listing_price_history (
+        item_id INTEGER NOT NULL REFERENCES lasermatch_items(id) ON DELETE CASCADE,
+        price DECIMAL(12,2) NOT NULL,
+        observed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+    );
+    CREATE INDEX IF NOT EXISTS idx_listing_price_history_observed_at
+        ON listing_price_history USING BRIN (observed_at);
+    CREATE INDEX IF NOT EXISTS idx_listing_price_history_item
+        ON listing_price_history (item_id, observed_at DESC);
+
+    CREATE TABLE IF NOT EXISTS listing_latest_price (
+        item_id INTEGER PRIMARY KEY REFERENCES lasermatch_items(id) ON DELETE CASCADE,
+        price DECIMAL(12,2) NOT NULL,
+        observed_at TIMESTAMP WITH TIME ZONE NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_listing_latest_price_observed_at
+        ON listing_latest_price (observed_at);
+"""
+
+PARTITIONED_HISTORY_SCHEMA = """
+    CREATE TABLE listing_price_history (
+        item_id INTEGER NOT NULL,
+        price DECIMAL(12,2) NOT NULL,
+        observed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+    ) PARTITION BY RANGE (observed_at);
+    CREATE TABLE listing_price_history_default PARTITION OF listing_price_history DEFAULT;
+    CREATE INDEX idx_listing_price_history_observed_at
+        ON listing_price_history USING BRIN (observed_at);
+    CREATE INDEX idx_listing_price_history_item
+        ON listing_price_history (item_id, observed_at DESC);
+"""
+
+# Compare-then-insert: only observations that differ from the cached latest
+# price reach the history, and the cache is moved forward in the same statement
+RECORD_PRICES_SQL = """
+    WITH observed AS (
+        SELECT DISTINCT ON (i.id) i.id AS item_id, o.price
+        FROM unnest($1::text[], $2::numeric[]) AS o(url, price)
+        JOIN lasermatch_items i ON i.url = o.url
+        WHERE o.price > 0
+    ),
+    changed AS (
+        SELECT observed.item_id, observed.price
+        FROM observed
+        LEFT JOIN listing_latest_price latest USING (item_id)
+        WHERE latest.price IS DISTINCT FROM observed.price
+    ),
+    appended AS (
+        INSERT INTO listing_price_history (item_id, price)
+        SELECT item_id, price FROM changed
+        RETURNING item_id, price, observed_at
+    )
+    INSERT INTO listing_latest_price (item_id, price, observed_at)
+    SELECT item_id, price, observed_at FROM appended
+    ON CONFLICT (item_id) DO UPDATE SET
+        price = EXCLUDED.price,
+        observed_at = EXCLUDED.observed_at
+"""
+
+# Only items whose latest price changed inside the window can have dropped in
+# it; for each, compare against the highest price in effect during the window
+# (the last price before it started plus every change within it)
+PRICE_DROPS_SQL = """
+    SELECT i.id, i.title, i.brand, i.model, i.url, i.source,
+           latest.price AS current_price, reference.price AS previous_price,
+           latest.observed_at AS changed_at,
+           ROUND((1 - latest.price / reference.price) * 100, 1) AS drop_percent
+    FROM listing_latest_price latest
+    CROSS JOIN LATERAL (
+        SELECT MAX(price) AS price FROM (
+            (SELECT price FROM listing_price_history h
+             WHERE h.item_id = latest.item_id AND h.observed_at < NOW() - $1::interval
+             ORDER BY h.observed_at DESC LIMIT 1)
+            UNION ALL
+            (SELECT price FROM listing_price_history h
+             WHERE h.item_id = latest.item_id AND h.observed_at >= NOW() - $1::interval)
+        ) window_prices
+    ) reference
+    JOIN lasermatch_items i ON i.id = latest.item_id
+    WHERE latest.observed_at >= NOW() - $1::interval
+      AND reference.price > 0
+      AND latest.price <= reference.price * (1 - $2::numeric / 100)
+    ORDER BY drop_percent DESC
+    LIMIT $3
+"""
+
+
+async def init_price_history(conn) -> None:
+    """Create the history and latest-price tables, seeded with each item's current price"""
+    await conn.execute(PRICE_HISTORY_SCHEMA)
+    await conn.execute("""
+        WITH seeded AS (
+            INSERT INTO listing_price_history (item_id, price, observed_at)
+            SELECT id, price, COALESCE(last_updated, discovered_at, NOW())
+            FROM lasermatch_items
+            WHERE price > 0 AND id NOT IN (SELECT item_id FROM listing_latest_price)
+            ORDER BY 3
+            RETURNING item_id, price, observed_at
+        )
+        INSERT INTO listing_latest_price (item_id, price, observed_at)
+        SELECT item_id, price, observed_at FROM seeded
+        ON CONFLICT (item_id) DO NOTHING
+    """)
+
+
+async def partition_price_history(conn) -> None:
+    """Rebuild listing_price_history as a monthly partitioned table, keeping its rows"""
+    partitioned = await conn.fetchval(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = 'listing_price_history'::regclass"
+    )
+    if partitioned:
+        return
+    oldest = await conn.fetchval("SELECT MIN(observed_at) FROM listing_price_history")
+    await conn.execute("""
+        ALTER TABLE listing_price_history RENAME TO listing_price_history_unpartitioned;
+        DROP INDEX IF EXISTS idx_listing_price_history_observed_at;
+        DROP INDEX IF EXISTS idx_listing_price_history_item;
+    """)
+    await conn.execute(PARTITIONED_HISTORY_SCHEMA)
+    await ensure_partitions(conn, 'listing_price_history', oldest.date() if oldest else None)
+    await conn.execute("""
+        INSERT INTO listing_price_history (item_id, price, observed_at)
+        SELECT item_id, price, observed_at FROM listing_price_history_unpartitioned
+        ORDER BY observed_at
+    """)
+    await conn.execute("DROP TABLE listing_price_history_unpartitioned")
+
+
+async def maintain_price_history(conn, keep_months: int = HISTORY_RETENTION_MONTHS) -> List[str]:
+    """Create the coming months' partitions and expire those past retention; returns expired partitions"""
+    await ensure_partitions(conn, 'listing_price_history')
+    return await expire_partitions(conn, 'listing_price_history', keep_months)
+
+
+async def record_prices(conn, observations: Iterable[Tuple[str, Optional[float]]]) -> int:
+    """Append (url, price) observations whose price differs from the latest one; returns rows appended"""
+    observations = [(url, price) for url, price in observations if url and price]
+    if not observations:
+        return 0
+    result = await conn.execute(
+        RECORD_PRICES_SQL,
+        [url for url, _ in observations],
+        [price for _, price in observations]
+    )
+    return int(result.split()[-1])
+
+
+async def fetch_price_history(conn, item_id: int, limit: int = 100) -> List[Dict[str, Any]]:
+    """Price changes for one item, newest first"""
+    rows = await conn.fetch("""
+        SELECT price, observed_at FROM listing_price_history
+        WHERE item_id = $1
+        ORDER BY observed_at DESC
+        LIMIT $2
+    """, item_id, limit)
+    return [dict(row) for row in rows]
+
+
+async def fetch_price_drops(conn, percent: float = 10.0, days: int = 7, limit: int = 100) -> List[Dict[str, Any]]:
+    """Items whose price fell at least `percent` below their highest price of the last `days` days"""
+    rows = await conn.fetch(PRICE_DROPS_SQL, timedelta(days=days), percent, limit)
+    return [dict(row) for row in rows]
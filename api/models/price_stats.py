@@ -0,0 +1,72 @@
+"""
+Market price statistics learned from lasermatch_items, cached on disk for scoring
+"""
+
+import asyncio
+from typing import TYPE_CHECKING, Optional
+
+from api.models.database import get_db_connection
+from api.utils.metrics import CACHE_REQUESTS
+
+if TYPE_CHECKING:
+    from laser_intelligence.scoring import PriceStats
+
+
+async def refresh_price_stats(conn) -> "PriceStats":
+    """Recompute per-brand/model price distributions from history and update the cache"""
+    from laser_intelligence.scoring import PriceStats
+    rows = await conn.fetch("SELECT brand, model, price FROM lasermatch_items WHERE price > 0")
+    stats = PriceStats.from_rows(
+        [row['brand'] for row in rows],
+        [row['model'] for row in rows],
+        [row['price'] for row in rows]
+    )
+    if stats:
+        try:
+            stats.save()
+        except OSError as e:
+            print(f"⚠️ Could not write price stats cache: {e}")
+
+    # The comps cache grows incrementally; rebuild it only when this machine has none yet
+    from laser_intelligence.comps import current_comps
+    from api.models.price_comps import refresh_comps
+    if not current_comps():
+        await refresh_comps(conn)
+    return stats
+
+
+def get_price_stats(refresh_stale: bool = True) -> "PriceStats":
+    """Cached price stats, stale or not; a stale cache is refreshed by one background task
+
+    Requests never wait on the refresh (a full scan of lasermatch_items), and
+    concurrent requests share the single task in flight.
+    """
+    from laser_intelligence.scoring import PriceStats, PRICE_STATS_TTL
+    stats = PriceStats.load(max_age=PRICE_STATS_TTL)
+    CACHE_REQUESTS.inc(cache="price_stats", result="hit" if stats else "miss")
+    if stats:
+        return stats
+    if refresh_stale:
+        _start_background_refresh()
+    return PriceStats.load()
+
+
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def _start_background_refresh() -> None:
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.get_running_loop().create_task(_refresh_in_background())
+
+
+async def _refresh_in_background() -> None:
+    conn = await get_db_connection()
+    if not conn:
+        return
+    try:
+        await refresh_price_stats(conn)
+    except Exception as e:
+        print(f"⚠️ Price stats refresh failed: {e}")
+    finally:
+        await conn.close()
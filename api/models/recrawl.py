@@ -0,0 +1,220 @@
+"""
+Recrawl schedule for stored listings (see laser_intelligence/scheduler.py)
+
+recrawl_schedule holds one row per tracked listing url with its next-due
+time; recrawl_budgets holds each source's requests of the last hour so
+budgets carry over between worker runs. A run loads the rows into a RecrawlScheduler heap, pops
+what is due within budget, re-runs each source's spider once over the queries
+that find those listings, and writes the new due times back.
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from laser_intelligence.items import Listing
+from laser_intelligence.fingerprints import content_hash
+from laser_intelligence.marketplaces import MARKETPLACES, SOURCE_SPIDERS
+from laser_intelligence.scheduler import RecrawlScheduler, RecrawlTarget, new_target
+
+# Spider runner: (spider name, queries) -> listings found
+CrawlFn = Callable[[str, List[str]], Awaitable[List[Listing]]]
+
+RECRAWL_BUDGETS: Dict[str, int] = {name: config.recrawl_budget for name, config in MARKETPLACES.items()}
+
+TRACK_SQL = """
+    INSERT INTO recrawl_schedule (url, item_id, spider, query, auction_end, next_due, unchanged_checks, last_checked)
+    SELECT o.url, i.id, o.spider, o.query, o.auction_end, o.next_due, 0, NOW()
+    FROM unnest($1::text[], $2::text[], $3::text[], $4::timestamptz[], $5::timestamptz[])
+        AS o(url, spider, query, auction_end, next_due)
+    JOIN lasermatch_items i ON i.url = o.url
+    ON CONFLICT (url) DO UPDATE SET
+        spider = EXCLUDED.spider,
+        query = EXCLUDED.query,
+        auction_end = COALESCE(EXCLUDED.auction_end, recrawl_schedule.auction_end),
+        -- a search result without an end time must not push back a known lot's end-aware check
+        next_due = CASE WHEN EXCLUDED.auction_end IS NULL AND recrawl_schedule.auction_end IS NOT NULL
+                        THEN LEAST(recrawl_schedule.next_due, EXCLUDED.next_due)
+                        ELSE EXCLUDED.next_due END,
+        unchanged_checks = 0,
+        last_checked = NOW()
+"""
+
+SAVE_TARGETS_SQL = """
+    UPDATE recrawl_schedule s SET
+        next_due = t.next_due,
+        auction_end = t.auction_end,
+        unchanged_checks = t.unchanged_checks,
+        last_checked = t.last_checked
+    FROM unnest($1::text[], $2::timestamptz[], $3::timestamptz[], $4::int[], $5::timestamptz[])
+        AS t(url, next_due, auction_end, unchanged_checks, last_checked)
+    WHERE s.url = t.url
+"""
+
+SAVE_BUDGET_SQL = """
+    INSERT INTO recrawl_budgets (spider, requests) VALUES ($1, $2::timestamptz[])
+    ON CONFLICT (spider) DO UPDATE SET requests = EXCLUDED.requests
+"""
+
+
+async def init_recrawl_schedule(conn) -> None:
+    """Create the schedule and budget tables and track active listings from crawlable sources"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS recrawl_schedule (
+            url TEXT PRIMARY KEY,
+            item_id INTEGER REFERENCES lasermatch_items(id) ON DELETE CASCADE,
+            spider VARCHAR(100) NOT NULL,
+            query TEXT NOT NULL,
+            auction_end TIMESTAMP WITH TIME ZONE,
+            next_due TIMESTAMP WITH TIME ZONE NOT NULL,
+            unchanged_checks INTEGER NOT NULL DEFAULT 0,
+            last_checked TIMESTAMP WITH TIME ZONE
+        );
+        CREATE INDEX IF NOT EXISTS idx_recrawl_schedule_next_due ON recrawl_schedule(next_due);
+
+        CREATE TABLE IF NOT EXISTS recrawl_budgets (
+            spider VARCHAR(100) PRIMARY KEY,
+            requests TIMESTAMP WITH TIME ZONE[] NOT NULL
+        );
+    """)
+    rows = await conn.fetch(
+        "SELECT url, brand, model, source, last_updated FROM lasermatch_items "
+        "WHERE status = 'active' AND url IS NOT NULL AND source = ANY($1::text[])",
+        list(SOURCE_SPIDERS)
+    )
+    await track_listings(conn, [Listing.from_mapping(row) for row in rows])
+
+
+def recrawl_query(listing: Listing) -> Optional[str]:
+    """Search that finds the listing again: the one that found it, else brand and model"""
+    if listing.query:
+        return listing.query
+    words = [part for part in (listing.brand, listing.model) if part and not part.startswith('Unknown')]
+    return ' '.join(words) or None
+
+
+def _auction_end(listing: Listing) -> Optional[float]:
+    if not listing.auction_end:
+        return None
+    return datetime.fromisoformat(listing.auction_end.replace('Z', '+00:00')).timestamp()
+
+
+def _datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(timestamp, timezone.utc) if timestamp is not None else None
+
+
+async def track_listings(conn, listings: Iterable[Listing], now: Optional[float] = None) -> int:
+    """Start (or restart) the schedule of freshly crawled listings; returns rows tracked"""
+    now = time.time() if now is None else now
+    targets: List[RecrawlTarget] = []
+    for listing in listings:
+        spider = SOURCE_SPIDERS.get(listing.source)
+        query = recrawl_query(listing)
+        if spider and query and listing.url:
+            target = new_target(listing.url, spider, query, now, _auction_end(listing))
+            if target is not None:
+                targets.append(target)
+    if not targets:
+        return 0
+    await conn.execute(
+        TRACK_SQL,
+        [target.url for target in targets],
+        [target.source for target in targets],
+        [target.query for target in targets],
+        [_datetime(target.auction_end) for target in targets],
+        [_datetime(target.next_due) for target in targets]
+    )
+    return len(targets)
+
+
+async def load_scheduler(conn, now: Optional[float] = None, horizon: float = 0.0,
+                         spiders: Optional[List[str]] = None) -> RecrawlScheduler:
+    """Build the scheduler heap from rows due within horizon seconds, plus the request budgets"""
+    now = time.time() if now is None else now
+    scheduler = RecrawlScheduler(RECRAWL_BUDGETS)
+    budget_rows = await conn.fetch(
+        "SELECT spider, requests FROM recrawl_budgets WHERE $1::text[] IS NULL OR spider = ANY($1)", spiders
+    )
+    for row in budget_rows:
+        scheduler.budget(row['spider'], [requested.timestamp() for requested in row['requests']])
+    rows = await conn.fetch(
+        "SELECT url, item_id, spider, query, auction_end, next_due, unchanged_checks, last_checked "
+        "FROM recrawl_schedule WHERE next_due <= $1 AND ($2::text[] IS NULL OR spider = ANY($2))",
+        _datetime(now + horizon), spiders
+    )
+    for row in rows:
+        scheduler.schedule(RecrawlTarget(
+            url=row['url'],
+            source=row['spider'],
+            query=row['query'],
+            next_due=row['next_due'].timestamp(),
+            auction_end=row['auction_end'].timestamp() if row['auction_end'] else None,
+            unchanged_checks=row['unchanged_checks'],
+            last_checked=row['last_checked'].timestamp() if row['last_checked'] else None,
+            item_id=row['item_id']
+        ))
+    return scheduler
+
+
+async def save_scheduler(conn, scheduler: RecrawlScheduler, checked: List[RecrawlTarget]) -> None:
+    """Write back checked targets (deleting retired ones) and the request budgets"""
+    retired = [target.url for target in checked if target.url not in scheduler.targets]
+    kept = [target for target in checked if target.url in scheduler.targets]
+    if retired:
+        await conn.execute("DELETE FROM recrawl_schedule WHERE url = ANY($1::text[])", retired)
+    if kept:
+        await conn.execute(
+            SAVE_TARGETS_SQL,
+            [target.url for target in kept],
+            [_datetime(target.next_due) for target in kept],
+            [_datetime(target.auction_end) for target in kept],
+            [target.unchanged_checks for target in kept],
+            [_datetime(target.last_checked) for target in kept]
+        )
+    for spider, budget in scheduler.budgets.items():
+        await conn.execute(SAVE_BUDGET_SQL, spider, [_datetime(requested) for requested in budget.requests])
+
+
+async def run_due_recrawls(conn, crawl: CrawlFn, now: Optional[float] = None,
+                           spiders: Optional[List[str]] = None) -> Dict[str, int]:
+    """Re-check every listing that is due (of the given spiders), within per-source budgets; returns run counts"""
+    from api.models.listings import upsert_listings
+
+    now = time.time() if now is None else now
+    scheduler = await load_scheduler(conn, now, spiders=spiders)
+    due = scheduler.pop_due(now)
+    stats = {"due": sum(len(targets) for targets in due.values()), "requests": 0, "changed": 0,
+             "missing": 0, "retired": 0, "written": 0}
+    checked: List[RecrawlTarget] = []
+
+    for spider, targets in due.items():
+        queries = sorted({target.query for target in targets})
+        stats["requests"] += len(queries)
+        found = {listing.url: listing for listing in await crawl(spider, queries) if listing.url}
+        stored = {
+            row['url']: row['content_hash'] for row in await conn.fetch(
+                "SELECT url, content_hash FROM lasermatch_items WHERE url = ANY($1::text[])",
+                [target.url for target in targets]
+            )
+        }
+        fresh = []
+        for target in targets:
+            listing = found.get(target.url)
+            changed = False
+            auction_end = None
+            if listing is None:
+                stats["missing"] += 1
+            else:
+                listing.content_hash = content_hash(listing)
+                changed = stored.get(target.url) != listing.content_hash
+                auction_end = _auction_end(listing)
+                fresh.append(listing)
+            stats["changed"] += changed
+            if scheduler.complete(target, changed, now, auction_end) is None:
+                stats["retired"] += 1
+            checked.append(target)
+        if fresh:
+            stats["written"] += await upsert_listings(conn, fresh, dedupe=False)
+
+    await save_scheduler(conn, scheduler, checked)
+    return stats
@@ -0,0 +1,151 @@
+"""
+Saved searches and the alerts produced by percolating new listings against them
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+from laser_intelligence.items import Listing
+
+if TYPE_CHECKING:
+    from laser_intelligence.percolator import Percolator
+
+SAVED_SEARCH_FIELDS = ('name', 'query', 'brand', 'model', 'min_price', 'max_price', 'assigned_rep')
+
+INSERT_ALERTS_SQL = """
+    WITH inserted AS (
+        INSERT INTO saved_search_alerts (saved_search_id, item_id, price)
+        SELECT m.saved_search_id, i.id, i.price
+        FROM unnest($1::int[], $2::text[]) AS m(saved_search_id, url)
+        JOIN lasermatch_items i ON i.url = m.url
+        ON CONFLICT (saved_search_id, item_id) DO NOTHING
+        RETURNING saved_search_id
+    )
+    UPDATE saved_searches SET last_alert_at = NOW()
+    WHERE id IN (SELECT saved_search_id FROM inserted)
+    RETURNING (SELECT COUNT(*) FROM inserted)
+"""
+
+# The index is rebuilt only when this changes, so each ingest batch costs one cheap query
+INDEX_VERSION_SQL = "SELECT COUNT(*), COALESCE(MAX(id), 0) FROM saved_searches WHERE active"
+
+_percolator: Optional["Percolator"] = None
+_percolator_version: Optional[Tuple[int, int]] = None
+
+
+async def init_saved_searches(conn) -> None:
+    """Create the saved search and alert tables"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS saved_searches (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(200),
+            query TEXT,
+            brand VARCHAR(100),
+            model VARCHAR(100),
+            min_price DECIMAL(12,2),
+            max_price DECIMAL(12,2),
+            assigned_rep VARCHAR(100),
+            active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            last_alert_at TIMESTAMP WITH TIME ZONE
+        );
+
+        CREATE TABLE IF NOT EXISTS saved_search_alerts (
+            id SERIAL PRIMARY KEY,
+            saved_search_id INTEGER REFERENCES saved_searches(id) ON DELETE CASCADE,
+            item_id INTEGER REFERENCES lasermatch_items(id) ON DELETE CASCADE,
+            price DECIMAL(12,2),
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            seen_at TIMESTAMP WITH TIME ZONE,
+            UNIQUE (saved_search_id, item_id)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_saved_search_alerts_search ON saved_search_alerts(saved_search_id, created_at DESC);
+        CREATE INDEX IF NOT EXISTS idx_saved_search_alerts_unseen ON saved_search_alerts(created_at DESC) WHERE seen_at IS NULL;
+    """)
+
+
+async def get_percolator(conn) -> "Percolator":
+    """Index of the active saved searches, rebuilt when searches were added or removed"""
+    global _percolator, _percolator_version
+    from laser_intelligence.percolator import Percolator
+    version = tuple(await conn.fetchrow(INDEX_VERSION_SQL))
+    if _percolator is None or version != _percolator_version:
+        rows = await conn.fetch(
+            "SELECT id, query, brand, model, min_price, max_price FROM saved_searches WHERE active"
+        )
+        _percolator, _percolator_version = Percolator.from_rows(rows), version
+    return _percolator
+
+
+async def percolate(conn, listings: Iterable[Listing]) -> int:
+    """Match freshly written listings against every saved search; returns alerts created"""
+    listings = [listing for listing in listings if listing.url]
+    if not listings:
+        return 0
+    try:
+        percolator = await get_percolator(conn)
+        matches = percolator.percolate(listings)
+        if not matches:
+            return 0
+        created = await conn.fetchval(
+            INSERT_ALERTS_SQL,
+            [search_id for search_id, _ in matches],
+            [listing.url for _, listing in matches]
+        )
+        return created or 0
+    except Exception as e:
+        print(f"⚠️ Saved search percolation failed: {e}")
+        return 0
+
+
+async def create_saved_search(conn, data: Dict[str, Any]) -> Dict[str, Any]:
+    row = await conn.fetchrow(f"""
+        INSERT INTO saved_searches ({', '.join(SAVED_SEARCH_FIELDS)})
+        VALUES ({', '.join(f'${i}' for i in range(1, len(SAVED_SEARCH_FIELDS) + 1))})
+        RETURNING *
+    """, *(data.get(name) for name in SAVED_SEARCH_FIELDS))
+    return dict(row)
+
+
+async def fetch_saved_searches(conn, assigned_rep: Optional[str] = None) -> List[Dict[str, Any]]:
+    rows = await conn.fetch("""
+        SELECT s.*,
+               COUNT(a.id) AS alert_count,
+               COUNT(a.id) FILTER (WHERE a.seen_at IS NULL) AS unseen_count
+        FROM saved_searches s
+        LEFT JOIN saved_search_alerts a ON a.saved_search_id = s.id
+        WHERE s.active AND ($1::text IS NULL OR s.assigned_rep = $1)
+        GROUP BY s.id
+        ORDER BY s.created_at DESC
+    """, assigned_rep)
+    return [dict(row) for row in rows]
+
+
+async def deactivate_saved_search(conn, search_id: int) -> bool:
+    result = await conn.execute("UPDATE saved_searches SET active = FALSE WHERE id = $1 AND active", search_id)
+    return result == "UPDATE 1"
+
+
+async def fetch_alerts(conn, saved_search_id: Optional[int] = None, assigned_rep: Optional[str] = None,
+                       unseen_only: bool = False, limit: int = 100) -> List[Dict[str, Any]]:
+    """Alerts newest first, joined with the matched item"""
+    rows = await conn.fetch("""
+        SELECT a.id, a.saved_search_id, s.name AS saved_search_name, a.item_id, a.price AS alert_price,
+               a.created_at, a.seen_at, i.title, i.brand, i.model, i.price, i.condition, i.location, i.url, i.source
+        FROM saved_search_alerts a
+        JOIN saved_searches s ON s.id = a.saved_search_id
+        JOIN lasermatch_items i ON i.id = a.item_id
+        WHERE ($1::int IS NULL OR a.saved_search_id = $1)
+          AND ($2::text IS NULL OR s.assigned_rep = $2)
+          AND (NOT $3 OR a.seen_at IS NULL)
+        ORDER BY a.created_at DESC
+        LIMIT $4
+    """, saved_search_id, assigned_rep, unseen_only, limit)
+    return [dict(row) for row in rows]
+
+
+async def mark_alerts_seen(conn, alert_ids: List[int]) -> int:
+    result = await conn.execute(
+        "UPDATE saved_search_alerts SET seen_at = NOW() WHERE id = ANY($1::int[]) AND seen_at IS NULL", alert_ids
+    )
+    return int(result.split()[-1])
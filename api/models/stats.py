@@ -0,0 +1,138 @@
+"""
+Aggregate statistics for lasermatch_items backed by a materialized rollup
+"""
+
+from typing import Dict, Any, List
+import asyncpg
+
+# GROUPING() bitmask for each grouping set (source, status, assigned_rep)
+GROUP_TOTAL = 7
+GROUP_SOURCE = 3
+GROUP_STATUS = 5
+GROUP_REP = 6
+
+# Single pass over lasermatch_items producing the overall totals plus the
+# per-source, per-status and per-rep breakdowns used by the dashboards.
+# Group columns stay raw so a NULL group and an '' group are separate rows;
+# grouping_id tells a rolled-up NULL from a NULL value.
+STATS_QUERY = """
+    SELECT
+        GROUPING(source, status, assigned_rep) AS grouping_id,
+        source,
+        status,
+        assigned_rep,
+        COUNT(*) AS item_count,
+        COUNT(*) FILTER (WHERE status = 'active') AS active_count,
+        COUNT(*) FILTER (WHERE discovered_at >= NOW() - INTERVAL '7 days') AS recent_count,
+        AVG(price) FILTER (WHERE status = 'active' AND price IS NOT NULL) AS avg_price,
+        MIN(price) FILTER (WHERE status = 'active' AND price IS NOT NULL) AS min_price,
+        MAX(price) FILTER (WHERE status = 'active' AND price IS NOT NULL) AS max_price,
+        MAX(last_updated) AS last_update,
+        NOW() AS refreshed_at
+    FROM lasermatch_items
+    GROUP BY GROUPING SETS ((), (source), (status), (assigned_rep))
+"""
+
+
+async def init_stats_rollup(conn) -> None:
+    """Create the stats materialized view and the unique index needed for concurrent refresh"""
+    await conn.execute(f"""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS lasermatch_stats_rollup AS
+        {STATS_QUERY}
+    """)
+    # NULLS NOT DISTINCT (PostgreSQL 15+) makes the index enforce one row per
+    # group NULLs included; older servers still refresh concurrently without it
+    nulls = " NULLS NOT DISTINCT" if conn.get_server_version().major >= 15 else ""
+    await conn.execute(f"""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_lasermatch_stats_rollup_key
+        ON lasermatch_stats_rollup (grouping_id, source, status, assigned_rep){nulls}
+    """)
+
+
+async def rebuild_stats_rollup(conn) -> None:
+    """Recreate the stats rollup from the current STATS_QUERY"""
+    await conn.execute("DROP MATERIALIZED VIEW IF EXISTS lasermatch_stats_rollup")
+    await init_stats_rollup(conn)
+
+
+async def refresh_stats(conn) -> bool:
+    """Refresh the stats rollup, called once after each ingestion batch"""
+    try:
+        await conn.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY lasermatch_stats_rollup")
+        return True
+    except asyncpg.exceptions.UndefinedTableError:
+        await init_stats_rollup(conn)
+        return True
+    except asyncpg.exceptions.ObjectNotInPrerequisiteStateError:
+        # A view that was never populated cannot be refreshed concurrently
+        await conn.execute("REFRESH MATERIALIZED VIEW lasermatch_stats_rollup")
+        return True
+    except Exception as e:
+        print(f"⚠️ Stats rollup refresh failed: {e}")
+        return False
+
+
+async def fetch_stats(conn) -> Dict[str, Any]:
+    """Read precomputed stats rows, computing them live if the rollup is missing"""
+    try:
+        rows = await conn.fetch("SELECT * FROM lasermatch_stats_rollup")
+        rollup = "materialized"
+    except asyncpg.exceptions.UndefinedTableError:
+        rows = await conn.fetch(STATS_QUERY)
+        rollup = "live"
+
+    return build_stats(rows, rollup)
+
+
+def build_stats(rows: List[Any], rollup: str = "materialized") -> Dict[str, Any]:
+    """Shape GROUPING SETS rows into totals and breakdowns"""
+    totals = {
+        "total_items": 0,
+        "active_items": 0,
+        "recent_items": 0,
+        "avg_price": 0,
+        "min_price": 0,
+        "max_price": 0,
+        "last_update": None,
+        "refreshed_at": None
+    }
+    by_source = []
+    by_status = []
+    by_rep = []
+
+    for row in rows:
+        grouping_id = row['grouping_id']
+        if grouping_id == GROUP_TOTAL:
+            totals = {
+                "total_items": row['item_count'],
+                "active_items": row['active_count'],
+                "recent_items": row['recent_count'],
+                "avg_price": float(row['avg_price']) if row['avg_price'] else 0,
+                "min_price": float(row['min_price']) if row['min_price'] else 0,
+                "max_price": float(row['max_price']) if row['max_price'] else 0,
+                "last_update": row['last_update'],
+                "refreshed_at": row['refreshed_at']
+            }
+        elif grouping_id == GROUP_SOURCE:
+            by_source.append({
+                "source": row['source'],
+                "count": row['item_count'],
+                "active_count": row['active_count'],
+                "avg_price": float(row['avg_price']) if row['avg_price'] else 0,
+                "min_price": float(row['min_price']) if row['min_price'] else 0,
+                "max_price": float(row['max_price']) if row['max_price'] else 0
+            })
+        elif grouping_id == GROUP_STATUS:
+            by_status.append({"status": row['status'], "count": row['item_count']})
+        elif grouping_id == GROUP_REP and row['assigned_rep']:
+            by_rep.append({"assigned_rep": row['assigned_rep'], "count": row['item_count']})
+
+    by_source.sort(key=lambda x: x['count'], reverse=True)
+
+    return {
+        "totals": totals,
+        "by_source": by_source,
+        "by_status": by_status,
+        "by_rep": by_rep,
+        "rollup": rollup
+    }
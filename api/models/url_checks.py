@@ -0,0 +1,168 @@
+"""
+Liveness checks of listing URLs tracked in spider_urls (see laser_intelligence/liveness.py)
+
+Every stored listing url gets a spider_urls row that is due for a check at
+next_check_at. A checker leases a batch of due rows with FOR UPDATE SKIP
+LOCKED (so several workers split the table without overlap), checks them
+concurrently over HTTP, and writes all results back in one executemany that
+only touches rows it still holds the lease on. Live urls are rechecked daily,
+dead ones weekly, and errors back off exponentially. failures counts the
+current run of identical dead or error results. A listing is marked inactive
+only after DEAD_CONFIRMATIONS dead results in a row, so a transient or
+anti-bot 404 does not take it down, and a live result afterwards restores
+it. A listing a crawl has seen within CRAWL_SEEN_GRACE (through its own url
+or one of its offers) is left up whatever its url check says.
+"""
+
+from datetime import timedelta
+from typing import Dict, Optional
+
+from api.models.database import get_db_connection
+from laser_intelligence.liveness import UrlCheck, UrlTarget, check_urls
+
+LIVENESS_BATCH = 500
+LIVENESS_LEASE = timedelta(minutes=10)
+LIVE_RECHECK = timedelta(days=1)
+DEAD_RECHECK = timedelta(days=7)
+DEAD_CONFIRMATIONS = 3
+DEAD_CONFIRM_RECHECK = timedelta(hours=6)   # between dead results until confirmed
+ERROR_BACKOFF_BASE = timedelta(minutes=15)
+ERROR_BACKOFF_MAX = timedelta(days=1)
+CRAWL_SEEN_GRACE = timedelta(days=2)
+
+# Listings the checker does not know about yet; spider_urls.url is unique
+REGISTER_SQL = """
+    INSERT INTO spider_urls (item_id, url, source_name)
+    SELECT i.id, i.url, i.source FROM lasermatch_items i
+    WHERE i.url IS NOT NULL AND i.status IN ('active', 'stale')
+      AND NOT EXISTS (SELECT 1 FROM spider_urls s WHERE s.url = i.url)
+    ON CONFLICT (url) DO NOTHING
+"""
+
+LEASE_SQL = """
+    UPDATE spider_urls SET lease_owner = $1, lease_expires = NOW() + $3::interval
+    WHERE id IN (
+        SELECT id FROM spider_urls
+        WHERE next_check_at <= NOW() AND (lease_expires IS NULL OR lease_expires <= NOW())
+        ORDER BY next_check_at
+        LIMIT $2
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, item_id, url, status, etag, last_modified, failures
+"""
+
+SAVE_CHECK_SQL = """
+    UPDATE spider_urls SET
+        status = $3::text,
+        http_status = $4,
+        etag = $5,
+        last_modified = $6,
+        last_error = $7,
+        failures = $9,
+        checked_at = NOW(),
+        next_check_at = NOW() + $8::interval,
+        lease_owner = NULL,
+        lease_expires = NULL,
+        updated_at = NOW()
+    WHERE id = $1 AND lease_owner = $2
+"""
+
+
+async def init_url_checks(conn) -> None:
+    """Add check state to spider_urls and register the stored listings' urls"""
+    await conn.execute("""
+        ALTER TABLE spider_urls ADD COLUMN IF NOT EXISTS http_status INTEGER;
+        ALTER TABLE spider_urls ADD COLUMN IF NOT EXISTS etag TEXT;
+        ALTER TABLE spider_urls ADD COLUMN IF NOT EXISTS last_modified TEXT;
+        ALTER TABLE spider_urls ADD COLUMN IF NOT EXISTS last_error TEXT;
+        ALTER TABLE spider_urls ADD COLUMN IF NOT EXISTS failures INTEGER NOT NULL DEFAULT 0;
+        ALTER TABLE spider_urls ADD COLUMN IF NOT EXISTS checked_at TIMESTAMP WITH TIME ZONE;
+        ALTER TABLE spider_urls ADD COLUMN IF NOT EXISTS next_check_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW();
+        ALTER TABLE spider_urls ADD COLUMN IF NOT EXISTS lease_owner TEXT;
+        ALTER TABLE spider_urls ADD COLUMN IF NOT EXISTS lease_expires TIMESTAMP WITH TIME ZONE;
+
+        DELETE FROM spider_urls a USING spider_urls b WHERE a.url = b.url AND a.id > b.id;
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_spider_urls_url ON spider_urls(url);
+        CREATE INDEX IF NOT EXISTS idx_spider_urls_next_check ON spider_urls(next_check_at);
+    """)
+    await register_listing_urls(conn)
+
+
+async def register_listing_urls(conn) -> int:
+    """Start checking the urls of stored listings not tracked yet; returns rows added"""
+    result = await conn.execute(REGISTER_SQL)
+    return int(result.split()[-1])
+
+
+def result_run(check: UrlCheck, previous_status: Optional[str], failures: int) -> int:
+    """Length of the run of identical dead or error results this check extends (0 when live)"""
+    if check.status == 'live':
+        return 0
+    return failures + 1 if check.status == previous_status else 1
+
+
+def next_check(check: UrlCheck, run: int) -> timedelta:
+    if check.status == 'live':
+        return LIVE_RECHECK
+    if check.status == 'dead':
+        return DEAD_RECHECK if run >= DEAD_CONFIRMATIONS else DEAD_CONFIRM_RECHECK
+    return min(ERROR_BACKOFF_MAX, ERROR_BACKOFF_BASE * 2 ** (run - 1))
+
+
+async def check_due_urls(session, owner: str, batch_size: int = LIVENESS_BATCH) -> Optional[Dict[str, int]]:
+    """Lease one batch of due urls, check them and save the results; None when nothing is due
+
+    The connection goes back to the pool while the HTTP checks run.
+    """
+    conn = await get_db_connection()
+    if not conn:
+        raise ConnectionError("url checks require the database")
+    try:
+        rows = await conn.fetch(LEASE_SQL, owner, batch_size, LIVENESS_LEASE)
+    finally:
+        await conn.close()
+    if not rows:
+        return None
+
+    checks = await check_urls(session, [
+        UrlTarget(url=row['url'], etag=row['etag'], last_modified=row['last_modified']) for row in rows
+    ])
+    stats = {"checked": len(checks), "live": 0, "dead": 0, "error": 0}
+    for check in checks:
+        stats[check.status] += 1
+
+    conn = await get_db_connection()
+    if not conn:
+        raise ConnectionError("url checks require the database")
+    try:
+        runs = [result_run(check, row['status'], row['failures']) for row, check in zip(rows, checks)]
+        dead, revived = [], []
+        for row, check, run in zip(rows, checks, runs):
+            if row['item_id'] is None:
+                continue
+            if check.status == 'dead' and run >= DEAD_CONFIRMATIONS:
+                dead.append(row['item_id'])
+            elif check.status == 'live' and row['status'] == 'dead' and row['failures'] >= DEAD_CONFIRMATIONS:
+                revived.append(row['item_id'])
+        async with conn.transaction():
+            await conn.executemany(SAVE_CHECK_SQL, [
+                (row['id'], owner, check.status, check.http_status, check.etag, check.last_modified,
+                 check.error, next_check(check, run), run)
+                for row, check, run in zip(rows, checks, runs)
+            ])
+            if dead:
+                await conn.execute("""
+                    UPDATE lasermatch_items SET status = 'inactive', last_updated = NOW()
+                    WHERE id = ANY($1::int[]) AND status IN ('active', 'stale')
+                      AND (last_seen_at IS NULL OR last_seen_at < NOW() - $2::interval)
+                """, dead, CRAWL_SEEN_GRACE)
+            if revived:
+                # Only listings this checker took down come back
+                await conn.execute("""
+                    UPDATE lasermatch_items SET status = 'active', last_updated = NOW()
+                    WHERE id = ANY($1::int[]) AND status = 'inactive'
+                """, revived)
+    finally:
+        await conn.close()
+    return stats
+
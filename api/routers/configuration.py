@@ -5,18 +5,10 @@ import asyncpg
 import os
 from datetime import datetime
 
-router = APIRouter()
+from api.models.database import get_db_connection
+from api.models.stats import fetch_stats
 
-async def get_db_connection():
-    """Get database connection with fallback to in-memory storage"""
-    try:
-        database_url = os.getenv("DATABASE_URL")
-        if not database_url:
-            return None
-        return await asyncpg.connect(database_url)
-    except Exception as e:
-        print(f"Database connection failed: {e}")
-        return None
+router = APIRouter()
 
 @router.get("/status")
 async def get_system_status():
@@ -30,10 +22,11 @@ async def get_system_status():
         if conn:
             try:
                 # Get database info
+                stats = await fetch_stats(conn)
                 db_info = {
                     "connected": True,
-                    "item_count": await conn.fetchval("SELECT COUNT(*) FROM lasermatch_items"),
-                    "last_update": await conn.fetchval("SELECT MAX(last_updated) FROM lasermatch_items")
+                    "item_count": stats["totals"]["total_items"],
+                    "last_update": stats["totals"]["last_update"]
                 }
                 db_status = "connected"
                 await conn.close()
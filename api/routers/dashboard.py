@@ -5,18 +5,10 @@ import asyncpg
 import os
 from datetime import datetime, timedelta
 
-router = APIRouter()
+from api.models.database import get_db_connection
+from api.models.stats import fetch_stats
 
-async def get_db_connection():
-    """Get database connection with fallback to in-memory storage"""
-    try:
-        database_url = os.getenv("DATABASE_URL")
-        if not database_url:
-            return None
-        return await asyncpg.connect(database_url)
-    except Exception as e:
-        print(f"Database connection failed: {e}")
-        return None
+router = APIRouter()
 
 @router.get("/stats")
 async def get_dashboard_stats():
@@ -25,49 +17,24 @@ async def get_dashboard_stats():
         conn = await get_db_connection()
         if conn:
             try:
-                # Get total items
-                total_items = await conn.fetchval("SELECT COUNT(*) FROM lasermatch_items")
-                
-                # Get active items
-                active_items = await conn.fetchval("SELECT COUNT(*) FROM lasermatch_items WHERE status = 'active'")
-                
-                # Get items by source
-                source_stats = await conn.fetch("""
-                    SELECT source, COUNT(*) as count 
-                    FROM lasermatch_items 
-                    GROUP BY source 
-                    ORDER BY count DESC
-                """)
-                
-                # Get price statistics
-                price_stats = await conn.fetchval("""
-                    SELECT 
-                        AVG(price) as avg_price,
-                        MIN(price) as min_price,
-                        MAX(price) as max_price
-                    FROM lasermatch_items 
-                    WHERE price IS NOT NULL AND status = 'active'
-                """)
-                
-                # Get recent items (last 7 days)
-                recent_items = await conn.fetchval("""
-                    SELECT COUNT(*) 
-                    FROM lasermatch_items 
-                    WHERE discovered_at >= NOW() - INTERVAL '7 days'
-                """)
-                
+                # Read precomputed rollup rows instead of scanning lasermatch_items
+                stats = await fetch_stats(conn)
                 await conn.close()
                 
+                totals = stats["totals"]
                 return {
-                    "total_items": total_items,
-                    "active_items": active_items,
-                    "recent_items": recent_items,
-                    "source_breakdown": [dict(row) for row in source_stats],
+                    "total_items": totals["total_items"],
+                    "active_items": totals["active_items"],
+                    "recent_items": totals["recent_items"],
+                    "source_breakdown": [
+                        {"source": row["source"], "count": row["count"]} for row in stats["by_source"]
+                    ],
                     "price_stats": {
-                        "avg_price": float(price_stats['avg_price']) if price_stats['avg_price'] else 0,
-                        "min_price": float(price_stats['min_price']) if price_stats['min_price'] else 0,
-                        "max_price": float(price_stats['max_price']) if price_stats['max_price'] else 0,
+                        "avg_price": totals["avg_price"],
+                        "min_price": totals["min_price"],
+                        "max_price": totals["max_price"],
                     },
+                    "stats_refreshed_at": totals["refreshed_at"].isoformat() if totals["refreshed_at"] else None,
                     "source": "database",
                     "timestamp": datetime.now().isoformat()
                 }
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Header
+from typing import Optional, Dict, Any
+from datetime import datetime
+import os
+
+router = APIRouter()
+
+# When set, CRM pushes must send it as X-API-Key
+DEMAND_API_KEY = os.getenv("DEMAND_API_KEY")
+
+@router.post("/update")
+async def update_demand(request: Dict[str, Any], x_api_key: Optional[str] = Header(None)):
+    """Replace, append or remove buyer demand lines used to boost listing scores"""
+    # Imported on first use; the demand index builds on the numpy-backed scoring module
+    from laser_intelligence.demand import DemandItem, update_demand as apply_update
+
+    if DEMAND_API_KEY and x_api_key != DEMAND_API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
+    update_type = request.get('update_type', 'replace')
+    if update_type not in ('replace', 'append', 'remove'):
+        raise HTTPException(status_code=400, detail="update_type must be replace, append or remove")
+    try:
+        items = [DemandItem.from_mapping(item) for item in request.get('demand_items', [])]
+    except (ValueError, TypeError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid demand item: {str(e)}")
+
+    try:
+        index = apply_update(items, update_type)
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to store demand: {str(e)}")
+
+    return {
+        "message": "Demand updated",
+        "update_type": update_type,
+        "received": len(items),
+        "active_items": len(index.items),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@router.get("")
+async def get_demand():
+    """Open (unexpired) demand lines"""
+    from laser_intelligence.demand import current_demand
+    index = current_demand()
+    return {
+        "demand_items": index.to_dicts(),
+        "total": len(index.items),
+        "generated_at": datetime.fromtimestamp(index.generated_at).isoformat()
+    }
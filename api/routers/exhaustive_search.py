@@ -6,18 +6,13 @@ import os
 from datetime import datetime
 import json
 
-router = APIRouter()
+from api.models.database import get_db_connection
+from api.models.stats import refresh_stats
+from api.models.price_stats import refresh_price_stats
+from api.models.listings import upsert_listings
+from laser_intelligence.items import Listing
 
-async def get_db_connection():
-    """Get database connection with fallback to in-memory storage"""
-    try:
-        database_url = os.getenv("DATABASE_URL")
-        if not database_url:
-            return None
-        return await asyncpg.connect(database_url)
-    except Exception as e:
-        print(f"Database connection failed: {e}")
-        return None
+router = APIRouter()
 
 @router.get("/test")
 async def test_exhaustive_search():
@@ -67,14 +62,19 @@ async def perform_exhaustive_search(query: str, limit: int, mode: str = 'auto'):
             # Try real spiders only
             print("🚀 Using real data mode")
             try:
-                from .spiders import run_scrapy_spiders_parallel
+                from .spiders import run_scrapy_spiders_parallel, ALL_SPIDERS, EXHAUSTIVE_CRAWL_BUDGET
                 import os
                 
                 spider_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "laser-equipment-intelligence")
                 
                 if os.path.exists(spider_dir):
                     print(f"🚀 Running real spiders from: {spider_dir}")
-                    results = await run_scrapy_spiders_parallel(spider_dir, query, limit)
+                    # Deep crawl every source and keep the full inventory for the database
+                    results = await run_scrapy_spiders_parallel(
+                        spider_dir, query, None,
+                        spiders=ALL_SPIDERS,
+                        budget=EXHAUSTIVE_CRAWL_BUDGET
+                    )
                     print(f"✅ Spiders returned {len(results)} results")
                 else:
                     print(f"❌ Spider directory not found: {spider_dir}")
@@ -92,14 +92,19 @@ async def perform_exhaustive_search(query: str, limit: int, mode: str = 'auto'):
             # Try real spiders first, then fallback to mock
             print("🔄 Using auto mode (real spiders + mock fallback)")
             try:
-                from .spiders import run_scrapy_spiders_parallel
+                from .spiders import run_scrapy_spiders_parallel, ALL_SPIDERS, EXHAUSTIVE_CRAWL_BUDGET
                 import os
                 
                 spider_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "laser-equipment-intelligence")
                 
                 if os.path.exists(spider_dir):
                     print(f"🚀 Running real spiders from: {spider_dir}")
-                    results = await run_scrapy_spiders_parallel(spider_dir, query, limit)
+                    # Deep crawl every source and keep the full inventory for the database
+                    results = await run_scrapy_spiders_parallel(
+                        spider_dir, query, None,
+                        spiders=ALL_SPIDERS,
+                        budget=EXHAUSTIVE_CRAWL_BUDGET
+                    )
                     print(f"✅ Spiders returned {len(results)} results")
                 else:
                     print(f"❌ Spider directory not found: {spider_dir}")
@@ -120,19 +125,13 @@ async def perform_exhaustive_search(query: str, limit: int, mode: str = 'auto'):
         if conn:
             try:
                 for result in results:
-                    await conn.execute("""
-                        INSERT INTO lasermatch_items (
-                            title, brand, model, condition, price, location, 
-                            description, url, source, status, category, availability
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-                        ON CONFLICT (url) DO UPDATE SET
-                            price = EXCLUDED.price,
-                            last_updated = NOW()
-                    """, 
-                    result["title"], result["brand"], result["model"], result["condition"],
-                    result["price"], result["location"], result["description"], result["url"],
-                    result["source"], "active", "Laser System", "Available")
+                    result.status = "active"
+                    result.category = result.category or "Laser System"
+                    result.availability = result.availability or "Available"
+                await upsert_listings(conn, results)
                 
+                await refresh_stats(conn)
+                await refresh_price_stats(conn)
                 await conn.close()
                 print("✅ Search results saved to database")
             except Exception as e:
@@ -143,8 +142,9 @@ async def perform_exhaustive_search(query: str, limit: int, mode: str = 'auto'):
     except Exception as e:
         print(f"❌ Exhaustive search failed: {e}")
 
-def generate_intelligent_mock_results(query: str, limit: int) -> List[Dict[str, Any]]:
+def generate_intelligent_mock_results(query: str, limit: int) -> List[Listing]:
     """Generate intelligent mock results based on actual search patterns and real equipment data"""
+    from laser_intelligence.scoring import score_listings
     import random
     
     query_lower = query.lower()
@@ -257,28 +257,28 @@ def generate_intelligent_mock_results(query: str, limit: int) -> List[Dict[str,
             location = random.choice(locations)
             item_id = f"{source['name'].lower().replace(' ', '_')}_{random.randint(1000, 9999)}"
             
-            results.append({
-                "id": item_id,
-                "title": f"{brand} {model} Laser System",
-                "brand": brand,
-                "model": model,
-                "condition": condition,
-                "price": float(price),
-                "source": source["name"],
-                "location": location,
-                "description": f"Professional {brand} {model} laser system in {condition.lower()} condition. Perfect for aesthetic treatments and medical procedures.",
-                "url": f"{source['url']}{item_id}",
-                "images": [f"https://example.com/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}.jpg"],
-                "discovered_at": datetime.now().isoformat(),
-                "score_overall": random.randint(80, 95),
-                "status": "active"
-            })
+            results.append(Listing(
+                id=item_id,
+                title=f"{brand} {model} Laser System",
+                brand=brand,
+                model=model,
+                condition=condition,
+                price=float(price),
+                source=source["name"],
+                location=location,
+                description=f"Professional {brand} {model} laser system in {condition.lower()} condition. Perfect for aesthetic treatments and medical procedures.",
+                url=f"{source['url']}{item_id}",
+                images=[f"https://example.com/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}.jpg"],
+                discovered_at=datetime.now().isoformat(),
+                status="active"
+            ))
     
-    # Sort by score and price
-    results.sort(key=lambda x: (x['score_overall'], -x['price']), reverse=True)
+    # Sort by deal score and price
+    score_listings(results)
+    results.sort(key=lambda x: (x.score_overall, -x.price), reverse=True)
     return results[:limit]
 
-def generate_mock_exhaustive_results(query: str, limit: int) -> List[Dict[str, Any]]:
+def generate_mock_exhaustive_results(query: str, limit: int) -> List[Listing]:
     """Generate mock exhaustive search results as fallback (legacy function)"""
     return generate_intelligent_mock_results(query, limit)
 
@@ -6,6 +6,15 @@ import os
 from datetime import datetime
 import json
 
+from api.models.database import get_db_connection
+from api.models.stats import fetch_stats, refresh_stats
+from api.models.price_stats import refresh_price_stats
+from api.models.price_history import record_prices, fetch_price_history, fetch_price_drops
+from api.models.price_comps import record_sold
+from api.models.listings import upsert_listings, records_to_listings, fetch_offers
+from api.utils.responses import FastJSONResponse
+from laser_intelligence.items import Listing
+
 router = APIRouter()
 
 # In-memory storage for fallback when database is unavailable
@@ -13,16 +22,37 @@ lasermatch_items_memory = []
 _lasermatch_items = []
 _last_refresh = None
 
-async def get_db_connection():
-    """Get database connection with fallback to in-memory storage"""
-    try:
-        database_url = os.getenv("DATABASE_URL")
-        if not database_url:
-            return None
-        return await asyncpg.connect(database_url)
-    except Exception as e:
-        print(f"Database connection failed: {e}")
-        return None
+def load_lasermatch_file(prefer_api_data: bool = True) -> List[Listing]:
+    """Load LaserMatch listings from the prepared API data file or the newest scraped file"""
+    # Get the project root directory
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    api_data_file = os.path.join(project_root, "lasermatch_api_data.json")
+    scraped_files = [f for f in os.listdir(project_root) if f.startswith("lasermatch_scraped_") and f.endswith(".json")]
+    
+    if prefer_api_data and os.path.exists(api_data_file):
+        file_path = api_data_file
+    elif scraped_files:
+        file_path = os.path.join(project_root, max(scraped_files))
+    elif os.path.exists(api_data_file):
+        file_path = api_data_file
+    else:
+        return []
+    
+    print(f"Loading LaserMatch data from: {os.path.basename(file_path)}")
+    with open(file_path, 'r') as f:
+        raw_items = json.load(f)
+    
+    listings = []
+    for i, item in enumerate(raw_items):
+        listing = Listing.from_mapping(item)
+        if listing.id is None:
+            listing.id = i + 1
+        if not listing.price or listing.price <= 0:
+            listing.price = 25000.0
+        listings.append(listing)
+    
+    print(f"✅ Loaded {len(listings)} items from {os.path.basename(file_path)}")
+    return listings
 
 async def init_lasermatch_table():
     """Initialize LaserMatch items table"""
@@ -41,7 +71,7 @@ async def init_lasermatch_table():
                 price DECIMAL(12,2),
                 location VARCHAR(200),
                 description TEXT,
-                url TEXT,
+                url TEXT UNIQUE,
                 images TEXT[],
                 discovered_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
                 last_updated TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
@@ -90,29 +120,27 @@ async def get_lasermatch_items(
                     param_count += 1
                     query += f" AND status = ${param_count}"
                     params.append(status)
+                else:
+                    # Listings swept stale by the crawl generations are only listed when asked for
+                    query += " AND status IS DISTINCT FROM 'stale'"
                 
                 query += f" ORDER BY discovered_at DESC LIMIT ${param_count + 1} OFFSET ${param_count + 2}"
                 params.extend([limit, offset])
                 
                 rows = await conn.fetch(query, *params)
-                await conn.close()
                 
-                # Convert to list of dicts
-                items = []
-                for row in rows:
-                    item = dict(row)
-                    # Convert datetime objects to ISO strings
-                    if item.get('discovered_at'):
-                        item['discovered_at'] = item['discovered_at'].isoformat()
-                    if item.get('last_updated'):
-                        item['last_updated'] = item['last_updated'].isoformat()
-                    items.append(item)
+                # Listings (datetimes, prices) are serialized natively by orjson
+                items = records_to_listings(rows)
+                offers = await fetch_offers(conn, [item.id for item in items])
+                for item in items:
+                    item.offers = offers.get(item.id, [])
+                await conn.close()
                 
-                return {
+                return FastJSONResponse({
                     "items": items,
                     "total": len(items),
                     "source": "database"
-                }
+                })
             except Exception as e:
                 print(f"Database query failed: {e}")
                 if conn:
@@ -122,38 +150,7 @@ async def get_lasermatch_items(
         global _lasermatch_items
         if not _lasermatch_items:
             try:
-                import json
-                import os
-                
-                # Get the project root directory
-                project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-                
-                # Try to load the latest scraped data first
-                scraped_files = [f for f in os.listdir(project_root) if f.startswith('lasermatch_scraped_') and f.endswith('.json')]
-                if scraped_files:
-                    # Get the most recent scraped file
-                    latest_scraped = sorted(scraped_files)[-1]
-                    scraped_file_path = os.path.join(project_root, latest_scraped)
-                    print(f"Loading scraped data from: {latest_scraped}")
-                    with open(scraped_file_path, 'r') as f:
-                        raw_items = json.load(f)
-                    
-                    # Add sequential IDs to scraped items
-                    _lasermatch_items = []
-                    for i, item in enumerate(raw_items):
-                        item_with_id = item.copy()
-                        item_with_id['id'] = i + 1
-                        _lasermatch_items.append(item_with_id)
-                    
-                    print(f"✅ Loaded {len(_lasermatch_items)} items from scraped data file")
-                else:
-                    # Fallback to prepared API data file
-                    api_data_file = os.path.join(project_root, "lasermatch_api_data.json")
-                    if os.path.exists(api_data_file):
-                        print(f"Loading API data from: lasermatch_api_data.json")
-                        with open(api_data_file, 'r') as f:
-                            _lasermatch_items = json.load(f)
-                        print(f"✅ Loaded {len(_lasermatch_items)} items from API data file")
+                _lasermatch_items = load_lasermatch_file(prefer_api_data=False)
             except Exception as e:
                 print(f"Failed to load scraped data: {e}")
                 _lasermatch_items = []
@@ -164,16 +161,16 @@ async def get_lasermatch_items(
         # Apply filters
         filtered_items = items_to_use
         if assigned_rep:
-            filtered_items = [item for item in filtered_items if item.get("assigned_rep") == assigned_rep]
+            filtered_items = [item for item in filtered_items if item.assigned_rep == assigned_rep]
         if status:
-            filtered_items = [item for item in filtered_items if item.get("status") == status]
+            filtered_items = [item for item in filtered_items if item.status == status]
         
         items = filtered_items[offset:offset + limit]
-        return {
+        return FastJSONResponse({
             "items": items,
             "total": len(filtered_items),
             "source": "memory"
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve items: {str(e)}")
@@ -197,9 +194,6 @@ async def refresh_lasermatch_items(background_tasks: BackgroundTasks):
 async def load_scraped_data():
     """Directly load the most recent scraped data"""
     try:
-        import json
-        import os
-        
         # Get the project root directory
         project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
         
@@ -209,12 +203,7 @@ async def load_scraped_data():
             raise HTTPException(status_code=404, detail="No scraped files found")
         
         latest_file = max(scraped_files)
-        file_path = os.path.join(project_root, latest_file)
-        
-        print(f"Loading scraped data from: {latest_file}")
-        
-        with open(file_path, 'r') as f:
-            scraped_items = json.load(f)
+        scraped_items = load_lasermatch_file(prefer_api_data=False)
         
         # Update global variables
         global _lasermatch_items, _last_refresh
@@ -226,24 +215,10 @@ async def load_scraped_data():
         if conn:
             try:
                 await init_lasermatch_table()
-                for item in scraped_items:
-                    await conn.execute("""
-                        INSERT INTO lasermatch_items (
-                            title, brand, model, condition, price, location, 
-                            description, url, images, source, status, category, 
-                            availability, assigned_rep, target_price, notes, spider_urls
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17)
-                        ON CONFLICT (url) DO UPDATE SET
-                            title = EXCLUDED.title,
-                            price = EXCLUDED.price,
-                            last_updated = NOW()
-                    """, 
-                    item["title"], item["brand"], item["model"], item["condition"], 
-                    item["price"], item["location"], item["description"], item["url"], 
-                    item["images"], item["source"], item["status"], item["category"], 
-                    item["availability"], item["assigned_rep"], item["target_price"], 
-                    item["notes"], item["spider_urls"])
+                await upsert_listings(conn, scraped_items)
                 
+                await refresh_stats(conn)
+                await refresh_price_stats(conn)
                 await conn.close()
                 print(f"✅ Saved {len(scraped_items)} items to database")
             except Exception as e:
@@ -269,103 +244,36 @@ async def scrape_lasermatch_items():
         # Initialize database table
         await init_lasermatch_table()
         
-        # Load scraped data directly
-        import json
-        import os
-        
-        # Get the project root directory
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        
-        # Try to load the prepared API data file first
-        api_data_file = os.path.join(project_root, "lasermatch_api_data.json")
-        if os.path.exists(api_data_file):
-            print(f"Loading API data from: lasermatch_api_data.json")
-            with open(api_data_file, 'r') as f:
-                mock_items = json.load(f)
-            print(f"✅ Loaded {len(mock_items)} items from API data file")
-        else:
-            # Fall back to finding the most recent scraped file
-            scraped_files = [f for f in os.listdir(project_root) if f.startswith("lasermatch_scraped_") and f.endswith(".json")]
-            if scraped_files:
-                latest_file = max(scraped_files)
-                file_path = os.path.join(project_root, latest_file)
-                
-                print(f"Loading scraped data from: {latest_file}")
-                
-                with open(file_path, 'r') as f:
-                    raw_data = json.load(f)
-                
-                # Convert to API format
-                mock_items = []
-                for item in raw_data:
-                    mock_items.append({
-                        "id": i + 1,
-                        "title": item["title"],
-                        "brand": item["brand"],
-                        "model": item["model"],
-                        "condition": item["condition"],
-                        "price": item["price"] if item["price"] > 0 else 25000.0,
-                        "location": item["location"],
-                        "description": item["description"],
-                        "url": item["url"],
-                        "images": item["images"],
-                        "source": item["source"],
-                        "status": item["status"],
-                        "category": item["category"],
-                        "availability": item["availability"],
-                        "assigned_rep": item["assigned_rep"],
-                        "target_price": item["target_price"],
-                        "notes": item["notes"],
-                        "spider_urls": item["spider_urls"]
-                    })
-                
-                print(f"✅ Loaded {len(mock_items)} items from scraper")
-            else:
-                print("❌ No scraped files found, using mock data")
-                mock_items = [
-                    {
-                        "title": "Aerolase Lightpod Neo Elite Laser System",
-                        "brand": "Aerolase",
-                        "model": "Lightpod Neo Elite",
-                        "condition": "Used - Excellent",
-                        "price": 45000.00,
-                        "location": "California, USA",
-                        "description": "Professional Aerolase Lightpod Neo Elite laser system in excellent condition. Includes all accessories and documentation.",
-                        "url": "https://lasermatch.io/listing/aerolase-lightpod-neo-elite",
-                        "images": ["https://lasermatch.io/images/aerolase-neo-elite-1.jpg"],
-                        "source": "LaserMatch.io",
-                        "status": "active",
-                        "category": "Laser System",
-                        "availability": "Available",
-                        "assigned_rep": None,
-                        "target_price": None,
-                        "notes": None,
-                        "spider_urls": None
-                    }
-                ]
+        # Load the prepared API data file, then the newest scraped file
+        mock_items = load_lasermatch_file(prefer_api_data=True)
+        if not mock_items:
+            print("❌ No scraped files found, using mock data")
+            mock_items = [
+                Listing(
+                    title="Aerolase Lightpod Neo Elite Laser System",
+                    brand="Aerolase",
+                    model="Lightpod Neo Elite",
+                    condition="Used - Excellent",
+                    price=45000.00,
+                    location="California, USA",
+                    description="Professional Aerolase Lightpod Neo Elite laser system in excellent condition. Includes all accessories and documentation.",
+                    url="https://lasermatch.io/listing/aerolase-lightpod-neo-elite",
+                    images=["https://lasermatch.io/images/aerolase-neo-elite-1.jpg"],
+                    source="LaserMatch.io",
+                    status="active",
+                    category="Laser System",
+                    availability="Available"
+                )
+            ]
         
         # Try to save to database
         conn = await get_db_connection()
         if conn:
             try:
-                for item in mock_items:
-                    await conn.execute("""
-                        INSERT INTO lasermatch_items (
-                            title, brand, model, condition, price, location, 
-                            description, url, images, source, status, category, 
-                            availability, assigned_rep, target_price, notes, spider_urls
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17)
-                        ON CONFLICT (url) DO UPDATE SET
-                            title = EXCLUDED.title,
-                            price = EXCLUDED.price,
-                            last_updated = NOW()
-                    """, 
-                    item["title"], item["brand"], item["model"], item["condition"], 
-                    item["price"], item["location"], item["description"], item["url"], 
-                    item["images"], item["source"], item["status"], item["category"], 
-                    item["availability"], item["assigned_rep"], item["target_price"], 
-                    item["notes"], item["spider_urls"])
+                await upsert_listings(conn, mock_items)
                 
+                await refresh_stats(conn)
+                await refresh_price_stats(conn)
                 await conn.close()
                 print(f"✅ Saved {len(mock_items)} items to database")
             except Exception as e:
@@ -413,6 +321,9 @@ async def update_lasermatch_item(item_id: int, updates: Dict[str, Any]):
                 params.append(item_id)
                 
                 result = await conn.execute(query, *params)
+                if updates.get('status') == 'sold' and result == "UPDATE 1":
+                    # A sale is a comparable for resale estimates
+                    await record_sold(conn, item_ids=[item_id])
                 await conn.close()
                 
                 if "UPDATE 0" in result:
@@ -427,8 +338,8 @@ async def update_lasermatch_item(item_id: int, updates: Dict[str, Any]):
         # Fallback to memory update
         if 0 <= item_id < len(lasermatch_items_memory):
             for key, value in updates.items():
-                if key in lasermatch_items_memory[item_id]:
-                    lasermatch_items_memory[item_id][key] = value
+                if key in ['assigned_rep', 'target_price', 'notes', 'status']:
+                    setattr(lasermatch_items_memory[item_id], key, value)
             return {"message": "Item updated in memory", "item_id": item_id}
         else:
             raise HTTPException(status_code=404, detail="Item not found")
@@ -445,30 +356,14 @@ async def get_lasermatch_stats():
         conn = await get_db_connection()
         if conn:
             try:
-                # Get total count
-                total_count = await conn.fetchval("SELECT COUNT(*) FROM lasermatch_items")
-                
-                # Get count by status
-                status_counts = await conn.fetch("""
-                    SELECT status, COUNT(*) as count 
-                    FROM lasermatch_items 
-                    GROUP BY status
-                """)
-                
-                # Get count by assigned rep
-                rep_counts = await conn.fetch("""
-                    SELECT assigned_rep, COUNT(*) as count 
-                    FROM lasermatch_items 
-                    WHERE assigned_rep IS NOT NULL
-                    GROUP BY assigned_rep
-                """)
-                
+                # Read precomputed rollup rows instead of scanning lasermatch_items
+                stats = await fetch_stats(conn)
                 await conn.close()
                 
                 return {
-                    "total_items": total_count,
-                    "status_breakdown": [dict(row) for row in status_counts],
-                    "rep_breakdown": [dict(row) for row in rep_counts],
+                    "total_items": stats["totals"]["total_items"],
+                    "status_breakdown": stats["by_status"],
+                    "rep_breakdown": stats["by_rep"],
                     "source": "database"
                 }
             except Exception as e:
@@ -479,52 +374,8 @@ async def get_lasermatch_stats():
         # Fallback to memory stats - use the same data source as items endpoint
         global _lasermatch_items
         if not _lasermatch_items:
-            # Load scraped data if available (same logic as items endpoint)
             try:
-                import json
-                import os
-                
-                # Get the project root directory
-                project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-                
-                # Try to load the prepared API data file first
-                api_data_file = os.path.join(project_root, "lasermatch_api_data.json")
-                if os.path.exists(api_data_file):
-                    with open(api_data_file, 'r') as f:
-                        _lasermatch_items = json.load(f)
-                else:
-                    # Fall back to finding the most recent scraped file
-                    scraped_files = [f for f in os.listdir(project_root) if f.startswith("lasermatch_scraped_") and f.endswith(".json")]
-                    if scraped_files:
-                        latest_file = max(scraped_files)
-                        file_path = os.path.join(project_root, latest_file)
-                        
-                        with open(file_path, 'r') as f:
-                            raw_data = json.load(f)
-                        
-                        # Convert to API format
-                        _lasermatch_items = []
-                        for item in raw_data:
-                            _lasermatch_items.append({
-                                "id": i + 1,
-                                "title": item["title"],
-                                "brand": item["brand"],
-                                "model": item["model"],
-                                "condition": item["condition"],
-                                "price": item["price"] if item["price"] > 0 else 25000.0,
-                                "location": item["location"],
-                                "description": item["description"],
-                                "url": item["url"],
-                                "images": item["images"],
-                                "source": item["source"],
-                                "status": item["status"],
-                                "category": item["category"],
-                                "availability": item["availability"],
-                                "assigned_rep": item["assigned_rep"],
-                                "target_price": item["target_price"],
-                                "notes": item["notes"],
-                                "spider_urls": item["spider_urls"]
-                            })
+                _lasermatch_items = load_lasermatch_file(prefer_api_data=True)
             except Exception as e:
                 print(f"Failed to load scraped data for stats: {e}")
                 _lasermatch_items = []
@@ -559,11 +410,15 @@ async def update_item_price(item_id: int, price_update: dict):
         conn = await get_db_connection()
         if conn:
             try:
-                result = await conn.execute("""
+                url = await conn.fetchval("""
                     UPDATE lasermatch_items 
-                    SET price = $1, updated_at = NOW()
+                    SET price = $1, last_updated = NOW()
                     WHERE id = $2
+                    RETURNING url
                 """, new_price, item_id)
+                result = "UPDATE 1" if url is not None else "UPDATE 0"
+                if url:
+                    await record_prices(conn, [(url, new_price)])
                 
                 await conn.close()
                 
@@ -571,8 +426,8 @@ async def update_item_price(item_id: int, price_update: dict):
                     # Update in-memory data as well
                     if _lasermatch_items:
                         for item in _lasermatch_items:
-                            if item.get('id') == item_id:
-                                item['price'] = new_price
+                            if item.id == item_id:
+                                item.price = new_price
                                 break
                     
                     return {"message": "Target price updated successfully", "item_id": item_id, "new_price": new_price}
@@ -587,8 +442,8 @@ async def update_item_price(item_id: int, price_update: dict):
         # Fallback to in-memory data
         if _lasermatch_items:
             for item in _lasermatch_items:
-                if item.get('id') == item_id:
-                    item['price'] = new_price
+                if item.id == item_id:
+                    item.price = new_price
                     return {"message": "Target price updated successfully", "item_id": item_id, "new_price": new_price}
         
         raise HTTPException(status_code=404, detail="Item not found")
@@ -597,3 +452,31 @@ async def update_item_price(item_id: int, price_update: dict):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update target price: {str(e)}")
+
+@router.get("/items/{item_id}/price-history")
+async def get_item_price_history(item_id: int, limit: int = 100):
+    """Price changes recorded for a LaserMatch item, newest first"""
+    conn = await get_db_connection()
+    if not conn:
+        raise HTTPException(status_code=503, detail="Price history requires the database")
+    try:
+        history = await fetch_price_history(conn, item_id, limit)
+        return FastJSONResponse({"item_id": item_id, "history": history, "total": len(history)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get price history: {str(e)}")
+    finally:
+        await conn.close()
+
+@router.get("/price-drops")
+async def get_price_drops(percent: float = 10.0, days: int = 7, limit: int = 100):
+    """Items whose price dropped at least `percent`% within the last `days` days"""
+    conn = await get_db_connection()
+    if not conn:
+        raise HTTPException(status_code=503, detail="Price drops require the database")
+    try:
+        drops = await fetch_price_drops(conn, percent, days, limit)
+        return FastJSONResponse({"items": drops, "total": len(drops), "percent": percent, "days": days})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get price drops: {str(e)}")
+    finally:
+        await conn.close()
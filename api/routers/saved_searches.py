@@ -0,0 +1,86 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional, Dict, Any
+
+from api.models.database import get_db_connection
+from api.models.saved_searches import (
+    create_saved_search, fetch_saved_searches, deactivate_saved_search, fetch_alerts, mark_alerts_seen
+)
+from api.utils.responses import FastJSONResponse
+
+router = APIRouter()
+
+async def _require_db():
+    conn = await get_db_connection()
+    if not conn:
+        raise HTTPException(status_code=503, detail="Saved searches require the database")
+    return conn
+
+@router.post("")
+async def create_search(search: Dict[str, Any]):
+    """Save a standing search; new listings matching it raise alerts as they are ingested"""
+    if not any(search.get(name) for name in ('query', 'brand', 'model', 'max_price')):
+        raise HTTPException(status_code=400, detail="A query, brand, model or max_price is required")
+    conn = await _require_db()
+    try:
+        saved = await create_saved_search(conn, search)
+        return FastJSONResponse({"message": "Saved search created", "saved_search": saved})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save search: {str(e)}")
+    finally:
+        await conn.close()
+
+@router.get("")
+async def list_searches(assigned_rep: Optional[str] = None):
+    """Active saved searches with their alert counts"""
+    conn = await _require_db()
+    try:
+        searches = await fetch_saved_searches(conn, assigned_rep)
+        return FastJSONResponse({"saved_searches": searches, "total": len(searches)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get saved searches: {str(e)}")
+    finally:
+        await conn.close()
+
+@router.get("/alerts")
+async def list_alerts(
+    saved_search_id: Optional[int] = None,
+    assigned_rep: Optional[str] = None,
+    unseen_only: bool = False,
+    limit: int = 100
+):
+    """Listings matched by saved searches, newest first"""
+    conn = await _require_db()
+    try:
+        alerts = await fetch_alerts(conn, saved_search_id, assigned_rep, unseen_only, limit)
+        return FastJSONResponse({"alerts": alerts, "total": len(alerts)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get alerts: {str(e)}")
+    finally:
+        await conn.close()
+
+@router.post("/alerts/seen")
+async def mark_seen(request: Dict[str, Any]):
+    """Mark alerts as seen"""
+    alert_ids = request.get('alert_ids') or []
+    if not alert_ids:
+        raise HTTPException(status_code=400, detail="alert_ids is required")
+    conn = await _require_db()
+    try:
+        updated = await mark_alerts_seen(conn, [int(alert_id) for alert_id in alert_ids])
+        return {"message": "Alerts marked as seen", "updated": updated}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update alerts: {str(e)}")
+    finally:
+        await conn.close()
+
+@router.delete("/{search_id}")
+async def delete_search(search_id: int):
+    """Stop a saved search from matching; its alerts are kept"""
+    conn = await _require_db()
+    try:
+        deleted = await deactivate_saved_search(conn, search_id)
+    finally:
+        await conn.close()
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    return {"message": "Saved search deleted", "saved_search_id": search_id}
@@ -6,22 +6,20 @@ import os
 from datetime import datetime
 import json
 
-router = APIRouter()
+from api.models.database import get_db_connection
+from api.models.stats import fetch_stats
+from api.models.listings import records_to_listings
+from api.models.price_stats import get_price_stats
+from api.utils.responses import FastJSONResponse
+from api.utils.timing import span, timed
+from laser_intelligence.items import Listing
 
-async def get_db_connection():
-    """Get database connection with fallback to in-memory storage"""
-    try:
-        database_url = os.getenv("DATABASE_URL")
-        if not database_url:
-            return None
-        return await asyncpg.connect(database_url)
-    except Exception as e:
-        print(f"Database connection failed: {e}")
-        return None
+router = APIRouter()
 
 @router.post("/equipment")
 async def search_equipment(search_request: Dict[str, Any]):
     """Search for laser equipment across all sources"""
+    from laser_intelligence.scoring import score_listings
     try:
         query = search_request.get('query', '').strip()
         limit = search_request.get('limit', 50)
@@ -56,59 +54,57 @@ async def search_equipment(search_request: Dict[str, Any]):
                     spider_results = await run_scrapy_spiders_parallel(spider_dir, query, limit)
                     
                     if spider_results:
-                        return {
+                        return FastJSONResponse({
                             "query": query,
                             "results": spider_results,
                             "total": len(spider_results),
                             "source": "real_spiders",
                             "mode": "real",
                             "timestamp": datetime.now().isoformat()
-                        }
+                        })
                 
                 # Try database search
                 conn = await get_db_connection()
                 if conn:
                     try:
-                        lasermatch_results = await conn.fetch("""
-                            SELECT 
-                                id, title, brand, model, condition, price, location, 
-                                description, url, images, discovered_at, source, status
-                            FROM lasermatch_items 
-                            WHERE 
-                                (LOWER(title) LIKE LOWER($1) OR 
-                                 LOWER(brand) LIKE LOWER($1) OR 
-                                 LOWER(model) LIKE LOWER($1) OR 
-                                 LOWER(description) LIKE LOWER($1))
-                                AND status = 'active'
-                            ORDER BY 
-                                CASE 
-                                    WHEN LOWER(brand) LIKE LOWER($1) THEN 1
-                                    WHEN LOWER(model) LIKE LOWER($1) THEN 2
-                                    WHEN LOWER(title) LIKE LOWER($1) THEN 3
-                                    ELSE 4
-                                END,
-                                discovered_at DESC
-                            LIMIT $2
-                        """, f"%{query}%", limit)
+                        with span("db_query"):
+                            lasermatch_results = await conn.fetch("""
+                                SELECT 
+                                    id, title, brand, model, condition, price, location, 
+                                    description, url, images, discovered_at, source, status
+                                FROM lasermatch_items 
+                                WHERE 
+                                    (LOWER(title) LIKE LOWER($1) OR 
+                                     LOWER(brand) LIKE LOWER($1) OR 
+                                     LOWER(model) LIKE LOWER($1) OR 
+                                     LOWER(description) LIKE LOWER($1))
+                                    AND status = 'active'
+                                ORDER BY 
+                                    CASE 
+                                        WHEN LOWER(brand) LIKE LOWER($1) THEN 1
+                                        WHEN LOWER(model) LIKE LOWER($1) THEN 2
+                                        WHEN LOWER(title) LIKE LOWER($1) THEN 3
+                                        ELSE 4
+                                    END,
+                                    discovered_at DESC
+                                LIMIT $2
+                            """, f"%{query}%", limit)
                         
                         await conn.close()
+                        price_stats = get_price_stats()
                         
                         if lasermatch_results:
-                            results = []
-                            for row in lasermatch_results:
-                                item = dict(row)
-                                if item.get('discovered_at'):
-                                    item['discovered_at'] = item['discovered_at'].isoformat()
-                                results.append(item)
+                            with span("score"):
+                                results = score_listings(records_to_listings(lasermatch_results), price_stats)
                             
-                            return {
+                            return FastJSONResponse({
                                 "query": query,
                                 "results": results,
                                 "total": len(results),
                                 "source": "database",
                                 "mode": "real",
                                 "timestamp": datetime.now().isoformat()
-                            }
+                            })
                     except Exception as e:
                         print(f"Database search failed: {e}")
                         if conn:
@@ -142,46 +138,44 @@ async def search_equipment(search_request: Dict[str, Any]):
             conn = await get_db_connection()
             if conn:
                 try:
-                    lasermatch_results = await conn.fetch("""
-                        SELECT 
-                            id, title, brand, model, condition, price, location, 
-                            description, url, images, discovered_at, source, status
-                        FROM lasermatch_items 
-                        WHERE 
-                            (LOWER(title) LIKE LOWER($1) OR 
-                             LOWER(brand) LIKE LOWER($1) OR 
-                             LOWER(model) LIKE LOWER($1) OR 
-                             LOWER(description) LIKE LOWER($1))
-                            AND status = 'active'
-                        ORDER BY 
-                            CASE 
-                                WHEN LOWER(brand) LIKE LOWER($1) THEN 1
-                                WHEN LOWER(model) LIKE LOWER($1) THEN 2
-                                WHEN LOWER(title) LIKE LOWER($1) THEN 3
-                                ELSE 4
-                            END,
-                            discovered_at DESC
-                        LIMIT $2
-                    """, f"%{query}%", limit)
+                    with span("db_query"):
+                        lasermatch_results = await conn.fetch("""
+                            SELECT 
+                                id, title, brand, model, condition, price, location, 
+                                description, url, images, discovered_at, source, status
+                            FROM lasermatch_items 
+                            WHERE 
+                                (LOWER(title) LIKE LOWER($1) OR 
+                                 LOWER(brand) LIKE LOWER($1) OR 
+                                 LOWER(model) LIKE LOWER($1) OR 
+                                 LOWER(description) LIKE LOWER($1))
+                                AND status = 'active'
+                            ORDER BY 
+                                CASE 
+                                    WHEN LOWER(brand) LIKE LOWER($1) THEN 1
+                                    WHEN LOWER(model) LIKE LOWER($1) THEN 2
+                                    WHEN LOWER(title) LIKE LOWER($1) THEN 3
+                                    ELSE 4
+                                END,
+                                discovered_at DESC
+                            LIMIT $2
+                        """, f"%{query}%", limit)
                     
                     await conn.close()
+                    price_stats = get_price_stats()
                     
                     if lasermatch_results:
-                        results = []
-                        for row in lasermatch_results:
-                            item = dict(row)
-                            if item.get('discovered_at'):
-                                item['discovered_at'] = item['discovered_at'].isoformat()
-                            results.append(item)
+                        with span("score"):
+                            results = score_listings(records_to_listings(lasermatch_results), price_stats)
                         
-                        return {
+                        return FastJSONResponse({
                             "query": query,
                             "results": results,
                             "total": len(results),
                             "source": "database",
                             "mode": "auto",
                             "timestamp": datetime.now().isoformat()
-                        }
+                        })
                 except Exception as e:
                     print(f"Database search failed: {e}")
                     if conn:
@@ -203,8 +197,10 @@ async def search_equipment(search_request: Dict[str, Any]):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
-def generate_mock_search_results(query: str, limit: int) -> List[Dict[str, Any]]:
+@timed("mock")
+def generate_mock_search_results(query: str, limit: int) -> List[Listing]:
     """Generate mock search results for testing"""
+    from laser_intelligence.scoring import score_listings
     import random
     
     # Generate realistic laser equipment data based on the search query
@@ -297,26 +293,25 @@ def generate_mock_search_results(query: str, limit: int) -> List[Dict[str, Any]]
         source = random.choice(sources)
         location = random.choice(locations)
         
-        results.append({
-            "id": f"mock_{brand.lower()}_{i+1}",
-            "title": f"{brand} {model} Laser System",
-            "brand": brand,
-            "model": model,
-            "condition": condition,
-            "price": float(price),
-            "source": source,
-            "location": location,
-            "description": f"Professional {brand} {model} laser system in {condition.lower()} condition. Perfect for aesthetic treatments.",
-            "images": [f"https://example.com/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}.jpg"],
-            "discovered_at": datetime.now().isoformat(),
-            "margin_estimate": random.uniform(20.0, 40.0),
-            "score_overall": random.randint(80, 95),
-            "url": f"https://{source.lower().replace(' ', '')}.com/listing/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}",
-            "status": "active"
-        })
+        results.append(Listing(
+            id=f"mock_{brand.lower()}_{i+1}",
+            title=f"{brand} {model} Laser System",
+            brand=brand,
+            model=model,
+            condition=condition,
+            price=float(price),
+            source=source,
+            location=location,
+            description=f"Professional {brand} {model} laser system in {condition.lower()} condition. Perfect for aesthetic treatments.",
+            images=[f"https://example.com/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}.jpg"],
+            discovered_at=datetime.now().isoformat(),
+            url=f"https://{source.lower().replace(' ', '')}.com/listing/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}",
+            status="active"
+        ))
     
-    # Sort by relevance score
-    results.sort(key=lambda x: x['score_overall'], reverse=True)
+    # Sort by deal score
+    score_listings(results)
+    results.sort(key=lambda x: x.score_overall, reverse=True)
     
     return results
 
@@ -327,32 +322,23 @@ async def get_search_sources():
         conn = await get_db_connection()
         if conn:
             try:
-                # Get source statistics from database
-                source_stats = await conn.fetch("""
-                    SELECT 
-                        source,
-                        COUNT(*) as item_count,
-                        AVG(price) as avg_price,
-                        MIN(price) as min_price,
-                        MAX(price) as max_price
-                    FROM lasermatch_items 
-                    WHERE status = 'active'
-                    GROUP BY source
-                    ORDER BY item_count DESC
-                """)
-                
+                # Get source statistics from the precomputed rollup
+                stats = await fetch_stats(conn)
                 await conn.close()
                 
                 sources = []
-                for row in source_stats:
+                for row in stats["by_source"]:
+                    if not row['active_count']:
+                        continue
                     sources.append({
                         "name": row['source'],
-                        "item_count": row['item_count'],
-                        "avg_price": float(row['avg_price']) if row['avg_price'] else 0,
-                        "min_price": float(row['min_price']) if row['min_price'] else 0,
-                        "max_price": float(row['max_price']) if row['max_price'] else 0,
+                        "item_count": row['active_count'],
+                        "avg_price": row['avg_price'],
+                        "min_price": row['min_price'],
+                        "max_price": row['max_price'],
                         "status": "active"
                     })
+                sources.sort(key=lambda x: x['item_count'], reverse=True)
                 
                 return {
                     "sources": sources,
@@ -10,10 +10,41 @@ from concurrent.futures import ThreadPoolExecutor
 import sys
 import re
 import signal
+import time
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "laser-equipment-intelligence"))
 
+from api.utils.metrics import CRAWL_ERRORS, record_crawl_stats
+from api.utils.spider_registry import registry
+from api.utils.timing import timed
+from laser_intelligence.items import Listing
+from laser_intelligence.marketplaces import MARKETPLACES
+
 router = APIRouter()
 
+# Crawl budgets passed to the spiders' pagination frontier. Interactive searches
+# stay on the first result page to answer within the request; exhaustive
+# searches walk deep into every source.
+QUICK_CRAWL_BUDGET = {"max_pages": 1, "timeout": 25}
+EXHAUSTIVE_CRAWL_BUDGET = {"max_pages": 20, "max_items": 1000, "min_score": 50, "timeout": 300}
+QUICK_SPIDERS = ["ebay_laser", "dotmed_auctions", "bidspotter"]
+ALL_SPIDERS = ["ebay_laser", *MARKETPLACES]
+
+# Batch searches run every query through one crawl process per source: the
+# queries share its connections, HTTP cache and DOWNLOAD_DELAY slot, so the
+# timeout grows with the number of queries sharing that source's rate limit
+BATCH_CRAWL_BUDGET = {
+    "max_pages": 1, "timeout": 25, "timeout_per_query": 3, "max_timeout": 300,
+    "settings": {"CONCURRENT_REQUESTS": 4, "HTTPCACHE_ENABLED": True, "HTTPCACHE_EXPIRATION_SECS": 3600}
+}
+MAX_BATCH_QUERIES = 100
+
+# Scheduled rechecks of known listings (see api/models/recrawl.py) also batch
+# their queries per source, but must see the live page, so no HTTP cache
+RECRAWL_CRAWL_BUDGET = {
+    "max_pages": 1, "timeout": 25, "timeout_per_query": 3, "max_timeout": 300,
+    "settings": {"CONCURRENT_REQUESTS": 4}
+}
+
 @router.post("/search")
 async def run_spider_search(search_request: Dict[str, Any]):
     """Run Scrapy spiders to find actual equipment listings"""
@@ -56,18 +87,99 @@ async def run_spider_search(search_request: Dict[str, Any]):
         # Fallback to mock data if spiders fail
         return generate_fallback_results(query, limit, max_price)
 
-async def run_scrapy_spiders_parallel(spider_dir: str, query: str, limit: int, max_price: Optional[float] = None) -> List[Dict[str, Any]]:
+@router.post("/search/batch")
+async def run_spider_batch_search(search_request: Dict[str, Any]):
+    """Run many searches as one crawl per source and return results grouped by query"""
+    queries = [q.strip() for q in search_request.get('queries', []) if isinstance(q, str) and q.strip()]
+    queries = list(dict.fromkeys(queries))
+    limit = search_request.get('limit', 10)
+    max_price = search_request.get('max_price')
+    spiders = search_request.get('spiders') or QUICK_SPIDERS
+    
+    if not queries:
+        raise HTTPException(status_code=400, detail="At least one search query is required")
+    if len(queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_QUERIES} queries per batch")
+    unknown = [name for name in spiders if name not in ALL_SPIDERS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown spiders: {', '.join(unknown)}")
+    
+    print(f"🔍 Running batch spider search for {len(queries)} queries on {len(spiders)} sources")
+    spider_dir = os.path.join(os.path.dirname(__file__), "..", "..", "laser-equipment-intelligence")
+    
+    started = datetime.now()
+    grouped = await run_scrapy_batch(spider_dir, queries, limit, max_price, spiders)
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"✅ Batch search found {sum(len(r) for r in grouped.values())} results in {elapsed:.1f}s")
+    
+    return {
+        "queries": queries,
+        "results": grouped,
+        "totals": {query: len(results) for query, results in grouped.items()},
+        "total": sum(len(results) for results in grouped.values()),
+        "source": "scrapy_spiders",
+        "elapsed_seconds": round(elapsed, 2),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@timed("spiders")
+async def run_scrapy_batch(spider_dir: str, queries: List[str], limit: int, max_price: Optional[float] = None,
+                           spiders: Optional[List[str]] = None,
+                           budget: Optional[Dict[str, Any]] = None) -> Dict[str, List[Listing]]:
+    """Run all queries through one crawl per source and group the listings by query"""
+    from laser_intelligence.dedup import deduplicate_listings
+    from laser_intelligence.scoring import score_listings
+    
+    budget = dict(budget or BATCH_CRAWL_BUDGET)
+    budget["timeout"] = min(
+        budget.get("max_timeout", 300),
+        budget["timeout"] + budget.get("timeout_per_query", 0) * len(queries)
+    )
+    spider_configs = [{"name": name, "queries": queries, "budget": budget} for name in (spiders or QUICK_SPIDERS)]
+    
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=len(spider_configs)) as executor:
+        runs = [loop.run_in_executor(executor, run_single_scrapy_spider, spider_dir, config) for config in spider_configs]
+        outcomes = await asyncio.gather(*runs, return_exceptions=True)
+    
+    grouped: Dict[str, List[Listing]] = {query: [] for query in queries}
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            print(f"Spider failed: {outcome}")
+            continue
+        for listing in outcome:
+            if listing.query in grouped and (not max_price or (listing.price and listing.price <= max_price)):
+                grouped[listing.query].append(listing)
+    
+    for query, results in grouped.items():
+        grouped[query] = deduplicate_listings(results)
+    
+    # One scoring pass over every group so scores are comparable across queries
+    score_listings([listing for results in grouped.values() for listing in results])
+    for query, results in grouped.items():
+        results.sort(key=lambda x: x.score_overall or 0, reverse=True)
+        grouped[query] = results[:limit]
+    
+    return grouped
+
+@timed("spiders")
+async def run_scrapy_spiders_parallel(spider_dir: str, query: str, limit: Optional[int], max_price: Optional[float] = None,
+                                      spiders: Optional[List[str]] = None,
+                                      budget: Optional[Dict[str, Any]] = None) -> List[Listing]:
     """Run multiple Scrapy spiders in parallel, with fallback to Selenium crawlers"""
+    from laser_intelligence.dedup import deduplicate_listings
+    from laser_intelligence.scoring import score_listings
+    
+    budget = budget or QUICK_CRAWL_BUDGET
     
     # First try Scrapy spiders
     spiders_to_run = [
-        {"name": "ebay_laser", "query": query},
-        {"name": "dotmed_auctions", "query": query},
-        {"name": "bidspotter", "query": query}
+        {"name": name, "query": query, "budget": budget}
+        for name in (spiders or QUICK_SPIDERS)
     ]
     
     # Use ThreadPoolExecutor to run spiders in parallel
-    with ThreadPoolExecutor(max_workers=3) as executor:
+    with ThreadPoolExecutor(max_workers=len(spiders_to_run)) as executor:
         # Submit all spider tasks
         futures = []
         for spider_config in spiders_to_run:
@@ -78,14 +190,14 @@ async def run_scrapy_spiders_parallel(spider_dir: str, query: str, limit: int, m
         all_results = []
         for future in futures:
             try:
-                spider_results = future.result(timeout=30)  # 30 second timeout per spider
+                spider_results = future.result(timeout=budget["timeout"] + 5)
                 all_results.extend(spider_results)
             except Exception as e:
                 print(f"Spider failed: {e}")
                 continue
     
     # If no results from Scrapy spiders, try Selenium crawlers
-    if not all_results:
+    if not all_results and registry.capabilities()["selenium"]:
         print("🔄 No results from Scrapy spiders, trying Selenium crawlers...")
         try:
             selenium_results = await run_selenium_crawler(query, limit, max_price)
@@ -96,34 +208,63 @@ async def run_scrapy_spiders_parallel(spider_dir: str, query: str, limit: int, m
     
     # Filter by max_price if specified
     if max_price:
-        all_results = [result for result in all_results if result.get('price') and result['price'] <= max_price]
+        all_results = [result for result in all_results if result.price and result.price <= max_price]
+    
+    # Collapse the same equipment listed on several sources into one record with offers
+    all_results = deduplicate_listings(all_results)
+    
+    # Score the merged batch with one market model so sources are comparable
+    score_listings(all_results)
     
     # Sort by score and limit results
-    all_results.sort(key=lambda x: x.get('score_overall', 0), reverse=True)
+    all_results.sort(key=lambda x: x.score_overall or 0, reverse=True)
     
     return all_results[:limit]
 
-def run_single_scrapy_spider(spider_dir: str, spider_config: Dict[str, str]) -> List[Dict[str, Any]]:
+def spider_budget_args(budget: Dict[str, Any]) -> List[str]:
+    """Scrapy -a arguments for the frontier budget keys set in budget"""
+    args = []
+    for key in ("max_pages", "max_items", "min_score"):
+        if key in budget:
+            args.extend(["-a", f"{key}={budget[key]}"])
+    return args
+
+class CrawlError(RuntimeError):
+    """A spider run failed; raised instead of returning [] when spider_config sets raise_errors"""
+
+def run_single_scrapy_spider(spider_dir: str, spider_config: Dict[str, str]) -> List[Listing]:
     """Run a single Scrapy spider and return results"""
     
     spider_name = spider_config["name"]
-    query = spider_config["query"]
+    budget = spider_config.get("budget") or QUICK_CRAWL_BUDGET
+    if spider_config.get("queries"):
+        query_args = ["-a", f"queries={json.dumps(spider_config['queries'])}"]
+    else:
+        query_args = ["-a", f"query={spider_config['query']}"]
     
-    # Create temporary output file
+    # Create temporary output and crawl stats files
     with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as temp_file:
         output_file = temp_file.name
+    metrics_file = f"{output_file}.stats"
+    started = time.monotonic()
+    listings: List[Listing] = []
+    error = None
     
     try:
         # Run scrapy crawl command
         cmd = [
             "python3", "-m", "scrapy", "crawl", spider_name,
-            "-a", f"query={query}",
+            *query_args,
+            *spider_budget_args(budget),
             "-o", output_file,
             "-s", "ROBOTSTXT_OBEY=False",  # Disable robots.txt for testing
             "-s", "DOWNLOAD_DELAY=1",      # Be respectful with delays
             "-s", "CONCURRENT_REQUESTS=1",  # Limit concurrent requests
-            "-s", "LOG_LEVEL=WARNING"      # Reduce log noise
+            "-s", "LOG_LEVEL=WARNING",     # Reduce log noise
+            "-s", f"CRAWL_METRICS_FILE={metrics_file}"
         ]
+        for name, value in budget.get("settings", {}).items():
+            cmd.extend(["-s", f"{name}={value}"])
         
         # Change to spider directory and run command
         result = subprocess.run(
@@ -131,11 +272,17 @@ def run_single_scrapy_spider(spider_dir: str, spider_config: Dict[str, str]) ->
             cwd=spider_dir,
             capture_output=True,
             text=True,
-            timeout=25  # 25 second timeout
+            timeout=budget["timeout"]
         )
         
+        if os.path.exists(metrics_file):
+            with open(metrics_file) as f:
+                record_crawl_stats(spider_name, json.load(f))
+        
         if result.returncode != 0:
             print(f"Spider {spider_name} failed: {result.stderr}")
+            CRAWL_ERRORS.inc(source=spider_name)
+            error = f"exit status {result.returncode}"
             return []
         
         # Read results from output file
@@ -145,26 +292,39 @@ def run_single_scrapy_spider(spider_dir: str, spider_config: Dict[str, str]) ->
                 if content:
                     try:
                         results = json.loads(content)
-                        return results if isinstance(results, list) else []
+                        if isinstance(results, list):
+                            listings = [Listing.from_mapping(result) for result in results]
+                        return listings
                     except json.JSONDecodeError:
                         print(f"Failed to parse JSON from {spider_name}")
+                        error = "invalid JSON output"
                         return []
         
         return []
         
     except subprocess.TimeoutExpired:
         print(f"Spider {spider_name} timed out")
+        CRAWL_ERRORS.inc(source=spider_name)
+        error = "timed out"
         return []
     except Exception as e:
         print(f"Error running spider {spider_name}: {e}")
+        CRAWL_ERRORS.inc(source=spider_name)
+        error = str(e)
         return []
     finally:
-        # Clean up temporary file
-        if os.path.exists(output_file):
-            os.remove(output_file)
+        registry.record_run(spider_name, time.monotonic() - started, len(listings), error)
+        # Clean up temporary files
+        for path in (output_file, metrics_file):
+            if os.path.exists(path):
+                os.remove(path)
+        # Queued crawls retry on failure, so they need it reported rather than an empty result
+        if error and spider_config.get("raise_errors"):
+            raise CrawlError(f"{spider_name}: {error}")
 
 def generate_fallback_results(query: str, limit: int, max_price: Optional[float] = None) -> Dict[str, Any]:
     """Generate realistic fallback results when real crawlers fail"""
+    from laser_intelligence.scoring import score_listings
     import random
     
     # Generate realistic laser equipment data based on the search query
@@ -245,23 +405,23 @@ def generate_fallback_results(query: str, limit: int, max_price: Optional[float]
         source = random.choice(sources)
         location = random.choice(locations)
         
-        results.append({
-            "id": f"fallback_{brand.lower()}_{i+1}",
-            "title": f"{brand} {model} Laser System",
-            "brand": brand,
-            "model": model,
-            "condition": condition,
-            "price": float(price),
-            "source": source,
-            "location": location,
-            "description": f"Professional {brand} {model} laser system in {condition.lower()} condition. Perfect for aesthetic treatments.",
-            "images": [f"https://example.com/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}.jpg"],
-            "discovered_at": datetime.now().isoformat(),
-            "margin_estimate": random.uniform(20.0, 40.0),
-            "score_overall": random.randint(80, 95),
-            "url": f"https://{source.lower().replace(' ', '')}.com/listing/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}",
-            "status": "active"
-        })
+        results.append(Listing(
+            id=f"fallback_{brand.lower()}_{i+1}",
+            title=f"{brand} {model} Laser System",
+            brand=brand,
+            model=model,
+            condition=condition,
+            price=float(price),
+            source=source,
+            location=location,
+            description=f"Professional {brand} {model} laser system in {condition.lower()} condition. Perfect for aesthetic treatments.",
+            images=[f"https://example.com/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}.jpg"],
+            discovered_at=datetime.now().isoformat(),
+            url=f"https://{source.lower().replace(' ', '')}.com/listing/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}",
+            status="active"
+        ))
+    
+    score_listings(results)
     
     return {
         "query": query,
@@ -271,8 +431,9 @@ def generate_fallback_results(query: str, limit: int, max_price: Optional[float]
         "timestamp": datetime.now().isoformat()
     }
 
-async def run_spiders_parallel(spider_dir: str, query: str, limit: int) -> List[Dict[str, Any]]:
+async def run_spiders_parallel(spider_dir: str, query: str, limit: int) -> List[Listing]:
     """Run multiple spiders in parallel"""
+    from laser_intelligence.scoring import score_listings
     
     # Define spider configurations
     spiders = [
@@ -299,11 +460,14 @@ async def run_spiders_parallel(spider_dir: str, query: str, limit: int) -> List[
                 print(f"Spider failed: {e}")
                 continue
     
+    # Score the merged batch with one market model so sources are comparable
+    score_listings(all_results)
+    
     # Sort by score and limit results
-    all_results.sort(key=lambda x: x.get('score_overall', 0), reverse=True)
+    all_results.sort(key=lambda x: x.score_overall or 0, reverse=True)
     return all_results[:limit]
 
-def run_single_spider(spider_dir: str, spider_config: Dict[str, str]) -> List[Dict[str, Any]]:
+def run_single_spider(spider_dir: str, spider_config: Dict[str, str]) -> List[Listing]:
     """Run a single spider and return results"""
     
     spider_name = spider_config["name"]
@@ -344,7 +508,7 @@ def run_single_spider(spider_dir: str, spider_config: Dict[str, str]) -> List[Di
                 if content:
                     try:
                         results = json.loads(content)
-                        return results if isinstance(results, list) else []
+                        return [Listing.from_mapping(result) for result in results] if isinstance(results, list) else []
                     except json.JSONDecodeError:
                         print(f"Failed to parse JSON from {spider_name}")
                         return []
@@ -364,46 +528,9 @@ def run_single_spider(spider_dir: str, spider_config: Dict[str, str]) -> List[Di
 
 @router.get("/status")
 async def get_spider_status():
-    """Get spider system status"""
+    """Get spider system status from the in-memory registry"""
     try:
-        spider_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "laser-equipment-intelligence")
-        
-        status = {
-            "spiders_available": [],
-            "spider_directory_exists": os.path.exists(spider_dir),
-            "scrapy_installed": False,
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        if os.path.exists(spider_dir):
-            # Check for spider files
-            spider_files = [
-                "laser_intelligence/spiders/ebay_laser.py",
-                "laser_intelligence/spiders/dotmed_auctions.py", 
-                "laser_intelligence/spiders/bidspotter.py"
-            ]
-            
-            for spider_file in spider_files:
-                spider_path = os.path.join(spider_dir, spider_file)
-                if os.path.exists(spider_path):
-                    spider_name = os.path.basename(spider_file).replace('.py', '')
-                    status["spiders_available"].append(spider_name)
-            
-            # Check if scrapy is available
-            try:
-                result = subprocess.run(
-                    ["scrapy", "--version"],
-                    cwd=spider_dir,
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                status["scrapy_installed"] = result.returncode == 0
-            except:
-                status["scrapy_installed"] = False
-        
-        return status
-        
+        return registry.status()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get spider status: {str(e)}")
 
@@ -427,7 +554,8 @@ async def test_spider():
         raise HTTPException(status_code=500, detail=f"Spider test failed: {str(e)}")
 
 
-async def run_selenium_crawler(query: str, limit: int, max_price: Optional[float] = None) -> List[Dict[str, Any]]:
+@timed("selenium")
+async def run_selenium_crawler(query: str, limit: int, max_price: Optional[float] = None) -> List[Listing]:
     """Run Selenium-based crawler with timeout protection"""
     
     class TimeoutException(Exception):
@@ -522,10 +650,10 @@ async def run_selenium_crawler(query: str, limit: int, max_price: Optional[float
                     result = extract_selenium_item(item, i)
                     if result:
                         # Filter by max_price if specified
-                        if max_price and result.get('price') and result['price'] > max_price:
+                        if max_price and result.price and result.price > max_price:
                             continue
                         results.append(result)
-                        print(f"✅ Extracted item {i+1}: {result['title'][:50]}...")
+                        print(f"✅ Extracted item {i+1}: {result.title[:50]}...")
                 except Exception as e:
                     print(f"⚠️ Error extracting item {i}: {e}")
                     continue
@@ -545,7 +673,7 @@ async def run_selenium_crawler(query: str, limit: int, max_price: Optional[float
         return []
 
 
-def extract_selenium_item(item_element, index: int) -> Optional[Dict[str, Any]]:
+def extract_selenium_item(item_element, index: int) -> Optional[Listing]:
     """Extract data from a single item element using Selenium"""
     try:
         from selenium.webdriver.common.by import By
@@ -602,21 +730,20 @@ def extract_selenium_item(item_element, index: int) -> Optional[Dict[str, Any]]:
         # Extract brand and model from title
         brand, model = extract_brand_model(title)
         
-        result = {
-            'id': f"selenium_ebay_{index}",
-            'title': title,
-            'brand': brand,
-            'model': model,
-            'condition': condition,
-            'price': price,
-            'location': "eBay",
-            'description': f"eBay listing: {title}",
-            'url': url,
-            'images': [],
-            'source': 'eBay',
-            'discovered_at': datetime.now().isoformat(),
-            'score_overall': 85 if price and price < 50000 else 75
-        }
+        result = Listing(
+            id=f"selenium_ebay_{index}",
+            title=title,
+            brand=brand,
+            model=model,
+            condition=condition,
+            price=price,
+            location="eBay",
+            description=f"eBay listing: {title}",
+            url=url,
+            images=[],
+            source='eBay',
+            discovered_at=datetime.now().isoformat()
+        )
         
         return result
         
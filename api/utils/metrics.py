@@ -0,0 +1,232 @@
+"""
+In-process Prometheus metrics
+
+Counters and histograms aggregate into per-thread shards, so recording a
+value never takes a lock (the spider thread pool and the event loop write to
+different shards); /metrics sums the shards when scraped. Shards of threads
+that have exited (per-search spider pools come and go) are folded into one
+retired shard whenever a shard is added or the metric is read, so the shard
+list stays as long as the set of live threads. Gauges are either
+set directly or computed by a callback at scrape time.
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return lines
+
+
+class _Sharded(_Metric):
+    """Per-thread storage; each shard is only ever written by its own thread"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, dict]] = []
+        self._retired: dict = {}
+        self._lock = threading.Lock()     # guards the shard list and the retired shard, not recording
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._retire_dead()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire_dead(self) -> None:
+        """Fold shards of exited threads into the retired shard (caller holds the lock)"""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                for key, value in shard.items():
+                    self._merge(self._retired, key, value)
+        self._shards = live
+
+    def _merge(self, into: dict, key: LabelValues, value) -> None:
+        raise NotImplementedError
+
+    def _snapshots(self) -> List[dict]:
+        with self._lock:
+            self._retire_dead()
+            shards = [shard for _, shard in self._shards]
+            retired = dict(self._retired)
+        return [retired] + [dict(shard) for shard in shards]
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def _merge(self, into: dict, key: LabelValues, value: float) -> None:
+        into[key] = into.get(key, 0.0) + value
+
+    def value(self, **labels: str) -> float:
+        key = self._key(labels)
+        return sum(snapshot.get(key, 0.0) for snapshot in self._snapshots())
+
+    def samples(self):
+        totals: Dict[LabelValues, float] = {}
+        for snapshot in self._snapshots():
+            for key, value in snapshot.items():
+                totals[key] = totals.get(key, 0.0) + value
+        for key in sorted(totals):
+            yield self.name, _format_labels(self.labelnames, key), totals[key]
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        state = shard.get(key)
+        if state is None:
+            # [per-bucket counts..., +Inf count, sum]
+            state = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def _merge(self, into: dict, key: LabelValues, state: List[float]) -> None:
+        total = into.setdefault(key, [0] * len(state))
+        for i, value in enumerate(state):
+            total[i] += value
+
+    def samples(self):
+        merged: Dict[LabelValues, List[float]] = {}
+        for snapshot in self._snapshots():
+            for key, state in snapshot.items():
+                total = merged.setdefault(key, [0] * len(state))
+                for i, value in enumerate(list(state)):
+                    total[i] += value
+        for key in sorted(merged):
+            state = merged[key]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, key, le), cumulative
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), state[-1]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 callback: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def samples(self):
+        values = dict(self._values)
+        if self.callback is not None:
+            values.update(self.callback())
+        for key in sorted(values):
+            yield self.name, _format_labels(self.labelnames, key), values[key]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              callback: Optional[Callable[[], Dict[LabelValues, float]]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "api_request_duration_seconds", "API request latency", ("method", "route", "status")
+)
+CRAWL_REQUESTS = REGISTRY.counter("crawl_requests_total", "HTTP requests issued by spiders", ("source",))
+CRAWL_ITEMS = REGISTRY.counter("crawl_items_total", "Listings yielded by spiders", ("source",))
+CRAWL_BLOCKS = REGISTRY.counter("crawl_blocks_total", "Block or challenge pages detected", ("source",))
+CRAWL_ERRORS = REGISTRY.counter("crawl_errors_total", "Spider runs that failed or timed out", ("source",))
+CRAWL_DURATION = REGISTRY.histogram("crawl_duration_seconds", "Spider run wall time", ("source",))
+CACHE_REQUESTS = REGISTRY.counter("cache_requests_total", "Cache lookups", ("cache", "result"))
+
+
+def record_crawl_stats(source: str, stats: Dict[str, float]) -> None:
+    """Fold a finished crawl's Scrapy stats (see laser_intelligence.extensions) into the counters"""
+    CRAWL_REQUESTS.inc(stats.get("downloader/request_count", 0), source=source)
+    CRAWL_ITEMS.inc(stats.get("item_scraped_count", 0), source=source)
+    CRAWL_BLOCKS.inc(stats.get("source/blocks_detected", 0), source=source)
+    if stats.get("httpcache/hit") or stats.get("httpcache/miss"):
+        CACHE_REQUESTS.inc(stats.get("httpcache/hit", 0), cache="http", result="hit")
+        CACHE_REQUESTS.inc(stats.get("httpcache/miss", 0), cache="http", result="miss")
+    if stats.get("elapsed_time_seconds") is not None:
+        CRAWL_DURATION.observe(stats["elapsed_time_seconds"], source=source)
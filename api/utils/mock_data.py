@@ -6,9 +6,12 @@ from typing import List, Dict, Any
 from datetime import datetime
 import random
 
+from laser_intelligence.items import Listing
 
-def generate_intelligent_mock_results(query: str, limit: int) -> List[Dict[str, Any]]:
+
+def generate_intelligent_mock_results(query: str, limit: int) -> List[Listing]:
     """Generate intelligent mock results based on actual search patterns and real equipment data"""
+    from laser_intelligence.scoring import score_listings
     
     query_lower = query.lower()
     
@@ -155,23 +158,23 @@ def generate_intelligent_mock_results(query: str, limit: int) -> List[Dict[str,
             location = random.choice(locations)
             item_id = f"{source['name'].lower().replace(' ', '_')}_{random.randint(1000, 9999)}"
             
-            results.append({
-                "id": item_id,
-                "title": f"{brand} {model} Laser System",
-                "brand": brand,
-                "model": model,
-                "condition": condition,
-                "price": float(price),
-                "source": source["name"],
-                "location": location,
-                "description": f"Professional {brand} {model} laser system in {condition.lower()} condition. Perfect for aesthetic treatments and medical procedures.",
-                "url": f"{source['url']}{item_id}",
-                "images": [f"https://example.com/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}.jpg"],
-                "discovered_at": datetime.now().isoformat(),
-                "score_overall": random.randint(80, 95),
-                "status": "active"
-            })
+            results.append(Listing(
+                id=item_id,
+                title=f"{brand} {model} Laser System",
+                brand=brand,
+                model=model,
+                condition=condition,
+                price=float(price),
+                source=source["name"],
+                location=location,
+                description=f"Professional {brand} {model} laser system in {condition.lower()} condition. Perfect for aesthetic treatments and medical procedures.",
+                url=f"{source['url']}{item_id}",
+                images=[f"https://example.com/{brand.lower()}_{model.lower().replace(' ', '_')}_{i+1}.jpg"],
+                discovered_at=datetime.now().isoformat(),
+                status="active"
+            ))
     
-    # Sort by score and price
-    results.sort(key=lambda x: (x['score_overall'], -x['price']), reverse=True)
+    # Sort by deal score and price
+    score_listings(results)
+    results.sort(key=lambda x: (x.score_overall, -x.price), reverse=True)
     return results[:limit]
@@ -0,0 +1,71 @@
+"""
+Fast JSON response serialization backed by orjson
+"""
+
+from typing import Any
+from dataclasses import asdict, is_dataclass
+from decimal import Decimal
+from datetime import datetime, date
+import json
+
+from fastapi.responses import JSONResponse
+
+from api.utils.timing import span
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Handle types orjson does not serialize natively (asyncpg DECIMAL columns, sets) and dataclasses"""
+    # Listings drop their crawl-internal fields; other dataclasses serialize whole
+    to_transport = getattr(obj, "to_transport", None)
+    if to_transport is not None:
+        return to_transport()
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_default(obj: Any) -> Any:
+    """Fallback encoder used only when orjson is not installed"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return _default(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes, with native datetime and Decimal handling"""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+    return json.dumps(
+        content,
+        default=_stdlib_default,
+        ensure_ascii=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson.
+
+    Used as the app's default response class. Endpoints that return large
+    listing payloads should return a FastJSONResponse directly so FastAPI
+    skips its jsonable_encoder pass over every row.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        with span("serialize"):
+            return dumps(content)
@@ -0,0 +1,113 @@
+"""
+Spider registry: discovered spiders, cached capability probes and live run state
+
+Spiders are discovered once through Scrapy's SpiderLoader; capability probes
+(Scrapy, Selenium, a Chrome binary) are cached for CAPABILITY_TTL seconds; and
+each spider run updates in-memory state, so status polls never touch the
+filesystem or fork a process.
+"""
+
+import importlib.util
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+SPIDER_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "laser-equipment-intelligence")
+CAPABILITY_TTL = float(os.getenv("SPIDER_CAPABILITY_TTL", "300"))
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chromedriver")
+
+
+@dataclass
+class SpiderRunState:
+    runs: int = 0
+    errors: int = 0
+    total_items: int = 0
+    last_run_at: Optional[str] = None
+    last_duration_seconds: Optional[float] = None
+    last_items: Optional[int] = None
+    last_error: Optional[str] = None
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.runs if self.runs else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "error_rate": round(self.error_rate, 4)}
+
+
+class SpiderRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spiders: Optional[List[str]] = None
+        self._discovery_error: Optional[str] = None
+        self._capabilities: Optional[Dict[str, Any]] = None
+        self._capabilities_checked = 0.0
+        self._state: Dict[str, SpiderRunState] = {}
+
+    def discover(self) -> List[str]:
+        """Spider names from Scrapy's SpiderLoader, loaded once per process"""
+        if self._spiders is None:
+            with self._lock:
+                if self._spiders is None:
+                    try:
+                        from scrapy.settings import Settings
+                        from scrapy.spiderloader import SpiderLoader
+                        settings = Settings()
+                        settings.setmodule("laser_intelligence.settings", priority="project")
+                        self._spiders = sorted(SpiderLoader.from_settings(settings).list())
+                    except Exception as e:
+                        print(f"⚠️ Spider discovery failed: {e}")
+                        self._discovery_error = str(e)
+                        self._spiders = []
+        return self._spiders
+
+    def capabilities(self) -> Dict[str, Any]:
+        """Scrapy/Selenium/Chrome availability, re-probed at most every CAPABILITY_TTL seconds"""
+        now = time.monotonic()
+        if self._capabilities is None or now - self._capabilities_checked > CAPABILITY_TTL:
+            chrome = next((path for path in map(shutil.which, CHROME_BINARIES) if path), None)
+            self._capabilities = {
+                "scrapy": importlib.util.find_spec("scrapy") is not None,
+                "selenium": importlib.util.find_spec("selenium") is not None,
+                "chrome": chrome is not None,
+                "chrome_path": chrome,
+                "spider_directory": os.path.isdir(SPIDER_DIR),
+                "checked_at": datetime.now().isoformat()
+            }
+            self._capabilities_checked = now
+        return self._capabilities
+
+    def record_run(self, name: str, duration: float, items: int, error: Optional[str] = None) -> None:
+        with self._lock:
+            state = self._state.setdefault(name, SpiderRunState())
+            state.runs += 1
+            state.last_run_at = datetime.now().isoformat()
+            state.last_duration_seconds = round(duration, 3)
+            state.last_items = items
+            state.total_items += items
+            if error:
+                state.errors += 1
+                state.last_error = error
+
+    def state(self, name: str) -> Dict[str, Any]:
+        return self._state.get(name, SpiderRunState()).to_dict()
+
+    def status(self) -> Dict[str, Any]:
+        spiders = self.discover()
+        capabilities = self.capabilities()
+        return {
+            "spiders_available": spiders,
+            "spider_directory_exists": capabilities["spider_directory"],
+            "scrapy_installed": capabilities["scrapy"],
+            "capabilities": capabilities,
+            "discovery_error": self._discovery_error,
+            "spiders": {name: self.state(name) for name in spiders},
+            "timestamp": datetime.now().isoformat()
+        }
+
+
+registry = SpiderRegistry()
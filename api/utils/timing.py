@@ -0,0 +1,212 @@
+"""
+Per-request timing spans, Server-Timing headers and opt-in profiling
+
+Wrap hot-path work in `with span("db_query"):` (or decorate it with
+@timed("spiders")). Spans are collected per request through a contextvar,
+returned to the client as a Server-Timing header, logged as one JSON line on
+the "api.timing" logger and, when opentelemetry is installed and
+OTEL_SERVICE_NAME is set, mirrored as OpenTelemetry spans.
+
+Sending `X-Profile: <API_PROFILE_TOKEN>` runs the request under pyinstrument
+(if installed) and saves an HTML report under API_PROFILE_DIR.
+"""
+
+import functools
+import inspect
+import logging
+import os
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from starlette.routing import Match
+
+from api.utils.metrics import HTTP_REQUEST_DURATION
+
+_tracer = None
+if os.getenv("OTEL_SERVICE_NAME"):
+    # Only pay for the opentelemetry import when a deployment has configured it
+    try:
+        from opentelemetry import trace as otel_trace
+        _tracer = otel_trace.get_tracer("laser_intelligence.api")
+    except ImportError:  # pragma: no cover - opentelemetry is optional
+        pass
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pragma: no cover - pyinstrument is optional
+    Profiler = None
+
+logger = logging.getLogger("api.timing")
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_TOKEN = os.getenv("API_PROFILE_TOKEN")
+PROFILE_DIR = os.getenv("API_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "api_profiles"))
+
+
+@dataclass
+class Span:
+    name: str
+    duration_ms: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class RequestTimings:
+    request_id: str
+    started: float = field(default_factory=time.perf_counter)
+    spans: List[Span] = field(default_factory=list)
+
+    def totals(self) -> Dict[str, float]:
+        """Milliseconds per span name, summed over repeated spans"""
+        totals: Dict[str, float] = {}
+        for recorded in self.spans:
+            totals[recorded.name] = totals.get(recorded.name, 0.0) + recorded.duration_ms
+        return totals
+
+    def server_timing(self) -> str:
+        entries = [f"{name};dur={ms:.1f}" for name, ms in self.totals().items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+    """Time a block; the yielded dict can be filled with attributes (e.g. row counts)"""
+    timings = _current.get()
+    otel_span = _tracer.start_as_current_span(name, attributes=attributes) if _tracer else None
+    if otel_span is not None:
+        otel_span.__enter__()
+    started = time.perf_counter()
+    try:
+        yield attributes
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if timings is not None:
+            timings.spans.append(Span(name, elapsed_ms, attributes))
+        if otel_span is not None:
+            otel_span.__exit__(None, None, None)
+
+
+def timed(name: str):
+    """Decorator form of span() for sync and async functions"""
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimingMiddleware:
+    """ASGI middleware that collects spans per request and adds a Server-Timing header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(request_id=uuid.uuid4().hex[:16])
+        token = _current.set(timings)
+        profiler = self._start_profiler(scope)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                headers.append((b"x-request-id", timings.request_id.encode("latin-1")))
+                if profiler is not None:
+                    headers.append((b"x-profile-report", self._profile_path(timings).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if profiler is not None:
+                self._save_profile(profiler, timings)
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - timings.started,
+                method=scope.get("method", ""), route=self._route(scope), status=str(status)
+            )
+            self._log(scope, status, timings)
+
+    def _route(self, scope) -> str:
+        """Route template (not the raw path) so item ids don't explode label cardinality"""
+        route = scope.get("route")
+        if route is None:
+            # Older Starlette doesn't record the matched route in the scope
+            for candidate in getattr(scope.get("app"), "routes", ()):
+                if candidate.matches(scope)[0] == Match.FULL:
+                    route = candidate
+                    break
+        template = getattr(route, "path", None)
+        if template is None:
+            return "unmatched"
+        # Routes of included routers may carry only their own path; restore the static prefix
+        extra = scope["path"].rstrip("/").count("/") - template.rstrip("/").count("/")
+        if extra > 0:
+            template = "/".join(scope["path"].split("/")[:extra + 1]) + template
+        return template
+
+    def _start_profiler(self, scope):
+        if Profiler is None or not PROFILE_TOKEN:
+            return None
+        headers = dict(scope.get("headers", []))
+        if headers.get(PROFILE_HEADER, b"").decode("latin-1") != PROFILE_TOKEN:
+            return None
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        return profiler
+
+    @staticmethod
+    def _profile_path(timings: RequestTimings) -> str:
+        return os.path.join(PROFILE_DIR, f"{timings.request_id}.html")
+
+    def _save_profile(self, profiler, timings: RequestTimings) -> None:
+        profiler.stop()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(self._profile_path(timings), "w") as f:
+            f.write(profiler.output_html())
+
+    @staticmethod
+    def _log(scope, status: int, timings: RequestTimings) -> None:
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        from api.utils.responses import dumps
+        logger.info(dumps({
+            "request_id": timings.request_id,
+            "method": scope.get("method"),
+            "path": scope.get("path"),
+            "status": status,
+            "duration_ms": round((time.perf_counter() - timings.started) * 1000, 2),
+            "spans": [
+                {"name": s.name, "duration_ms": round(s.duration_ms, 2), **s.attributes} for s in timings.spans
+            ]
+        }).decode())
@@ -0,0 +1,56 @@
+"""
+Brand and model extraction shared by every spider
+
+Brand names come from the actual equipment data (57 brands). Model patterns are
+compiled once at import instead of being rebuilt for every scraped title.
+"""
+
+import re
+from typing import Dict, List, Pattern, Tuple
+
+BRANDS: Tuple[str, ...] = (
+    'aerolase', 'aesthetic', 'agnes', 'allergan', 'alma', 'apyx', 'btl', 'bluecore', 'buffalo',
+    'candela', 'canfield', 'cocoon', 'cutera', 'cynosure', 'cytrellis', 'deka', 'dusa', 'edge',
+    'ellman', 'energist', 'envy', 'fotona', 'hk', 'ilooda', 'inmode', 'iridex', 'jeisys',
+    'laseroptek', 'lumenis', 'lutronic', 'luvo', 'merz', 'microaire', 'mixto', 'mrp', 'new',
+    'novoxel', 'ohmeda', 'perigee', 'pronox', 'quanta', 'quantel', 'rohrer', 'sandstone',
+    'sciton', 'she', 'sinclair', 'solta', 'syl', 'syneron', 'thermi', 'venus', 'wells',
+    'wontech', 'zimmer'
+)
+
+MAX_MODEL_LENGTH = 50
+
+# Tried in order for the matched brand; first match wins
+MODEL_PATTERNS: Dict[str, List[Pattern]] = {
+    brand: [
+        re.compile(rf'{brand}\s+([a-zA-Z0-9\s\-\.]+?)(?:\s|$|,|\.)'),
+        re.compile(rf'{brand}:\s*([a-zA-Z0-9\s\-\.]+?)(?:\s|$|,|\.)'),
+        re.compile(rf'{brand}\s+([a-zA-Z0-9\s\-\.]+?)(?:\s+laser|\s+system|\s+device)'),
+    ]
+    for brand in BRANDS
+}
+
+
+def extract_brand_model(title: str) -> Tuple[str, str]:
+    """Return (brand, model) for a listing title, "Unknown" when not recognized"""
+    if not title:
+        return "Unknown", "Unknown"
+
+    title_lower = title.lower()
+    for brand in BRANDS:
+        if brand not in title_lower:
+            continue
+
+        model = "Unknown"
+        for pattern in MODEL_PATTERNS[brand]:
+            match = pattern.search(title_lower)
+            if match:
+                model = match.group(1).strip().title()
+                break
+
+        # Prevent overly long model names
+        if len(model) > MAX_MODEL_LENGTH:
+            model = model[:MAX_MODEL_LENGTH].strip()
+        return brand.title(), model
+
+    return "Unknown", "Unknown"
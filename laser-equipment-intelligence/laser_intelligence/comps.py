@@ -0,0 +1,290 @@
+"""
+Comparable-sales index: resale estimates from what equipment actually sold for
+
+Sold prices from price_comps are held in memory as sorted arrays per
+brand|model and condition class, with a per-year split of each array for
+nearest-neighbour lookups by model year. A listing's resale estimate is
+the median of its k nearest comps by year when its year is known, else
+percentiles read straight off the sorted array, so a lookup is a few dict
+hits and index arithmetic. A full load sorts each array once; new sales are
+inserted with bisect.insort, so the index grows incrementally instead of
+being rebuilt.
+
+The index is cached on disk as JSON lines so spiders and the API share it.
+New sales are appended to the file rather than rewriting it, and a process
+holding the index reads only the lines appended since it last looked; only
+a rebuild (which replaces the file) makes readers load it all again.
+"""
+
+import bisect
+import json
+import os
+import re
+import tempfile
+import threading
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from laser_intelligence.demand import ANY, condition_class
+from laser_intelligence.items import Listing
+from laser_intelligence.scoring import price_key
+
+MIN_COMPS = 3          # fewer sold comps than this fall back to asking-price stats
+KNN_NEIGHBORS = 7
+
+COMPS_CACHE = os.getenv(
+    'COMPS_CACHE',
+    os.path.join(tempfile.gettempdir(), 'laser_intelligence_comps.jsonl')
+)
+
+_YEAR_RE = re.compile(r'\b(19[89]\d|20[0-4]\d)\b')
+
+
+def listing_year(text: Optional[str]) -> Optional[int]:
+    """Model/manufacture year mentioned in a title or description"""
+    match = _YEAR_RE.search(text or '')
+    return int(match.group(1)) if match else None
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile of an already sorted list"""
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+@dataclass
+class Comp:
+    brand: str
+    model: Optional[str]
+    sold_price: float
+    condition: str = ANY
+    year: Optional[int] = None
+    sold_date: Optional[str] = None
+    source: Optional[str] = None
+    url: Optional[str] = None
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> "Comp":
+        """Build a comp from a price_comps row or a sold lasermatch_items row"""
+        sold_date = data.get('sold_date') or data.get('last_updated')
+        year = data.get('year') or listing_year(data.get('title')) or listing_year(data.get('description'))
+        return cls(
+            brand=data.get('brand') or 'Unknown',
+            model=data.get('model'),
+            sold_price=float(data.get('sold_price') or data.get('price')),
+            condition=condition_class(data.get('condition')),
+            year=year,
+            sold_date=sold_date.isoformat() if isinstance(sold_date, datetime) else sold_date,
+            source=data.get('source'),
+            url=data.get('url')
+        )
+
+
+@dataclass(frozen=True)
+class CompEstimate:
+    resale: float       # median sold price of the comps used
+    low: float          # 25th percentile
+    high: float         # 75th percentile
+    count: int
+    basis: str          # "year_knn", "condition" or "model"
+
+    @property
+    def mad(self) -> float:
+        """MAD-equivalent spread (half the interquartile range) for the scoring z-score"""
+        return (self.high - self.low) / 2
+
+
+class CompsIndex:
+    """Sorted sold prices per brand|model and condition class"""
+
+    def __init__(self, comps: Iterable[Comp] = ()):
+        self.comps: List[Comp] = []
+        self._prices: Dict[Tuple[str, str], List[float]] = {}
+        self._by_year: Dict[Tuple[str, str], Dict[int, List[float]]] = {}
+        self._years: Dict[Tuple[str, str], List[int]] = {}
+        # Bulk load: append everything, then sort each array once
+        for comp in comps:
+            self._insert(comp, bulk=True)
+        for prices in self._prices.values():
+            prices.sort()
+        for key, by_year in self._by_year.items():
+            for prices in by_year.values():
+                prices.sort()
+            self._years[key] = sorted(by_year)
+
+    def __bool__(self) -> bool:
+        return bool(self.comps)
+
+    def _insert(self, comp: Comp, bulk: bool = False) -> None:
+        """Add a sale; in bulk the arrays are left unsorted for __init__ to sort"""
+        if not comp.sold_price or comp.sold_price <= 0:
+            return
+        put = list.append if bulk else bisect.insort
+        self.comps.append(comp)
+        model_key = price_key(comp.brand, comp.model)
+        # A comp of unknown condition already belongs to the ANY class; count it once
+        for key in {(model_key, comp.condition), (model_key, ANY)}:
+            put(self._prices.setdefault(key, []), comp.sold_price)
+            if comp.year is not None:
+                years = self._by_year.setdefault(key, {})
+                if comp.year not in years and not bulk:
+                    bisect.insort(self._years.setdefault(key, []), comp.year)
+                put(years.setdefault(comp.year, []), comp.sold_price)
+
+    def add(self, comp: Comp) -> None:
+        """Insert one sale, keeping every array sorted"""
+        self._insert(comp)
+
+    def add_all(self, comps: Iterable[Comp]) -> None:
+        for comp in comps:
+            self.add(comp)
+
+    def _nearest_years(self, key: Tuple[str, str], year: int) -> Optional[List[float]]:
+        """Prices of the KNN_NEIGHBORS comps closest in year, expanding outward from it"""
+        years = self._years.get(key)
+        if not years:
+            return None
+        by_year = self._by_year[key]
+        right = bisect.bisect_left(years, year)
+        left = right - 1
+        prices: List[float] = []
+        while len(prices) < KNN_NEIGHBORS and (left >= 0 or right < len(years)):
+            if right >= len(years) or (left >= 0 and year - years[left] <= years[right] - year):
+                prices.extend(by_year[years[left]])
+                left -= 1
+            else:
+                prices.extend(by_year[years[right]])
+                right += 1
+        return sorted(prices) if len(prices) >= MIN_COMPS else None
+
+    def estimate(self, brand: Optional[str], model: Optional[str], condition: Optional[str] = None,
+                 year: Optional[int] = None) -> Optional[CompEstimate]:
+        """Resale estimate from the most specific comps that have enough sales"""
+        model_key = price_key(brand, model)
+        cls = condition_class(condition)
+        keys = [((model_key, cls), "condition")] if cls != ANY else []
+        keys.append(((model_key, ANY), "model"))
+        for key, basis in keys:
+            prices = self._nearest_years(key, year) if year is not None else None
+            if prices is not None:
+                basis = "year_knn"
+            else:
+                prices = self._prices.get(key)
+            if prices and len(prices) >= MIN_COMPS:
+                return CompEstimate(
+                    resale=percentile(prices, 0.5),
+                    low=percentile(prices, 0.25),
+                    high=percentile(prices, 0.75),
+                    count=len(prices),
+                    basis=basis
+                )
+        return None
+
+    def estimate_listing(self, listing: Listing) -> Optional[CompEstimate]:
+        return self.estimate(listing.brand, listing.model, listing.condition, listing_year(listing.title))
+
+    @classmethod
+    def load(cls, path: str = COMPS_CACHE) -> "CompsIndex":
+        """Load cached comps; returns an empty index if the cache is missing"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return cls()
+        return cls(_parse_lines(data))
+
+    def save(self, path: str = COMPS_CACHE) -> None:
+        """Write comps atomically so concurrent readers never see a partial file"""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_comp_lines(self.comps))
+        os.replace(temp_path, path)
+
+
+def _comp_lines(comps: Iterable[Comp]) -> bytes:
+    return b''.join(json.dumps(asdict(comp)).encode('utf-8') + b'\n' for comp in comps)
+
+
+def _parse_lines(data: bytes) -> List[Comp]:
+    comps = []
+    for line in data.splitlines():
+        try:
+            comps.append(Comp(**json.loads(line)))
+        except (ValueError, TypeError):
+            continue
+    return comps
+
+
+_current: Optional[CompsIndex] = None
+# (inode, bytes read) of the cache file behind _current; lines past the offset are new sales
+_current_position: Optional[Tuple[int, int]] = None
+_lock = threading.Lock()
+
+
+def current_comps(path: str = COMPS_CACHE) -> CompsIndex:
+    """Process-wide comps index, caught up with sales appended to the cache since the last call"""
+    with _lock:
+        _catch_up(path)
+        return _current
+
+
+def _catch_up(path: str) -> None:
+    """Read appended lines into _current, or reload it if the file was replaced; call holding _lock"""
+    global _current, _current_position
+    try:
+        stat = os.stat(path)
+    except OSError:
+        if _current is None:
+            _current, _current_position = CompsIndex(), None
+        return
+    inode, offset = _current_position or (None, 0)
+    if _current is not None and inode == stat.st_ino and offset == stat.st_size:
+        return
+    if _current is None or inode != stat.st_ino or stat.st_size < offset:
+        index, offset = CompsIndex(), 0
+    else:
+        index = _current
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    # A line still being appended is left for the next call
+    complete = data[:data.rfind(b'\n') + 1]
+    comps = _parse_lines(complete)
+    if index is _current:
+        index.add_all(comps)
+    else:
+        index = CompsIndex(comps)
+    _current, _current_position = index, (stat.st_ino, offset + len(complete))
+
+
+def add_comps(comps: Iterable[Comp], path: str = COMPS_CACHE) -> CompsIndex:
+    """Append new sales to the cache for other processes and insert them into this process's index"""
+    comps = list(comps)
+    with _lock:
+        if comps:
+            directory = os.path.dirname(path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            # One O_APPEND write per batch, so appends from several processes never interleave
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, _comp_lines(comps))
+            finally:
+                os.close(fd)
+        _catch_up(path)
+        return _current
+
+
+def replace_comps(comps: Iterable[Comp], path: str = COMPS_CACHE) -> CompsIndex:
+    """Rebuild the cached index from the full price_comps table"""
+    global _current, _current_position
+    index = CompsIndex(comps)
+    with _lock:
+        index.save(path)
+        stat = os.stat(path)
+        _current, _current_position = index, (stat.st_ino, stat.st_size)
+    return index
@@ -0,0 +1,328 @@
+"""
+Cross-source listing deduplication using MinHash signatures and LSH banding
+
+The same physical system is often listed on eBay, DOTmed, BidSpotter and
+LaserMatch under different URLs. Listings are reduced to a MinHash signature
+over their normalized brand/model/title tokens; LSH banding yields candidate
+pairs without comparing every listing to every other one; candidates are
+only merged when brand, model, price and location blocking rules agree and
+their exact shingle Jaccard similarity clears the threshold. Blocking is
+also applied cluster to cluster: each cluster root keeps the known brands,
+models, price range and location of its members, and two clusters are only
+joined when those agree, so a listing with an unknown brand cannot bridge
+two different brands.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from laser_intelligence.items import Listing
+
+# 16 bands of 4 rows put the LSH threshold at (1/16)^(1/4) = 0.5, the merge
+# threshold, while keeping buckets of unrelated listings that share a few
+# common tokens small
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+MERSENNE_PRIME = (1 << 31) - 1
+
+# Fixed seed so signatures (and the LSH band keys stored in the DB) are stable across runs
+_rng = np.random.default_rng(20250923)
+_PERM_A = _rng.integers(1, MERSENNE_PRIME, size=NUM_PERM, dtype=np.int64)
+_PERM_B = _rng.integers(0, MERSENNE_PRIME, size=NUM_PERM, dtype=np.int64)
+
+# Words that appear in most titles and carry no identity
+STOPWORDS = {
+    'laser', 'lasers', 'system', 'systems', 'machine', 'device', 'unit', 'for', 'sale',
+    'with', 'and', 'the', 'a', 'an', 'of', 'in', 'used', 'new', 'refurbished', 'medical',
+    'aesthetic', 'equipment', 'listing', 'ebay', 'dotmed', 'bidspotter', 'auction',
+    'lot', 'excellent', 'good', 'fair', 'condition', 'working'
+}
+
+# Locations that say nothing about where the equipment actually is
+UNKNOWN_LOCATIONS = {'', 'unknown', 'ebay', 'auction location', 'n/a', 'usa', 'us'}
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize_tokens(listing: Listing) -> List[str]:
+    """Lowercased identity tokens from brand, model and title"""
+    text = ' '.join(
+        part for part in (listing.brand, listing.model, listing.title)
+        if part and part != 'Unknown'
+    ).lower()
+    return [token for token in _TOKEN_RE.findall(text) if token not in STOPWORDS]
+
+
+def shingles(listing: Listing) -> Set[str]:
+    """Token set plus character 3-grams so 'gentlemax' matches 'gentle max'"""
+    tokens = normalize_tokens(listing)
+    result = set(tokens)
+    joined = ''.join(tokens)
+    result.update(joined[i:i + 3] for i in range(max(0, len(joined) - 2)))
+    return result
+
+
+def _hash_shingle(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'little') % MERSENNE_PRIME
+
+
+def minhash(listing: Listing, values: Optional[Set[str]] = None) -> np.ndarray:
+    """NUM_PERM-wide MinHash signature of a listing"""
+    if values is None:
+        values = shingles(listing)
+    if not values:
+        return np.full(NUM_PERM, MERSENNE_PRIME, dtype=np.int64)
+    hashes = np.fromiter((_hash_shingle(s) for s in values), dtype=np.int64, count=len(values))
+    return ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+
+def lsh_band_keys(signature: np.ndarray) -> List[int]:
+    """One signed 64-bit key per LSH band (fits a Postgres BIGINT)"""
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(bytes([band]) + chunk.tobytes(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+def _location_key(location: Optional[str]) -> Optional[str]:
+    if not location:
+        return None
+    key = location.split(',')[0].strip().lower()
+    return None if key in UNKNOWN_LOCATIONS else key
+
+
+def _known_brand(brand: Optional[str]) -> Optional[str]:
+    if not brand or brand.lower() == 'unknown':
+        return None
+    return brand.lower()
+
+
+def _model_key(model: Optional[str]) -> Optional[str]:
+    if not model or model.lower() == 'unknown':
+        return None
+    return ''.join(_TOKEN_RE.findall(model.lower())) or None
+
+
+def _models_compatible(left: str, right: str) -> bool:
+    """'GentleMax Pro' may match 'GentleMax Pro Plus' but not 'GentleLase'"""
+    return left in right or right in left
+
+
+@dataclass(slots=True)
+class _ClusterKey:
+    """Blocking attributes of every member of a cluster, kept on its root"""
+    brand: Optional[str] = None
+    models: Tuple[str, ...] = ()
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    location: Optional[str] = None
+
+    @classmethod
+    def of(cls, listing: Listing) -> "_ClusterKey":
+        model = _model_key(listing.model)
+        price = listing.price or None
+        return cls(brand=_known_brand(listing.brand), models=(model,) if model else (),
+                   min_price=price, max_price=price, location=_location_key(listing.location))
+
+    def conflicts(self, other: "_ClusterKey", price_tolerance: float) -> bool:
+        if self.brand and other.brand and self.brand != other.brand:
+            return True
+        if any(not _models_compatible(left, right) for left in self.models for right in other.models):
+            return True
+        if self.location and other.location and self.location != other.location:
+            return True
+        if self.min_price is not None and other.min_price is not None:
+            low, high = min(self.min_price, other.min_price), max(self.max_price, other.max_price)
+            if (high - low) / high > price_tolerance:
+                return True
+        return False
+
+    def merge(self, other: "_ClusterKey") -> "_ClusterKey":
+        prices = [p for p in (self.min_price, self.max_price, other.min_price, other.max_price) if p is not None]
+        return _ClusterKey(
+            brand=self.brand or other.brand,
+            models=tuple(dict.fromkeys(self.models + other.models)),
+            min_price=min(prices) if prices else None,
+            max_price=max(prices) if prices else None,
+            location=self.location or other.location
+        )
+
+
+@dataclass(slots=True)
+class EquipmentCluster:
+    """One physical piece of equipment and every listing (offer) seen for it"""
+    canonical: Listing
+    members: List[Listing]
+    existing_id: Optional[int] = None
+
+    @property
+    def offers(self) -> List[Dict[str, Any]]:
+        seen = set()
+        offers = []
+        for member in self.members:
+            if member.url in seen:
+                continue
+            seen.add(member.url)
+            offers.append({"source": member.source, "url": member.url, "price": member.price})
+        offers.sort(key=lambda offer: offer["price"] if offer["price"] is not None else float('inf'))
+        return offers
+
+
+class ListingDeduplicator:
+    """Incrementally indexes listings into LSH buckets and clusters duplicates"""
+
+    def __init__(self, threshold: float = 0.5, price_tolerance: float = 0.25, max_bucket_compare: int = 1000):
+        self.threshold = threshold
+        self.price_tolerance = price_tolerance
+        # Bounds the work one listing can cost; comparisons beyond it are counted in skipped_comparisons
+        self.max_bucket_compare = max_bucket_compare
+        self.skipped_comparisons = 0
+        self.listings: List[Listing] = []
+        self.shingle_sets: List[Set[str]] = []
+        self.band_keys: List[List[int]] = []
+        self.existing_ids: List[Optional[int]] = []
+        self._buckets: Dict[int, List[int]] = {}
+        self._by_url: Dict[str, int] = {}
+        self._parent: List[int] = []
+        self._keys: Dict[int, _ClusterKey] = {}
+
+    def add(self, listing: Listing, existing_id: Optional[int] = None) -> int:
+        """Index a listing and union it with any verified duplicates already indexed"""
+        index = len(self.listings)
+        values = shingles(listing)
+        keys = lsh_band_keys(minhash(listing, values))
+        self.listings.append(listing)
+        self.shingle_sets.append(values)
+        self.band_keys.append(keys)
+        self.existing_ids.append(existing_id)
+        self._parent.append(index)
+        self._keys[index] = _ClusterKey.of(listing)
+
+        if listing.url:
+            if listing.url in self._by_url:
+                # The same url is the same listing whatever its attributes say now
+                self._union(self._by_url[listing.url], index, force=True)
+            else:
+                self._by_url[listing.url] = index
+
+        candidates = set()
+        for key in keys:
+            bucket = self._buckets.setdefault(key, [])
+            candidates.update(bucket)
+            bucket.append(index)
+        if len(candidates) > self.max_bucket_compare:
+            # Keep the most recently indexed candidates and record what was left out
+            self.skipped_comparisons += len(candidates) - self.max_bucket_compare
+            candidates = sorted(candidates)[-self.max_bucket_compare:]
+
+        for other in candidates:
+            if self._find(other) != self._find(index) and self._is_duplicate(other, index):
+                self._union(other, index)
+        return index
+
+    def add_all(self, listings: Iterable[Listing]) -> None:
+        for listing in listings:
+            self.add(listing)
+
+    def all_band_keys(self) -> List[int]:
+        return list(self._buckets)
+
+    def clusters(self) -> List[EquipmentCluster]:
+        """Group indexed listings into clusters with a chosen canonical record"""
+        groups: Dict[int, List[int]] = {}
+        for index in range(len(self.listings)):
+            groups.setdefault(self._find(index), []).append(index)
+
+        clusters = []
+        for indexes in groups.values():
+            existing = [i for i in indexes if self.existing_ids[i] is not None]
+            if existing:
+                canonical_index = existing[0]
+            else:
+                canonical_index = max(indexes, key=self._canonical_rank)
+            clusters.append(EquipmentCluster(
+                canonical=self.listings[canonical_index],
+                members=[self.listings[i] for i in indexes],
+                existing_id=self.existing_ids[canonical_index]
+            ))
+        return clusters
+
+    def similarity(self, a: int, b: int) -> float:
+        """Exact Jaccard similarity of two LSH candidates' shingle sets"""
+        left, right = self.shingle_sets[a], self.shingle_sets[b]
+        if not left or not right:
+            return 0.0
+        return len(left & right) / len(left | right)
+
+    def _is_duplicate(self, a: int, b: int) -> bool:
+        left, right = self.listings[a], self.listings[b]
+
+        # Brand blocking
+        left_brand, right_brand = _known_brand(left.brand), _known_brand(right.brand)
+        if left_brand and right_brand and left_brand != right_brand:
+            return False
+
+        # Model blocking
+        left_model, right_model = _model_key(left.model), _model_key(right.model)
+        if left_model and right_model and not _models_compatible(left_model, right_model):
+            return False
+
+        # Price blocking
+        if left.price and right.price:
+            if abs(left.price - right.price) / max(left.price, right.price) > self.price_tolerance:
+                return False
+
+        # Location blocking
+        left_location, right_location = _location_key(left.location), _location_key(right.location)
+        if left_location and right_location and left_location != right_location:
+            return False
+
+        return self.similarity(a, b) >= self.threshold
+
+    def _canonical_rank(self, index: int):
+        listing = self.listings[index]
+        filled = sum(1 for value in (listing.brand, listing.model, listing.condition, listing.price,
+                                     listing.location, listing.description, listing.images)
+                     if value and value != 'Unknown')
+        price_rank = -(listing.price or float('inf'))
+        return (filled, listing.score_overall or 0, price_rank)
+
+    def _find(self, index: int) -> int:
+        parent = self._parent
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    def _union(self, a: int, b: int, force: bool = False) -> bool:
+        """Join the clusters of a and b unless their blocking attributes conflict"""
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a == root_b:
+            return True
+        key_a, key_b = self._keys[root_a], self._keys[root_b]
+        if not force and key_a.conflicts(key_b, self.price_tolerance):
+            return False
+        root, child = min(root_a, root_b), max(root_a, root_b)
+        self._parent[child] = root
+        self._keys[root] = key_a.merge(key_b)
+        del self._keys[child]
+        return True
+
+
+def deduplicate_listings(listings: Iterable[Listing], **kwargs) -> List[Listing]:
+    """Collapse duplicate listings into canonical records carrying per-source offers"""
+    deduplicator = ListingDeduplicator(**kwargs)
+    deduplicator.add_all(listings)
+    results = []
+    for cluster in deduplicator.clusters():
+        canonical = cluster.canonical
+        canonical.offers = cluster.offers
+        results.append(canonical)
+    return results
@@ -0,0 +1,248 @@
+"""
+Buyer demand index used to boost scores of listings someone is waiting for
+
+Demand lines (brand, model, condition, urgency, max_price, expiry) arrive
+from the CRM through POST /api/v1/demand/update and are cached on disk like
+PriceStats, so spiders and the API score against the same demand. Lines are
+hashed by brand|model (or brand alone for "any model") and condition class;
+within a bucket they are kept sorted by max_price with a suffix maximum of
+their boost, so "the best open demand this price satisfies" is one hash
+lookup plus one bisect, however many lines are open.
+"""
+
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from laser_intelligence.items import Listing
+from laser_intelligence.scoring import price_key
+
+# SPEC "Demand-Driven Scoring Enhancement": active demand adds 20-50 points
+URGENCY_BOOST = {'low': 20.0, 'medium': 35.0, 'high': 50.0}
+DEFAULT_URGENCY = 'medium'
+MAX_SCORE = 100.0
+
+CONDITION_CLASSES = ('new', 'used', 'refurb')
+ANY = 'any'
+ANY_MODELS = {'', 'any', '*'}
+
+DEMAND_CACHE = os.getenv(
+    'DEMAND_CACHE',
+    os.path.join(tempfile.gettempdir(), 'laser_intelligence_demand.json')
+)
+
+
+def condition_class(condition: Optional[str]) -> str:
+    """Bucket free-text listing or demand conditions into new/used/refurb (or any)"""
+    text = (condition or '').strip().lower()
+    if not text or text == ANY:
+        return ANY
+    if 'refurb' in text:
+        return 'refurb'
+    if 'new' in text and 'like new' not in text:
+        return 'new'
+    return 'used'
+
+
+def _parse_expiry(value: Any) -> Optional[float]:
+    if value in (None, ''):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+
+@dataclass
+class DemandItem:
+    brand: str
+    model: Optional[str] = None
+    condition: str = ANY
+    urgency: str = DEFAULT_URGENCY
+    quantity_needed: int = 1
+    max_price: Optional[float] = None
+    buyer_contact: Optional[str] = None
+    notes: Optional[str] = None
+    expires_at: Optional[float] = None
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> "DemandItem":
+        if not data.get('brand'):
+            raise ValueError("demand item requires a brand")
+        urgency = (data.get('urgency') or DEFAULT_URGENCY).strip().lower()
+        if urgency not in URGENCY_BOOST:
+            raise ValueError(f"unknown urgency '{urgency}'")
+        model = (data.get('model') or '').strip()
+        return cls(
+            brand=data['brand'].strip(),
+            model=None if model.lower() in ANY_MODELS else model,
+            condition=condition_class(data.get('condition')),
+            urgency=urgency,
+            quantity_needed=int(data.get('quantity_needed') or 1),
+            max_price=float(data['max_price']) if data.get('max_price') not in (None, '') else None,
+            buyer_contact=data.get('buyer_contact'),
+            notes=data.get('notes'),
+            expires_at=_parse_expiry(data.get('expires_at'))
+        )
+
+    @property
+    def key(self) -> str:
+        return price_key(self.brand, self.model) if self.model else price_key(self.brand)
+
+    @property
+    def identity(self) -> Tuple[str, str, Optional[str]]:
+        """What an update_type=remove line must match"""
+        return self.key, self.condition, self.buyer_contact
+
+    @property
+    def boost(self) -> float:
+        return URGENCY_BOOST[self.urgency]
+
+    def expired(self, now: float) -> bool:
+        return self.expires_at is not None and self.expires_at <= now
+
+
+@dataclass
+class _Bucket:
+    """Lines of one key and condition class, sorted by max_price"""
+    max_prices: List[float] = field(default_factory=list)
+    best_boost: List[float] = field(default_factory=list)   # max boost of lines at this position or later
+
+    @classmethod
+    def build(cls, items: List[DemandItem]) -> "_Bucket":
+        items = sorted(items, key=lambda item: float('inf') if item.max_price is None else item.max_price)
+        bucket = cls(max_prices=[float('inf') if item.max_price is None else item.max_price for item in items])
+        best = 0.0
+        bucket.best_boost = [0.0] * len(items)
+        for i in range(len(items) - 1, -1, -1):
+            best = max(best, items[i].boost)
+            bucket.best_boost[i] = best
+        return bucket
+
+    def lookup(self, price: Optional[float]) -> float:
+        """Best boost among lines whose max_price covers the price; only unbounded lines when it is unknown"""
+        index = bisect.bisect_left(self.max_prices, price if price else float('inf'))
+        return self.best_boost[index] if index < len(self.best_boost) else 0.0
+
+
+class DemandIndex:
+    """Open demand lines hashed by brand|model and condition class"""
+
+    def __init__(self, items: Iterable[DemandItem] = (), generated_at: Optional[float] = None):
+        self.items: List[DemandItem] = list(items)
+        self.generated_at = generated_at or time.time()
+        self._build(time.time())
+
+    def __bool__(self) -> bool:
+        return bool(self.items)
+
+    def _build(self, now: float) -> None:
+        self.items = [item for item in self.items if not item.expired(now)]
+        grouped: Dict[Tuple[str, str], List[DemandItem]] = {}
+        for item in self.items:
+            # "any" condition lines are filed under every condition class
+            for cls in (CONDITION_CLASSES if item.condition == ANY else (item.condition,)):
+                grouped.setdefault((item.key, cls), []).append(item)
+        self._buckets = {key: _Bucket.build(items) for key, items in grouped.items()}
+        expiries = [item.expires_at for item in self.items if item.expires_at is not None]
+        self._next_expiry = min(expiries) if expiries else None
+
+    def update(self, items: Iterable[DemandItem], update_type: str = 'replace') -> None:
+        """Apply a CRM update: replace all lines, append lines, or remove matching lines"""
+        items = list(items)
+        if update_type == 'replace':
+            self.items = items
+        elif update_type == 'append':
+            self.items = self.items + items
+        elif update_type == 'remove':
+            removed = {item.identity for item in items}
+            self.items = [item for item in self.items if item.identity not in removed]
+        else:
+            raise ValueError(f"unknown update_type '{update_type}'")
+        self.generated_at = time.time()
+        self._build(self.generated_at)
+
+    def boost(self, listing: Listing) -> float:
+        """Demand bonus for a listing: a model-level and a brand-level lookup"""
+        if not self.items:
+            return 0.0
+        if self._next_expiry is not None and time.time() >= self._next_expiry:
+            self._build(time.time())
+        cls = condition_class(listing.condition)
+        if cls == ANY:
+            cls = 'used'   # listings without a stated condition are assumed used
+        best = 0.0
+        for key in (price_key(listing.brand, listing.model), price_key(listing.brand)):
+            bucket = self._buckets.get((key, cls))
+            if bucket is not None:
+                best = max(best, bucket.lookup(listing.price))
+        return best
+
+    def apply(self, listings: Iterable[Listing]) -> None:
+        """Add the demand bonus to already scored listings"""
+        if not self.items:
+            return
+        for listing in listings:
+            boost = self.boost(listing)
+            listing.demand_boost = boost or None
+            if boost and listing.score_overall is not None:
+                listing.score_overall = round(min(MAX_SCORE, listing.score_overall + boost), 1)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [asdict(item) for item in self.items]
+
+    @classmethod
+    def load(cls, path: str = DEMAND_CACHE) -> "DemandIndex":
+        """Load cached demand; returns an empty index if the cache is missing"""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        return cls((DemandItem(**item) for item in data.get('items', [])), data.get('generated_at'))
+
+    def save(self, path: str = DEMAND_CACHE) -> None:
+        """Write demand atomically so concurrent readers never see a partial file"""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'generated_at': self.generated_at, 'items': self.to_dicts()}, f)
+        os.replace(temp_path, path)
+
+
+_current: Optional[DemandIndex] = None
+_current_mtime: Optional[float] = None
+_lock = threading.Lock()
+
+
+def current_demand(path: str = DEMAND_CACHE) -> DemandIndex:
+    """Process-wide demand index, reloaded when the cache file changes"""
+    global _current, _current_mtime
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        mtime = None
+    if _current is None or mtime != _current_mtime:
+        with _lock:
+            _current, _current_mtime = DemandIndex.load(path), mtime
+    return _current
+
+
+def update_demand(items: Iterable[DemandItem], update_type: str = 'replace',
+                  path: str = DEMAND_CACHE) -> DemandIndex:
+    """Apply an update to the cached demand and persist it for other processes"""
+    global _current, _current_mtime
+    with _lock:
+        index = DemandIndex.load(path)
+        index.update(items, update_type)
+        index.save(path)
+        _current, _current_mtime = index, os.stat(path).st_mtime
+    return index
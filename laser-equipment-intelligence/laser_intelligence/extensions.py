@@ -0,0 +1,41 @@
+"""
+Scrapy extensions for the Laser Intelligence project
+"""
+
+import json
+import os
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+
+class CrawlMetricsExtension:
+    """Write the final crawl stats to CRAWL_METRICS_FILE when the spider closes.
+
+    The API runs spiders as subprocesses and folds these stats into its
+    /metrics counters (requests, items, blocks, HTTP cache hits per source).
+    """
+
+    def __init__(self, crawler, path):
+        self.crawler = crawler
+        self.path = path
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get('CRAWL_METRICS_FILE')
+        if not path:
+            raise NotConfigured
+        extension = cls(crawler, path)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def spider_closed(self, spider, reason):
+        stats = {
+            key: value for key, value in self.crawler.stats.get_stats().items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        }
+        stats['finish_reason'] = reason
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(stats, f)
+        os.replace(tmp_path, self.path)
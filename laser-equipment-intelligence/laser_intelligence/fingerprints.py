@@ -0,0 +1,216 @@
+"""
+Seen-listing fingerprint store for incremental crawls
+
+Listings are keyed by canonical URL and fingerprinted by a hash of the fields
+that matter for a deal. A Bloom filter answers "never seen" without touching
+disk; everything else is confirmed against a SQLite table, which also keeps
+the last price/title/condition so changed listings can carry a delta.
+
+A crawl only reads the store. Fingerprints are recorded by remember_written
+once upsert_listings has stored the listings, so a listing whose write failed
+or whose crawl was dropped is offered again by the next crawl instead of
+being skipped as unchanged forever.
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from laser_intelligence.items import Listing
+from laser_intelligence.settings import FINGERPRINT_STORE
+
+# Query parameters that track the visit rather than identify the listing
+TRACKING_PARAMS = {
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+    'gclid', 'fbclid', 'ref', 'referrer', 'hash', 'epid', 'var', 'itmmeta',
+    '_trkparms', '_trksid', 'amdata', 'mkevt', 'mkcid', 'mkrid', 'campid', 'toolid', 'customid'
+}
+
+# Listing fields whose change is worth re-processing; snapshot fields also feed the delta
+HASHED_FIELDS = ('title', 'brand', 'model', 'condition', 'price', 'location', 'description')
+SNAPSHOT_FIELDS = ('price', 'title', 'condition')
+
+# Where the spiders' data_path(FINGERPRINT_STORE) puts the store: .scrapy/ of the project
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.scrapy',
+                                  FINGERPRINT_STORE)
+
+REMEMBER_SQL = """
+    INSERT INTO fingerprints (url_key, content_hash, price, title, condition, first_seen, last_seen)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (url_key) DO UPDATE SET
+        content_hash = excluded.content_hash,
+        price = excluded.price,
+        title = excluded.title,
+        condition = excluded.condition,
+        last_seen = excluded.last_seen
+"""
+
+STATUS_NEW = 'new'
+STATUS_CHANGED = 'changed'
+STATUS_UNCHANGED = 'unchanged'
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a listing URL so tracking variants of the same page share one key"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+def content_hash(listing: Listing) -> str:
+    """Stable 64-bit hex digest of the listing's deal-relevant fields"""
+    parts = []
+    for name in HASHED_FIELDS:
+        value = getattr(listing, name)
+        if isinstance(value, float):
+            value = f"{value:.2f}"
+        parts.append('' if value is None else ' '.join(str(value).split()).lower())
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class FingerprintStore:
+    """Persistent set of (canonical URL -> content hash) with a Bloom filter in front"""
+
+    def __init__(self, path: str, bloom_capacity: int = 100_000, commit_every: int = 500):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.commit_every = commit_every
+        self._pending = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                url_key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                price REAL,
+                title TEXT,
+                condition TEXT,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+        existing = self.conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+        self.bloom = BloomFilter(max(bloom_capacity, existing * 2))
+        for (url_key,) in self.conn.execute("SELECT url_key FROM fingerprints"):
+            self.bloom.add(url_key)
+
+    def __enter__(self) -> "FingerprintStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+
+    def seen(self, url: str) -> bool:
+        """True if the URL was stored by an earlier crawl"""
+        return self._lookup(canonical_url(url)) is not None
+
+    def _lookup(self, url_key: str) -> Optional[Tuple[Any, ...]]:
+        if url_key not in self.bloom:
+            return None
+        return self.conn.execute(
+            "SELECT content_hash, price, title, condition FROM fingerprints WHERE url_key = ?",
+            (url_key,)
+        ).fetchone()
+
+    def classify(self, listing: Listing) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Return (status, delta) for a listing against the fingerprint last stored"""
+        url_key = canonical_url(listing.url)
+        digest = listing.content_hash or content_hash(listing)
+        listing.content_hash = digest
+        previous = self._lookup(url_key)
+
+        # A reported sale changes no hashed field but must still reach the database
+        if previous is not None and previous[0] == digest and listing.status != 'sold':
+            return STATUS_UNCHANGED, None
+
+        delta = None
+        if previous is not None:
+            delta = {
+                name: {"old": old, "new": getattr(listing, name)}
+                for name, old in zip(SNAPSHOT_FIELDS, previous[1:])
+                if old != getattr(listing, name)
+            }
+        return (STATUS_CHANGED, delta) if previous is not None else (STATUS_NEW, None)
+
+    def remember(self, listings: Iterable[Listing]) -> int:
+        """Record the listings' current fingerprints; returns rows recorded"""
+        rows = _fingerprint_rows(listings)
+        self.conn.executemany(REMEMBER_SQL, rows)
+        for row in rows:
+            self.bloom.add(row[0])
+        self._pending += len(rows)
+        if self._pending >= self.commit_every:
+            self.conn.commit()
+            self._pending = 0
+        return len(rows)
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+
+def _fingerprint_rows(listings: Iterable[Listing]) -> List[Tuple[Any, ...]]:
+    now = time.time()
+    rows = []
+    for listing in listings:
+        if listing.url:
+            digest = listing.content_hash or content_hash(listing)
+            rows.append((canonical_url(listing.url), digest, listing.price, listing.title, listing.condition, now, now))
+    return rows
+
+
+def remember_written(listings: Iterable[Listing], path: str = DEFAULT_STORE_PATH) -> int:
+    """Record listings the database now holds; a no-op where incremental crawls have never run"""
+    if not os.path.exists(path):
+        return 0
+    rows = _fingerprint_rows(listings)
+    if rows:
+        # No Bloom filter needed to write; spiders build theirs when they open the store
+        with sqlite3.connect(path, timeout=30) as conn:
+            conn.executemany(REMEMBER_SQL, rows)
+        conn.close()
+    return len(rows)
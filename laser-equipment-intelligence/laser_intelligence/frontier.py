@@ -0,0 +1,103 @@
+"""
+Bounded priority frontier for paginated search result crawls
+
+One frontier per source crawl. Result pages are popped best-first: a page
+linked from a page full of high-scoring listings is fetched before one linked
+from a page of junk. The crawl stops when the depth or item budget is spent,
+or when several pages in a row produce nothing above the score threshold.
+"""
+
+import heapq
+import itertools
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Set, Tuple
+
+
+@dataclass
+class FrontierStats:
+    pages_crawled: int = 0
+    items_accepted: int = 0
+    urls_skipped: int = 0
+    low_score_streak: int = 0
+    stop_reason: Optional[str] = None
+
+
+@dataclass
+class CrawlFrontier:
+    max_depth: int = 5                 # deepest result page (1 = first page)
+    max_items: int = 500               # listings to accept before stopping
+    min_score: Optional[float] = None  # pages whose best listing scores below this count as low
+    patience: int = 2                  # consecutive low pages before stopping
+    max_queued: int = 100              # bound on pending pages
+    stats: FrontierStats = field(default_factory=FrontierStats)
+
+    def __post_init__(self):
+        self._heap: List[Tuple[float, int, int, str]] = []
+        self._seen: Set[str] = set()
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.stats.stop_reason is not None
+
+    @property
+    def remaining_items(self) -> int:
+        return max(0, self.max_items - self.stats.items_accepted)
+
+    def push(self, url: str, depth: int, priority: float = 0.0) -> bool:
+        """Queue a result page; returns False if seen, too deep, or the frontier is full"""
+        if self.exhausted or url in self._seen or depth > self.max_depth:
+            self.stats.urls_skipped += 1
+            return False
+        self._seen.add(url)
+        entry = (-priority, depth, next(self._counter), url)
+        if len(self._heap) < self.max_queued:
+            heapq.heappush(self._heap, entry)
+            return True
+        # Full: keep the better of the new page and the worst queued one
+        worst = max(self._heap)
+        if entry < worst:
+            self._heap.remove(worst)
+            heapq.heapify(self._heap)
+            heapq.heappush(self._heap, entry)
+            return True
+        self.stats.urls_skipped += 1
+        return False
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """Best pending (url, depth), or None when empty or the crawl is over"""
+        if self.exhausted or not self._heap:
+            return None
+        _, depth, _, url = heapq.heappop(self._heap)
+        return url, depth
+
+    def record_page(self, scores: Sequence[Optional[float]]) -> float:
+        """Account for a parsed page and return the priority for pages it links to"""
+        self.stats.pages_crawled += 1
+        self.stats.items_accepted += len(scores)
+        known = [score for score in scores if score is not None]
+
+        if not scores:
+            self.stats.low_score_streak += 1
+        elif self.min_score is not None and known and max(known) < self.min_score:
+            self.stats.low_score_streak += 1
+        else:
+            self.stats.low_score_streak = 0
+
+        if self.stats.items_accepted >= self.max_items:
+            self.stop("max_items")
+        elif self.stats.low_score_streak >= self.patience:
+            self.stop("low_score" if scores else "no_results")
+
+        if not known:
+            return 0.0
+        top = sorted(known, reverse=True)[:5]
+        return sum(top) / len(top)
+
+    def stop(self, reason: str) -> None:
+        if self.stats.stop_reason is None:
+            self.stats.stop_reason = reason
+        self._heap.clear()
@@ -1,33 +1,117 @@
-# Define here the models for your scraped items
+# Listing model shared by the spiders, pipelines, the DB layer and the API
 #
-# See documentation in:
-# https://docs.scrapy.org/en/latest/topics/items.html
+# Scrapy accepts dataclass instances as items (via itemadapter),
+# to_transport() is what API responses serialize (crawl-internal fields left
+# out), and to_db_row() feeds asyncpg executemany, so a listing is built once
+# and only shaped at the edges.
 
-import scrapy
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from operator import attrgetter
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
 
 
-class LaserIntelligenceItem(scrapy.Item):
+@dataclass(slots=True)
+class Listing:
     # Core identification
-    id = scrapy.Field()
-    title = scrapy.Field()
-    brand = scrapy.Field()
-    model = scrapy.Field()
-    
+    id: Optional[Union[int, str]] = None
+    title: str = "Unknown Title"
+    brand: str = "Unknown"
+    model: str = "Unknown"
+
     # Equipment details
-    condition = scrapy.Field()
-    price = scrapy.Field()
-    location = scrapy.Field()
-    description = scrapy.Field()
-    
+    condition: Optional[str] = None
+    price: Optional[float] = None
+    location: Optional[str] = None
+    description: Optional[str] = None
+
     # Source information
-    url = scrapy.Field()
-    source = scrapy.Field()
-    images = scrapy.Field()
-    
+    url: Optional[str] = None
+    source: Optional[str] = None
+    images: List[str] = field(default_factory=list)
+
     # Metadata
-    discovered_at = scrapy.Field()
-    score_overall = scrapy.Field()
-    
-    # Additional fields
-    margin_estimate = scrapy.Field()
-    status = scrapy.Field()
+    discovered_at: Optional[Union[str, datetime]] = None
+    last_updated: Optional[Union[str, datetime]] = None
+    score_overall: Optional[float] = None
+    margin_estimate: Optional[float] = None
+    est_resale: Optional[float] = None
+    demand_boost: Optional[float] = None
+    status: str = "active"
+
+    # Incremental crawl fingerprint (see fingerprints.py): change is "new" or
+    # "changed", delta maps changed fields to their old and new values
+    content_hash: Optional[str] = None
+    change: Optional[str] = None
+    delta: Optional[Dict[str, Any]] = None
+
+    # LaserMatch workflow fields
+    category: Optional[str] = None
+    availability: Optional[str] = None
+    assigned_rep: Optional[str] = None
+    target_price: Optional[float] = None
+    notes: Optional[str] = None
+    spider_urls: Optional[str] = None
+
+    # Search query that found the listing (grouping key for batch crawls)
+    query: Optional[str] = None
+
+    # Auction lot end (ISO, UTC) for end-aware recrawls (see scheduler.py)
+    auction_end: Optional[str] = None
+
+    # Per-source offers for a deduplicated equipment record (see dedup.py)
+    offers: List[Dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> "Listing":
+        """Build a listing from a dict, JSON object or asyncpg Record, ignoring unknown keys"""
+        values = {name: data[name] for name in FIELD_NAMES if name in data}
+        for name in NUMERIC_FIELDS:
+            value = values.get(name)
+            if isinstance(value, (Decimal, int, str)) and not isinstance(value, bool):
+                try:
+                    values[name] = float(value)
+                except ValueError:
+                    values[name] = None
+        for name in ("images", "offers"):
+            if values.get(name) is None:
+                values.pop(name, None)
+        if values.get("status") is None:
+            values.pop("status", None)
+        if not values.get("title"):
+            values.pop("title", None)
+        return cls(**values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow dict of every field"""
+        return {name: getattr(self, name) for name in FIELD_NAMES}
+
+    def to_transport(self) -> Dict[str, Any]:
+        """API payload: every field but the crawl-internal ones, offers only on merged records"""
+        values = dict(zip(TRANSPORT_FIELDS, _transport_values(self)))
+        if not values["offers"]:
+            del values["offers"]
+        return values
+
+    def to_db_row(self) -> Tuple[Any, ...]:
+        """Values in DB_COLUMNS order, ready for asyncpg executemany"""
+        return tuple(getattr(self, name) for name in DB_COLUMNS)
+
+
+# Kept so existing imports of the Scrapy-era item name keep working
+LaserIntelligenceItem = Listing
+
+FIELD_NAMES: Tuple[str, ...] = tuple(Listing.__dataclass_fields__)
+# Crawl and scoring state that stays out of API payloads (see to_transport)
+INTERNAL_FIELDS: Tuple[str, ...] = ("content_hash", "change", "delta", "query", "auction_end", "demand_boost")
+TRANSPORT_FIELDS: Tuple[str, ...] = tuple(name for name in FIELD_NAMES if name not in INTERNAL_FIELDS)
+_transport_values = attrgetter(*TRANSPORT_FIELDS)
+NUMERIC_FIELDS: Tuple[str, ...] = ("price", "target_price", "score_overall", "margin_estimate", "est_resale")
+
+# lasermatch_items columns written on ingest, in insert order
+DB_COLUMNS: Tuple[str, ...] = (
+    "title", "brand", "model", "condition", "price", "location",
+    "description", "url", "images", "source", "status", "category",
+    "availability", "assigned_rep", "target_price", "notes", "spider_urls"
+)
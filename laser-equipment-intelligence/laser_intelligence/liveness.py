@@ -0,0 +1,108 @@
+"""
+Bulk URL liveness checks
+
+Checks many listing URLs concurrently through one aiohttp session whose
+connector bounds open connections overall and per host, so a large batch
+moves at network speed without hammering any one site. Each URL gets a HEAD
+request, conditional on the ETag/Last-Modified seen last time; sites that
+refuse HEAD get a conditional GET whose body is never read. Responses are
+classified as live (2xx, 3xx, 304), dead (404, 410) or error (anything else,
+timeouts included), which the caller retries later.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, List, Optional
+
+from laser_intelligence.settings import USER_AGENT
+
+if TYPE_CHECKING:
+    import aiohttp
+
+LIVENESS_CONCURRENCY = int(os.getenv("LIVENESS_CONCURRENCY", "100"))
+LIVENESS_PER_HOST = int(os.getenv("LIVENESS_PER_HOST", "4"))
+LIVENESS_TIMEOUT = float(os.getenv("LIVENESS_TIMEOUT", "15"))
+
+DEAD_STATUSES = {404, 410}
+# Answers from servers that do not implement HEAD (or block it); retried as GET
+HEAD_REFUSED = {403, 405, 501}
+
+
+@dataclass
+class UrlCheck:
+    url: str
+    status: str                          # live, dead or error
+    http_status: Optional[int] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+@dataclass
+class UrlTarget:
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def classify(http_status: int) -> str:
+    if http_status in DEAD_STATUSES:
+        return 'dead'
+    if 200 <= http_status < 400:
+        return 'live'
+    return 'error'
+
+
+def open_session(concurrency: int = LIVENESS_CONCURRENCY, per_host: int = LIVENESS_PER_HOST,
+                 timeout: float = LIVENESS_TIMEOUT) -> "aiohttp.ClientSession":
+    """Client session whose connector caps connections overall and per host
+
+    No total timeout: it would include the wait for a free per-host
+    connection, so a batch concentrated on a few hosts would time out in the
+    queue. The timeouts only cover connecting and waiting on the socket.
+    """
+    import aiohttp
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host, ttl_dns_cache=300)
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=None, sock_connect=min(timeout, 5.0), sock_read=timeout),
+        headers={'User-Agent': USER_AGENT}
+    )
+
+
+async def check_url(session: "aiohttp.ClientSession", target: UrlTarget) -> UrlCheck:
+    """HEAD (or GET if HEAD is refused) the url, conditional on its last validators"""
+    headers = {}
+    if target.etag:
+        headers['If-None-Match'] = target.etag
+    if target.last_modified:
+        headers['If-Modified-Since'] = target.last_modified
+    started = time.perf_counter()
+    try:
+        for method in ('HEAD', 'GET'):
+            async with session.request(method, target.url, headers=headers, allow_redirects=True) as response:
+                if method == 'HEAD' and response.status in HEAD_REFUSED:
+                    continue
+                # A 304 carries no new validators; keep the ones we sent
+                return UrlCheck(
+                    url=target.url,
+                    status=classify(response.status),
+                    http_status=response.status,
+                    etag=response.headers.get('ETag') or target.etag,
+                    last_modified=response.headers.get('Last-Modified') or target.last_modified,
+                    elapsed=time.perf_counter() - started
+                )
+    except asyncio.TimeoutError:
+        error = 'timeout'
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"[:500]
+    return UrlCheck(url=target.url, status='error', etag=target.etag, last_modified=target.last_modified,
+                    error=error, elapsed=time.perf_counter() - started)
+
+
+async def check_urls(session: "aiohttp.ClientSession", targets: Iterable[UrlTarget]) -> List[UrlCheck]:
+    """Check every target concurrently; the session's connector does the throttling"""
+    return list(await asyncio.gather(*(check_url(session, target) for target in targets)))
@@ -0,0 +1,113 @@
+"""
+Per-source configuration for listing-grid marketplaces
+
+Each entry becomes a Scrapy spider (see spiders/marketplace.py), so adding a
+source that renders search results as a list of item cards is a config entry.
+Selectors are CSS, with ::text and ::attr() pseudo-elements as in Scrapy.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass(frozen=True)
+class MarketplaceConfig:
+    source: str                                  # Listing.source value
+    base_url: str                                # joined with relative links
+    search_url: str                              # template with a {query} placeholder
+    item_selector: str
+    description_prefix: str
+    title_selector: str = 'h3 a::text, .title a::text, h2 a::text'
+    url_selector: str = 'h3 a::attr(href), .title a::attr(href), h2 a::attr(href)'
+    price_selector: str = '.price::text, .cost::text, .amount::text'
+    price_pattern: str = r'[\$£€]\s*([0-9,]+\.?[0-9]*)'
+    condition_selector: str = '.condition::text, .status::text'
+    location_selector: str = '.location::text, .seller-location::text'
+    image_selector: str = 'img::attr(src)'
+    default_condition: str = 'Used - Good'
+    default_location: str = 'Unknown'
+    next_page_selector: Optional[str] = None     # pagination rule: hrefs of further result pages
+    page_param: Optional[str] = None             # pagination rule: page number query parameter
+    max_pages: Optional[int] = None              # per-source depth cap, FRONTIER_MAX_DEPTH if unset
+    id_prefix: Optional[str] = None              # defaults to the spider name
+    end_time_selector: Optional[str] = None      # auction end (date, epoch or time left), for recrawl scheduling
+    recrawl_budget: int = 20                     # recrawl requests per hour (see scheduler.py)
+
+
+AUCTION_TITLE = 'h3 a::text, .lot-title a::text, h2 a::text'
+AUCTION_URL = 'h3 a::attr(href), .lot-title a::attr(href), h2 a::attr(href)'
+AUCTION_PRICE = '.current-bid::text, .estimate::text, .price::text'
+AUCTION_LOCATION = '.location::text, .auction-location::text'
+AUCTION_END = '[data-end-time]::attr(data-end-time), .end-time::text, .time-left::text, .time-remaining::text'
+
+MARKETPLACES: Dict[str, MarketplaceConfig] = {
+    "dotmed_auctions": MarketplaceConfig(
+        source='DOTmed Auctions',
+        base_url='https://www.dotmed.com',
+        search_url='https://www.dotmed.com/search?q={query}',
+        item_selector='div.listing-item, div.product-item, .search-result-item',
+        description_prefix='DOTmed listing',
+        id_prefix='dotmed',
+        next_page_selector='a.next::attr(href), .pagination a[rel="next"]::attr(href)',
+        end_time_selector=AUCTION_END,
+        recrawl_budget=60
+    ),
+    "labx": MarketplaceConfig(
+        source='LabX',
+        base_url='https://www.labx.com',
+        search_url='https://www.labx.com/search?q={query}',
+        item_selector='div.listing-item, div.product-item, .search-result-item',
+        description_prefix='LabX listing',
+        next_page_selector='a.next::attr(href), .pagination a[rel="next"]::attr(href)'
+    ),
+    "bidspotter": MarketplaceConfig(
+        source='BidSpotter',
+        base_url='https://www.bidspotter.com',
+        search_url='https://www.bidspotter.com/en-us/search?q={query}',
+        item_selector='div.lot-item, div.auction-item, .search-result',
+        description_prefix='BidSpotter auction',
+        title_selector=AUCTION_TITLE,
+        url_selector=AUCTION_URL,
+        price_selector=AUCTION_PRICE,
+        location_selector=AUCTION_LOCATION,
+        default_condition='Used - Auction',
+        default_location='Auction Location',
+        next_page_selector='.pagination a.next::attr(href)',
+        end_time_selector=AUCTION_END,
+        recrawl_budget=60
+    ),
+    "proxibid": MarketplaceConfig(
+        source='Proxibid',
+        base_url='https://www.proxibid.com',
+        search_url='https://www.proxibid.com/search?q={query}',
+        item_selector='div.lot-item, div.auction-item, .search-result-item',
+        description_prefix='Proxibid auction',
+        title_selector=AUCTION_TITLE,
+        url_selector=AUCTION_URL,
+        price_selector=AUCTION_PRICE,
+        location_selector=AUCTION_LOCATION,
+        default_condition='Used - Auction',
+        default_location='Auction Location',
+        next_page_selector='.pagination a.next::attr(href)',
+        end_time_selector=AUCTION_END,
+        recrawl_budget=60
+    ),
+    "govdeals": MarketplaceConfig(
+        source='GovDeals',
+        base_url='https://www.govdeals.com',
+        search_url='https://www.govdeals.com/index.cfm?fa=Main.Search&searchtype=1&searchterm={query}',
+        item_selector='div.search-result-item, div.listing-item, .auction-item',
+        description_prefix='GovDeals government surplus',
+        price_selector='.current-bid::text, .starting-bid::text, .price::text',
+        location_selector='.location::text, .agency-location::text',
+        default_condition='Used - Government Surplus',
+        default_location='Government Agency',
+        next_page_selector='a.next::attr(href)',
+        end_time_selector=AUCTION_END,
+        recrawl_budget=60
+    ),
+}
+
+# Listing.source -> spider that re-checks stored listings of that source
+SOURCE_SPIDERS: Dict[str, str] = {'eBay': 'ebay_laser'}
+SOURCE_SPIDERS.update({config.source: name for name, config in MARKETPLACES.items()})
@@ -210,6 +210,7 @@ class SourceTrackingMiddleware:
         
         # Check for blocks/challenges
         if self._is_blocked(response):
+            spider.crawler.stats.inc_value('source/blocks_detected')
             spider.logger.warning(f"Block detected for {source_name}: {response.url}")
         else:
             # Count items found (this is a simplified count)
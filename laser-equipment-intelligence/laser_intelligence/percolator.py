@@ -0,0 +1,126 @@
+"""
+Saved-search percolation: match new listings against standing queries
+
+Instead of re-running every saved search over the whole table, the searches
+themselves are indexed. Each one is filed under a single anchor key that
+every matching listing must produce: its most specific model/query token,
+else its brand, else the price band of its max_price, else a catch-all
+bucket. A listing looks up the keys it produces, collects the searches
+filed there and verifies only those, so a batch costs time proportional to
+the listings and the searches they can actually hit.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple
+
+from laser_intelligence.dedup import normalize_tokens
+from laser_intelligence.items import Listing
+
+PRICE_BAND_BASE = 1000.0
+MAX_PRICE_BAND = 12
+
+
+def price_band(price: float) -> int:
+    """Logarithmic price band: 0 below PRICE_BAND_BASE, +1 for every doubling above it"""
+    if price <= PRICE_BAND_BASE:
+        return 0
+    return min(MAX_PRICE_BAND, int(math.log2(price / PRICE_BAND_BASE)) + 1)
+
+
+def _tokens(text: Optional[str]) -> FrozenSet[str]:
+    return frozenset(normalize_tokens(Listing(title=text))) if text else frozenset()
+
+
+@dataclass(frozen=True)
+class SavedSearch:
+    id: int
+    query_tokens: FrozenSet[str] = frozenset()
+    model_tokens: FrozenSet[str] = frozenset()
+    brand: Optional[str] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+    @classmethod
+    def from_mapping(cls, row: Mapping[str, Any]) -> "SavedSearch":
+        brand = (row.get('brand') or '').strip().lower() or None
+        return cls(
+            id=row['id'],
+            query_tokens=_tokens(row.get('query')),
+            model_tokens=_tokens(row.get('model')),
+            brand=brand,
+            min_price=float(row['min_price']) if row.get('min_price') is not None else None,
+            max_price=float(row['max_price']) if row.get('max_price') is not None else None
+        )
+
+    def anchor(self) -> str:
+        """The index key every matching listing is guaranteed to produce"""
+        tokens = self.model_tokens or self.query_tokens
+        if tokens:
+            # Longer tokens ('gentlemax') are far more selective than short ones ('pro')
+            return 't:' + max(sorted(tokens), key=len)
+        if self.brand:
+            return 'b:' + self.brand
+        if self.max_price is not None:
+            return f'p:{price_band(self.max_price)}'
+        return '*'
+
+    def matches(self, brand: Optional[str], tokens: Set[str], price: Optional[float]) -> bool:
+        if self.brand and self.brand != brand:
+            return False
+        if not self.model_tokens <= tokens or not self.query_tokens <= tokens:
+            return False
+        if self.min_price is not None or self.max_price is not None:
+            if not price:
+                return False
+            if self.min_price is not None and price < self.min_price:
+                return False
+            if self.max_price is not None and price > self.max_price:
+                return False
+        return True
+
+
+class Percolator:
+    """Inverted index of saved searches keyed by anchor"""
+
+    def __init__(self, searches: Iterable[SavedSearch] = ()):
+        self._index: Dict[str, List[SavedSearch]] = {}
+        self.size = 0
+        for search in searches:
+            self.add(search)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping[str, Any]]) -> "Percolator":
+        return cls(SavedSearch.from_mapping(row) for row in rows)
+
+    def add(self, search: SavedSearch) -> None:
+        self._index.setdefault(search.anchor(), []).append(search)
+        self.size += 1
+
+    def _keys(self, brand: Optional[str], tokens: Set[str], price: Optional[float]) -> List[str]:
+        keys = ['*']
+        keys.extend('t:' + token for token in tokens)
+        if brand:
+            keys.append('b:' + brand)
+        if price:
+            # A listing satisfies any max_price in its own band or above
+            keys.extend(f'p:{band}' for band in range(price_band(price), MAX_PRICE_BAND + 1))
+        return keys
+
+    def match(self, listing: Listing) -> List[int]:
+        """Ids of the saved searches this listing satisfies"""
+        brand = (listing.brand or '').strip().lower() or None
+        tokens = set(normalize_tokens(listing))
+        price = listing.price
+        matched = []
+        for key in self._keys(brand, tokens, price):
+            for search in self._index.get(key, ()):
+                if search.matches(brand, tokens, price):
+                    matched.append(search.id)
+        return matched
+
+    def percolate(self, listings: Iterable[Listing]) -> List[Tuple[int, Listing]]:
+        """(saved search id, listing) for every match in a batch, in one pass over the batch"""
+        if not self.size:
+            return []
+        return [(search_id, listing) for listing in listings for search_id in self.match(listing)]
@@ -7,7 +7,23 @@
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from laser_intelligence.demand import current_demand
+from laser_intelligence.items import Listing
+from laser_intelligence.scoring import PriceStats, score_listings
+
 
 class LaserIntelligencePipeline:
+    """Normalize every scraped item to a Listing and score it against cached market prices and demand"""
+
+    def open_spider(self, spider):
+        self.price_stats = PriceStats.load()
+        self.demand = current_demand()
+
     def process_item(self, item, spider):
+        if not isinstance(item, Listing):
+            item = Listing.from_mapping(ItemAdapter(item).asdict())
+        # Paginated spiders score each page themselves; without cached market
+        # stats the API scores the whole batch after the crawl
+        if self.price_stats and item.score_overall is None:
+            score_listings([item], self.price_stats, self.demand)
         return item
@@ -0,0 +1,229 @@
+"""
+Recrawl scheduler: when to re-check listings we already know about
+
+Every tracked listing has a next-due time and sits in a heap keyed by it, so
+finding what to crawl next is a pop rather than a table scan. Due times come
+from a freshness policy: auction lots ending within AUCTION_WINDOW are
+re-checked more often the closer they get to the end (a fixed fraction of the
+time left, floored at MIN_INTERVAL), with one last check just after the end
+to catch the hammer price; fixed-price listings back off exponentially while
+they stay unchanged. Each source may make at most its budget of requests in
+any sliding hour; targets over budget are pushed back to when the window has
+room again, so a burst of ending lots cannot hammer one auction site. Targets found by the same query
+share one request.
+"""
+
+import heapq
+import itertools
+import re
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+MINUTE = 60.0
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+AUCTION_WINDOW = 72 * HOUR           # lots ending sooner than this get end-aware rechecks
+AUCTION_CHECKS_LEFT = 6              # recheck roughly this many times over the time left
+MIN_INTERVAL = 15 * MINUTE
+AUCTION_MAX_INTERVAL = 2 * HOUR      # cap while inside the window
+AUCTION_FAR_INTERVAL = 12 * HOUR     # lots ending later than AUCTION_WINDOW
+AUCTION_FINAL_DELAY = 10 * MINUTE    # final check after the end, for the hammer price
+FIXED_BASE_INTERVAL = DAY
+FIXED_MAX_INTERVAL = 7 * DAY
+
+DEFAULT_HOURLY_BUDGET = 20
+
+_RELATIVE_RE = re.compile(r'(\d+)\s*(d|day|days|h|hr|hrs|hour|hours|m|min|mins|minute|minutes|s|sec|secs|seconds)\b', re.I)
+_RELATIVE_UNITS = {'d': DAY, 'h': HOUR, 'm': MINUTE, 's': 1.0}
+_DATE_FORMATS = ('%b %d, %Y %I:%M %p', '%B %d, %Y %I:%M %p', '%m/%d/%Y %I:%M %p', '%m/%d/%Y %H:%M', '%Y-%m-%d %H:%M')
+
+
+def parse_auction_end(text: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Auction end as a UTC timestamp from an epoch, ISO date, "Oct 21, 2025 3:00 PM" or "2d 4h 13m" left"""
+    if not text:
+        return None
+    text = text.strip()
+    if text.isdigit():
+        value = float(text)
+        return value / 1000 if value > 1e11 else value   # epoch milliseconds
+    try:
+        return _timestamp(datetime.fromisoformat(text.replace('Z', '+00:00')))
+    except ValueError:
+        pass
+    cleaned = re.sub(r'\s+(UTC|GMT|[ECMP][SD]T)$', '', text)
+    for date_format in _DATE_FORMATS:
+        try:
+            return _timestamp(datetime.strptime(cleaned, date_format))
+        except ValueError:
+            continue
+    parts = _RELATIVE_RE.findall(text)
+    if parts:
+        now = datetime.now(timezone.utc).timestamp() if now is None else now
+        return now + sum(int(amount) * _RELATIVE_UNITS[unit[0].lower()] for amount, unit in parts)
+    return None
+
+
+def _timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@dataclass
+class RecrawlTarget:
+    url: str
+    source: str                          # spider name that re-checks it
+    query: str                           # search that finds it again
+    next_due: float
+    auction_end: Optional[float] = None
+    unchanged_checks: int = 0
+    last_checked: Optional[float] = None
+    item_id: Optional[int] = None
+
+    @property
+    def is_auction(self) -> bool:
+        return self.auction_end is not None
+
+
+def next_interval(target: RecrawlTarget, now: float) -> Optional[float]:
+    """Seconds from a check made at `now` to the next one, or None once the target can retire"""
+    if target.is_auction:
+        remaining = target.auction_end - now
+        if remaining <= 0:
+            return None                   # checked after the end: the hammer price is in
+        if remaining <= MIN_INTERVAL:
+            return remaining + AUCTION_FINAL_DELAY
+        if remaining > AUCTION_WINDOW:
+            return max(MIN_INTERVAL, min(AUCTION_FAR_INTERVAL, remaining - AUCTION_WINDOW))
+        interval = min(AUCTION_MAX_INTERVAL, max(MIN_INTERVAL, remaining / AUCTION_CHECKS_LEFT))
+        # Never sleep through the end; the last check before it lands just short of it
+        return min(interval, remaining - MIN_INTERVAL / 3)
+    return min(FIXED_MAX_INTERVAL, FIXED_BASE_INTERVAL * 2 ** target.unchanged_checks)
+
+
+def new_target(url: str, source: str, query: str, now: float, auction_end: Optional[float] = None,
+               item_id: Optional[int] = None) -> Optional[RecrawlTarget]:
+    """Target for a listing just seen by a crawl, or None for a lot that has already ended"""
+    target = RecrawlTarget(url=url, source=source, query=query, next_due=now, auction_end=auction_end,
+                           last_checked=now, item_id=item_id)
+    interval = next_interval(target, now)
+    if interval is None:
+        return None
+    target.next_due = now + interval
+    return target
+
+
+class SourceBudget:
+    """Recrawl requests made for one source in the last hour, capped at per_hour"""
+
+    def __init__(self, per_hour: int, requests: Iterable[float] = ()):
+        self.per_hour = max(per_hour, 1)
+        self.requests: Deque[float] = deque(sorted(requests))
+
+    def _expire(self, now: float) -> None:
+        while self.requests and self.requests[0] <= now - HOUR:
+            self.requests.popleft()
+
+    def take(self, now: float) -> bool:
+        self._expire(now)
+        if len(self.requests) < self.per_hour:
+            self.requests.append(now)
+            return True
+        return False
+
+    def available_at(self, now: float) -> float:
+        """When the sliding hour next has room for a request"""
+        self._expire(now)
+        if len(self.requests) < self.per_hour:
+            return now
+        return self.requests[len(self.requests) - self.per_hour] + HOUR
+
+
+class RecrawlScheduler:
+    """Heap of tracked listings keyed by next-due time, drained within per-source budgets"""
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, default_budget: int = DEFAULT_HOURLY_BUDGET):
+        self.targets: Dict[str, RecrawlTarget] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = itertools.count()
+        self._budget_sizes = dict(budgets or {})
+        self._default_budget = default_budget
+        self._budgets: Dict[str, SourceBudget] = {}
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    @property
+    def budgets(self) -> Dict[str, SourceBudget]:
+        """Request logs of the sources used so far"""
+        return self._budgets
+
+    def budget(self, source: str, requests: Iterable[float] = ()) -> SourceBudget:
+        if source not in self._budgets:
+            self._budgets[source] = SourceBudget(self._budget_sizes.get(source, self._default_budget), requests)
+        return self._budgets[source]
+
+    def schedule(self, target: RecrawlTarget) -> None:
+        """Track a target (or move an already tracked one) at target.next_due"""
+        self.targets[target.url] = target
+        heapq.heappush(self._heap, (target.next_due, next(self._counter), target.url))
+
+    def remove(self, url: str) -> Optional[RecrawlTarget]:
+        # Heap entries are dropped lazily when popped
+        return self.targets.pop(url, None)
+
+    def _live(self, due: float, url: str) -> Optional[RecrawlTarget]:
+        target = self.targets.get(url)
+        return target if target is not None and target.next_due == due else None
+
+    def peek_due(self) -> Optional[float]:
+        """Earliest next-due time, or None when nothing is tracked"""
+        while self._heap and self._live(self._heap[0][0], self._heap[0][2]) is None:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float, limit: Optional[int] = None) -> Dict[str, List[RecrawlTarget]]:
+        """Targets due by now that fit their source's budget, grouped by source
+
+        A request is charged per distinct (source, query); targets whose source
+        is out of budget are rescheduled to when its window has room again.
+        """
+        due: Dict[str, List[RecrawlTarget]] = {}
+        charged = set()
+        deferred: List[RecrawlTarget] = []
+        while self._heap and self._heap[0][0] <= now and (limit is None or len(charged) < limit):
+            when, _, url = heapq.heappop(self._heap)
+            target = self._live(when, url)
+            if target is None:
+                continue
+            request = (target.source, target.query)
+            if request not in charged:
+                budget = self.budget(target.source)
+                if not budget.take(now):
+                    target.next_due = budget.available_at(now)
+                    deferred.append(target)
+                    continue
+                charged.add(request)
+            due.setdefault(target.source, []).append(target)
+        for target in deferred:
+            self.schedule(target)
+        # Popped targets stay tracked but out of the heap until complete() reschedules them
+        return due
+
+    def complete(self, target: RecrawlTarget, changed: bool, now: float,
+                 auction_end: Optional[float] = None) -> Optional[float]:
+        """Record a check and reschedule; returns the new due time, or None if the target retired"""
+        if auction_end is not None:
+            target.auction_end = auction_end
+        target.unchanged_checks = 0 if changed else target.unchanged_checks + 1
+        interval = next_interval(target, now)
+        target.last_checked = now
+        if interval is None:
+            self.remove(target.url)
+            return None
+        target.next_due = now + interval
+        self.schedule(target)
+        return target.next_due
@@ -0,0 +1,278 @@
+"""
+Vectorized deal scoring for batches of listings
+
+Implements the SPEC scoring formula for a whole batch at once:
+
+    score_margin     = clamp01(margin_pct / 0.4) * 60
+    score_urgency    = (scarcity, discount vs. market) * 25
+    score_condition  = map(condition) * 10
+    score_reputation = seller_reputation * 5
+
+Resale value comes from comparable sales (see comps.py) when the model has
+enough of them, else from per-brand/model asking-price distributions (median
+and MAD) learned from lasermatch_items history. Both are cached on disk
+between runs, so a listing gets the same score no matter which spider or
+generator produced it.
+Listings matching open buyer demand (see demand.py) get its bonus on top.
+"""
+
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from laser_intelligence.items import Listing
+
+if TYPE_CHECKING:
+    from laser_intelligence.comps import CompsIndex
+    from laser_intelligence.demand import DemandIndex
+
+TARGET_MARGIN_PCT = 0.4
+FREIGHT_ESTIMATE = 750.0
+REFURB_RATE = 0.15          # share of resale spent refurbishing a unit in condition factor 0
+SCARCITY_HALF_LIFE = 10     # sightings at which a model counts as half as scarce
+MAD_TO_SIGMA = 1.4826
+FALLBACK_SPREAD = 0.25      # relative spread used when a group has no price dispersion
+MIN_GROUP_SIZE = 3          # fewer sightings than this fall back to brand-level stats
+
+# Seller reputation is not tracked yet, so every listing gets the neutral value
+# and scores do not depend on the source
+DEFAULT_REPUTATION = 0.5
+
+WEIGHT_MARGIN = 60
+WEIGHT_URGENCY = 25
+WEIGHT_CONDITION = 10
+WEIGHT_REPUTATION = 5
+
+# Checked in order, first keyword found in the condition text wins
+CONDITION_FACTORS: Tuple[Tuple[str, float], ...] = (
+    ('like new', 0.95),
+    ('new', 1.0),
+    ('excellent', 0.9),
+    ('refurb', 0.85),
+    ('very good', 0.8),
+    ('good', 0.75),
+    ('used', 0.6),
+    ('fair', 0.5),
+    ('poor', 0.3),
+    ('as-is', 0.2),
+    ('as is', 0.2),
+    ('parts', 0.1),
+)
+DEFAULT_CONDITION_FACTOR = 0.5
+
+PRICE_STATS_CACHE = os.getenv(
+    'PRICE_STATS_CACHE',
+    os.path.join(tempfile.gettempdir(), 'laser_intelligence_price_stats.json')
+)
+PRICE_STATS_TTL = int(os.getenv('PRICE_STATS_TTL', str(6 * 3600)))
+
+_SPACE_RE = re.compile(r'\s+')
+
+
+def price_key(brand: Optional[str], model: Optional[str] = None) -> str:
+    """Normalized brand or brand|model key used by PriceStats"""
+    brand_key = _SPACE_RE.sub(' ', (brand or 'unknown').strip().lower())
+    if model is None:
+        return brand_key
+    return f"{brand_key}|{_SPACE_RE.sub(' ', (model or 'unknown').strip().lower())}"
+
+
+def condition_factor(condition: Optional[str]) -> float:
+    """Map free-text condition to a 0-1 factor"""
+    if not condition:
+        return DEFAULT_CONDITION_FACTOR
+    text = condition.lower()
+    for keyword, factor in CONDITION_FACTORS:
+        if keyword in text:
+            return factor
+    return DEFAULT_CONDITION_FACTOR
+
+
+def _group_stats(keys: np.ndarray, prices: np.ndarray) -> Dict[str, Tuple[float, float, int]]:
+    """Median, MAD and count per key, computed with one sort over the whole history"""
+    if not len(prices):
+        return {}
+    order = np.lexsort((prices, keys))
+    keys, prices = keys[order], prices[order]
+    unique_keys, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+    stats = {}
+    for key, start, count in zip(unique_keys, starts, counts):
+        group = prices[start:start + count]
+        median = float(np.median(group))
+        mad = float(np.median(np.abs(group - median)))
+        stats[str(key)] = (median, mad, int(count))
+    return stats
+
+
+class PriceStats:
+    """Per-brand/model price distributions used to estimate resale value"""
+
+    def __init__(self, models: Optional[Dict[str, Tuple[float, float, int]]] = None,
+                 brands: Optional[Dict[str, Tuple[float, float, int]]] = None,
+                 overall: Optional[Tuple[float, float, int]] = None,
+                 generated_at: Optional[float] = None):
+        self.models = models or {}
+        self.brands = brands or {}
+        self.overall = overall
+        self.generated_at = generated_at or time.time()
+
+    def __bool__(self) -> bool:
+        return self.overall is not None
+
+    @classmethod
+    def from_rows(cls, brands: Sequence[Optional[str]], models: Sequence[Optional[str]],
+                  prices: Sequence[Optional[float]]) -> "PriceStats":
+        """Learn statistics from parallel brand/model/price columns (e.g. lasermatch_items)"""
+        price_array = np.array([float(p) if p else 0.0 for p in prices], dtype=np.float64)
+        valid = price_array > 0
+        price_array = price_array[valid]
+        brand_keys = np.array([price_key(b) for b, ok in zip(brands, valid) if ok], dtype=object)
+        model_keys = np.array([price_key(b, m) for b, m, ok in zip(brands, models, valid) if ok], dtype=object)
+        if not len(price_array):
+            return cls()
+
+        overall_median = float(np.median(price_array))
+        overall = (overall_median, float(np.median(np.abs(price_array - overall_median))), int(len(price_array)))
+        return cls(
+            models=_group_stats(model_keys.astype(str), price_array),
+            brands=_group_stats(brand_keys.astype(str), price_array),
+            overall=overall
+        )
+
+    @classmethod
+    def from_listings(cls, listings: Sequence[Listing]) -> "PriceStats":
+        return cls.from_rows(
+            [listing.brand for listing in listings],
+            [listing.model for listing in listings],
+            [listing.price for listing in listings]
+        )
+
+    @classmethod
+    def load(cls, path: str = PRICE_STATS_CACHE, max_age: Optional[int] = None) -> "PriceStats":
+        """Load cached statistics; returns empty stats if missing or older than max_age seconds"""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if max_age is not None and time.time() - data.get('generated_at', 0) > max_age:
+            return cls()
+        return cls(
+            models={key: tuple(value) for key, value in data.get('models', {}).items()},
+            brands={key: tuple(value) for key, value in data.get('brands', {}).items()},
+            overall=tuple(data['overall']) if data.get('overall') else None,
+            generated_at=data.get('generated_at')
+        )
+
+    def save(self, path: str = PRICE_STATS_CACHE) -> None:
+        """Write statistics atomically so concurrent readers never see a partial file"""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({
+                'generated_at': self.generated_at,
+                'overall': self.overall,
+                'brands': self.brands,
+                'models': self.models
+            }, f)
+        os.replace(temp_path, path)
+
+    def lookup(self, brand: Optional[str], model: Optional[str]) -> Tuple[float, float, int]:
+        """(median, mad, sightings) for a brand/model, falling back to brand then overall"""
+        stats = self.models.get(price_key(brand, model))
+        if stats and stats[2] >= MIN_GROUP_SIZE:
+            return stats
+        sightings = stats[2] if stats else 0
+        fallback = self.brands.get(price_key(brand)) or self.overall or (0.0, 0.0, 0)
+        return fallback[0], fallback[1], sightings
+
+
+def score_arrays(prices: np.ndarray, resale: np.ndarray, mad: np.ndarray,
+                 sightings: np.ndarray, conditions: np.ndarray) -> Dict[str, np.ndarray]:
+    """Vectorized SPEC score components for aligned per-listing arrays"""
+    has_price = prices > 0
+    has_resale = resale > 0
+    safe_resale = np.where(has_resale, resale, 1.0)
+
+    refurb = REFURB_RATE * (1.0 - conditions) * resale
+    margin = resale - (prices + refurb + FREIGHT_ESTIMATE)
+    margin_pct = np.where(has_price & has_resale, margin / safe_resale, 0.0)
+    score_margin = np.clip(margin_pct / TARGET_MARGIN_PCT, 0.0, 1.0) * WEIGHT_MARGIN
+
+    # Robust z-score of the asking price against the model's market
+    spread = np.where(mad > 0, MAD_TO_SIGMA * mad, FALLBACK_SPREAD * safe_resale)
+    z_score = np.where(has_price & has_resale, (prices - resale) / spread, 0.0)
+    discount = np.clip(-z_score / 3.0, 0.0, 1.0)
+    scarcity = SCARCITY_HALF_LIFE / (SCARCITY_HALF_LIFE + sightings)
+    score_urgency = (0.5 * scarcity + 0.5 * discount) * WEIGHT_URGENCY
+
+    score_condition = conditions * WEIGHT_CONDITION
+    score_reputation = DEFAULT_REPUTATION * WEIGHT_REPUTATION
+
+    overall = score_margin + score_urgency + score_condition + score_reputation
+    return {
+        "score_overall": np.round(np.clip(overall, 0.0, 100.0), 1),
+        "score_margin": score_margin,
+        "score_urgency": score_urgency,
+        "margin_estimate": np.where(has_price & has_resale, np.round(margin, 2), np.nan),
+        "margin_pct": margin_pct,
+        "z_score": z_score
+    }
+
+
+def score_listings(listings: Iterable[Listing], stats: Optional[PriceStats] = None,
+                   demand: Optional["DemandIndex"] = None, comps: Optional["CompsIndex"] = None) -> List[Listing]:
+    """Score a batch of listings in place, setting score_overall, margin_estimate, est_resale and demand_boost"""
+    # comps.py and demand.py build on price_key, so they are imported here rather than at module level
+    from laser_intelligence.comps import current_comps
+    from laser_intelligence.demand import current_demand
+    listings = list(listings)
+    if not listings:
+        return listings
+    if stats is None:
+        stats = PriceStats.load()
+    if not stats:
+        # Cold start: learn the market from the batch itself
+        stats = PriceStats.from_listings(listings)
+
+    count = len(listings)
+    # Resolve stats once per distinct brand/model and condition, then gather into arrays
+    pairs = [(listing.brand, listing.model) for listing in listings]
+    group_index = {pair: i for i, pair in enumerate(dict.fromkeys(pairs))}
+    group_stats = np.array([stats.lookup(brand, model) for brand, model in group_index], dtype=np.float64)
+    groups = group_stats[np.fromiter((group_index[pair] for pair in pairs), dtype=np.intp, count=count)]
+
+    # Sold comps beat asking prices wherever the model has enough of them
+    if comps is None:
+        comps = current_comps()
+    if comps:
+        for i, listing in enumerate(listings):
+            estimate = comps.estimate_listing(listing)
+            if estimate is not None:
+                groups[i, 0], groups[i, 1] = estimate.resale, estimate.mad
+
+    factors = {condition: condition_factor(condition) for condition in {listing.condition for listing in listings}}
+    scores = score_arrays(
+        prices=np.fromiter((listing.price or 0.0 for listing in listings), dtype=np.float64, count=count),
+        resale=groups[:, 0],
+        mad=groups[:, 1],
+        sightings=groups[:, 2],
+        conditions=np.fromiter((factors[listing.condition] for listing in listings), dtype=np.float64, count=count)
+    )
+
+    rows = zip(listings, scores["score_overall"].tolist(), scores["margin_estimate"].tolist(), groups[:, 0].tolist())
+    for listing, score, margin, resale in rows:
+        listing.score_overall = score
+        listing.margin_estimate = None if margin != margin else margin
+        listing.est_resale = round(resale, 2) if resale > 0 else None
+
+    if demand is None:
+        demand = current_demand()
+    demand.apply(listings)
+    return listings
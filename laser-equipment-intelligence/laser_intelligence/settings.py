@@ -52,15 +52,16 @@ DOWNLOADER_MIDDLEWARES = {
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
-#    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+EXTENSIONS = {
+    # Only active when CRAWL_METRICS_FILE is set (the API passes it per run)
+    "laser_intelligence.extensions.CrawlMetricsExtension": 500,
+}
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "laser_intelligence.pipelines.LaserIntelligencePipeline": 300,
-#}
+ITEM_PIPELINES = {
+    "laser_intelligence.pipelines.LaserIntelligencePipeline": 300,
+}
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -85,3 +86,19 @@ DOWNLOADER_MIDDLEWARES = {
 
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
+
+# Pagination frontier budgets (see laser_intelligence/frontier.py); spiders
+# accept -a max_pages / max_items / min_score to override them per crawl
+FRONTIER_MAX_DEPTH = 5
+FRONTIER_MAX_ITEMS = 500
+FRONTIER_MIN_SCORE = 50.0
+FRONTIER_PATIENCE = 2
+FRONTIER_MAX_QUEUED = 100
+FRONTIER_CONCURRENCY = 1
+
+# Incremental crawls (see laser_intelligence/fingerprints.py): listings whose
+# canonical URL and content hash match the previous crawl are not yielded.
+# Enable per crawl with -a incremental=1; relative paths live under .scrapy/.
+# Fingerprints are recorded once upsert_listings has stored the listings.
+INCREMENTAL_CRAWL = False
+FINGERPRINT_STORE = "fingerprints.sqlite3"
@@ -2,25 +2,22 @@ import scrapy
 import re
 from urllib.parse import urlencode, quote_plus
 
+from laser_intelligence.brands import extract_brand_model
+from laser_intelligence.items import Listing
+from laser_intelligence.spiders.paginated import PaginatedSpider
 
-class EbayLaserSpider(scrapy.Spider):
+
+class EbayLaserSpider(PaginatedSpider):
     name = "ebay_laser"
     allowed_domains = ["ebay.com"]
-    
-    def __init__(self, query=None, *args, **kwargs):
-        super(EbayLaserSpider, self).__init__(*args, **kwargs)
-        self.query = query or "laser equipment medical aesthetic"
+    default_query = "laser equipment medical aesthetic"
+    page_param = "_pgn"
         
-    def start_requests(self):
+    def first_page_url(self, query):
         # Search for laser equipment on eBay
-        search_url = f"https://www.ebay.com/sch/i.html?_nkw={quote_plus(self.query)}"
-        yield scrapy.Request(
-            url=search_url,
-            callback=self.parse_search_results,
-            meta={'query': self.query}
-        )
+        return f"https://www.ebay.com/sch/i.html?_nkw={quote_plus(query)}"
     
-    def parse_search_results(self, response):
+    def parse_listings(self, response):
         """Parse eBay search results page"""
         # Debug: Print response info
         self.logger.info(f"Response URL: {response.url}")
@@ -116,83 +113,22 @@ class EbayLaserSpider(scrapy.Spider):
             image = item.css('img::attr(src)').get() or item.css('img::attr(data-src)').get()
                 
             # Extract brand and model from title using real equipment data
-            brand = "Unknown"
-            model = "Unknown"
-            if title:
-                title_lower = title.lower()
-                # Real laser brands from actual equipment data (57 brands)
-                brands = [
-                    'aerolase', 'aesthetic', 'agnes', 'allergan', 'alma', 'apyx', 'btl', 'bluecore', 'buffalo', 
-                    'candela', 'canfield', 'cocoon', 'cutera', 'cynosure', 'cytrellis', 'deka', 'dusa', 'edge', 
-                    'ellman', 'energist', 'envy', 'fotona', 'hk', 'ilooda', 'inmode', 'iridex', 'jeisys', 
-                    'laseroptek', 'lumenis', 'lutronic', 'luvo', 'merz', 'microaire', 'mixto', 'mrp', 'new', 
-                    'novoxel', 'ohmeda', 'perigee', 'pronox', 'quanta', 'quantel', 'rohrer', 'sandstone', 
-                    'sciton', 'she', 'sinclair', 'solta', 'syl', 'syneron', 'thermi', 'venus', 'wells', 
-                    'wontech', 'zimmer'
-                ]
-                
-                # Enhanced brand detection with better matching
-                for brand_name in brands:
-                    if brand_name in title_lower:
-                        brand = brand_name.title()
-                        # Try to extract model with improved regex patterns
-                        model_patterns = [
-                            rf'{brand_name}\s+([a-zA-Z0-9\s\-\.]+?)(?:\s|$|,|\.)',
-                            rf'{brand_name}:\s*([a-zA-Z0-9\s\-\.]+?)(?:\s|$|,|\.)',
-                            rf'{brand_name}\s+([a-zA-Z0-9\s\-\.]+?)(?:\s+laser|\s+system|\s+device)',
-                        ]
-                        
-                        for pattern in model_patterns:
-                            model_match = re.search(pattern, title_lower)
-                            if model_match:
-                                model = model_match.group(1).strip().title()
-                                break
-                        
-                        # Clean up model name
-                        if model and len(model) > 50:  # Prevent overly long model names
-                            model = model[:50].strip()
-                        break
-                        
-            # Calculate realistic score based on brand and price
-            score_overall = 60  # Base score
-            
-            # Brand-specific scoring (based on real equipment data)
-            premium_brands = ['aerolase', 'candela', 'cynosure', 'lumenis', 'sciton', 'cutera', 'syneron']
-            if brand.lower() in premium_brands:
-                score_overall += 15
-            
-            # Price-based scoring (realistic ranges based on actual data)
-            if price:
-                if price < 10000:  # Very good deal
-                    score_overall += 25
-                elif price < 25000:  # Good deal
-                    score_overall += 15
-                elif price < 50000:  # Fair price
-                    score_overall += 10
-                elif price > 100000:  # Expensive
-                    score_overall -= 10
-            
-            # Condition bonus
-            if 'excellent' in condition.lower() or 'new' in condition.lower():
-                score_overall += 10
-            elif 'good' in condition.lower():
-                score_overall += 5
+            brand, model = extract_brand_model(title)
             
-            yield {
-                'id': f"ebay_{hash(url)}",
-                'title': title.strip() if title else "Unknown Title",
-                'brand': brand,
-                'model': model,
-                'condition': condition,
-                'price': price,
-                'location': location,
-                'description': f"eBay listing: {title.strip() if title else 'Unknown'}",
-                'url': url,
-                'images': [image] if image else [],
-                'source': 'eBay',
-                'discovered_at': self.get_timestamp(),
-                'score_overall': min(100, max(0, score_overall))  # Clamp between 0-100
-            }
+            yield Listing(
+                id=f"ebay_{hash(url)}",
+                title=title.strip() if title else "Unknown Title",
+                brand=brand,
+                model=model,
+                condition=condition,
+                price=price,
+                location=location,
+                description=f"eBay listing: {title.strip() if title else 'Unknown'}",
+                url=url,
+                images=[image] if image else [],
+                source='eBay',
+                discovered_at=self.get_timestamp()
+            )
     
     def get_timestamp(self):
         from datetime import datetime
@@ -0,0 +1,155 @@
+import re
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+from urllib.parse import quote_plus, urljoin
+
+from lxml import etree
+from parsel.csstranslator import HTMLTranslator
+
+from laser_intelligence.brands import extract_brand_model
+from laser_intelligence.items import Listing
+from laser_intelligence.marketplaces import MARKETPLACES, MarketplaceConfig
+from laser_intelligence.scheduler import parse_auction_end
+from laser_intelligence.spiders.paginated import PaginatedSpider
+
+_translator = HTMLTranslator()
+
+
+def compile_css(css: Optional[str]) -> Optional[Callable]:
+    """Translate a CSS selector (with ::text / ::attr()) to a compiled lxml XPath"""
+    if not css:
+        return None
+    return etree.XPath(_translator.css_to_xpath(css), smart_strings=False)
+
+
+def _first(values: List) -> Optional[str]:
+    return values[0] if values else None
+
+
+def _absolute(base_url: str, link: str) -> str:
+    """Resolve a relative link, skipping urljoin for the common root-relative case"""
+    if link.startswith('http'):
+        return link
+    if link.startswith('/') and not link.startswith('//'):
+        return base_url + link
+    return urljoin(base_url, link)
+
+
+class CompiledSelectors:
+    """A config's selectors compiled once per spider class"""
+
+    def __init__(self, config: MarketplaceConfig):
+        self.items = compile_css(config.item_selector)
+        self.title = compile_css(config.title_selector)
+        self.url = compile_css(config.url_selector)
+        self.price = compile_css(config.price_selector)
+        self.condition = compile_css(config.condition_selector)
+        self.location = compile_css(config.location_selector)
+        self.image = compile_css(config.image_selector)
+        self.end_time = compile_css(config.end_time_selector)
+        self.next_page = compile_css(config.next_page_selector)
+        self.price_pattern = re.compile(config.price_pattern)
+
+
+class MarketplaceSpider(PaginatedSpider):
+    """Generic spider for sources that render search results as a list of item cards.
+
+    Subclasses only set `name` and `config`; selectors are compiled when the
+    subclass is created and every source shares the parse loop below.
+    Result pages are walked through the PaginatedSpider frontier.
+    """
+
+    config: MarketplaceConfig
+    selectors: CompiledSelectors
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if getattr(cls, 'config', None) is not None:
+            cls.selectors = CompiledSelectors(cls.config)
+            cls.allowed_domains = [re.sub(r'^https?://(www\.)?', '', cls.config.base_url)]
+            cls.default_max_pages = cls.config.max_pages
+            cls.page_param = cls.config.page_param
+
+    def first_page_url(self, query: str) -> str:
+        return self.config.search_url.format(query=quote_plus(query))
+
+    def parse_listings(self, response):
+        """Parse the item cards of one search results page"""
+        config = self.config
+        selectors = self.selectors
+        root = response.selector.root
+        now = datetime.now()
+        discovered_at = now.isoformat()
+        id_prefix = config.id_prefix or self.name
+
+        for node in selectors.items(root):
+            title = _first(selectors.title(node))
+            if not title:
+                continue
+
+            price = None
+            price_text = _first(selectors.price(node))
+            if price_text:
+                price_match = selectors.price_pattern.search(price_text)
+                if price_match:
+                    price = float(price_match.group(1).replace(',', ''))
+
+            url = _first(selectors.url(node))
+            if not url:
+                continue
+            url = _absolute(config.base_url, url)
+
+            condition = _first(selectors.condition(node))
+            condition = condition.strip() if condition else config.default_condition
+
+            location = _first(selectors.location(node))
+            location = location.strip() if location else config.default_location
+
+            image = _first(selectors.image(node))
+            if image:
+                image = _absolute(config.base_url, image)
+
+            auction_end = None
+            if selectors.end_time is not None:
+                end = parse_auction_end(_first(selectors.end_time(node)), now.timestamp())
+                if end is not None:
+                    auction_end = datetime.fromtimestamp(end, timezone.utc).isoformat()
+
+            title = title.strip()
+            brand, model = extract_brand_model(title)
+
+            yield Listing(
+                id=f"{id_prefix}_{hash(url)}",
+                title=title,
+                brand=brand,
+                model=model,
+                condition=condition,
+                price=price,
+                location=location,
+                description=f"{config.description_prefix}: {title}",
+                url=url,
+                images=[image] if image else [],
+                source=config.source,
+                discovered_at=discovered_at,
+                auction_end=auction_end
+            )
+
+    def next_page_urls(self, response) -> List[str]:
+        urls = super().next_page_urls(response)
+        if self.selectors.next_page is not None:
+            urls.extend(self.selectors.next_page(response.selector.root))
+        return urls
+
+
+def _class_name(spider_name: str) -> str:
+    return ''.join(part.title() for part in spider_name.split('_')) + 'Spider'
+
+
+# One spider class per configured marketplace, e.g. DotmedAuctionsSpider
+for _name, _config in MARKETPLACES.items():
+    globals()[_class_name(_name)] = type(_class_name(_name), (MarketplaceSpider,), {
+        'name': _name,
+        'config': _config,
+        '__module__': __name__,
+        '__doc__': f"{_config.source} search results spider"
+    })
@@ -0,0 +1,183 @@
+import json
+from typing import Dict, Iterable, List, Optional
+
+import scrapy
+from scrapy import signals
+from scrapy.utils.project import data_path
+from w3lib.url import add_or_replace_parameter
+
+from laser_intelligence.fingerprints import FingerprintStore, STATUS_UNCHANGED
+from laser_intelligence.frontier import CrawlFrontier
+from laser_intelligence.items import Listing
+from laser_intelligence.scoring import PriceStats, score_listings
+
+
+class PaginatedSpider(scrapy.Spider):
+    """Base for search spiders that walk result pages through a CrawlFrontier.
+
+    Subclasses implement first_page_url(), parse_listings() and optionally
+    next_page_urls(). Budgets come from spider arguments (-a max_pages=10
+    -a max_items=200 -a min_score=50) or the FRONTIER_* settings.
+
+    -a queries='["aerolase", "agnes"]' runs several searches in one crawl:
+    each query gets its own frontier and budget, while requests share the
+    process's connection pool, cache and per-domain download slots. Listings
+    are tagged with the query that found them.
+
+    With -a incremental=1 (or INCREMENTAL_CRAWL) listings unchanged since the
+    last crawl are dropped here, before any detail fetch or pipeline work;
+    subclasses that follow cards to detail pages should pass the card-level
+    listings through filter_unchanged() first.
+    """
+
+    default_query = "laser equipment"
+    default_max_pages: Optional[int] = None
+    page_param: Optional[str] = None   # query parameter holding the page number, if the site has one
+
+    def __init__(self, query=None, queries=None, max_pages=None, max_items=None, min_score=None,
+                 incremental=None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if isinstance(queries, str):
+            queries = json.loads(queries)
+        self.queries: List[str] = list(dict.fromkeys(queries or [query or self.default_query]))
+        self.query = self.queries[0]
+        self.budget = {
+            'max_pages': int(max_pages) if max_pages else None,
+            'max_items': int(max_items) if max_items else None,
+            'min_score': float(min_score) if min_score not in (None, '') else None,
+        }
+        self.price_stats = PriceStats.load()
+        self.frontiers: Dict[str, CrawlFrontier] = {q: self.build_frontier(None) for q in self.queries}
+        self.incremental = incremental
+        self.fingerprints: Optional[FingerprintStore] = None
+        self._in_flight = dict.fromkeys(self.queries, 0)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.frontiers = {q: spider.build_frontier(crawler.settings) for q in spider.queries}
+        if spider.incremental is None:
+            spider.incremental = crawler.settings.getbool('INCREMENTAL_CRAWL', False)
+        else:
+            spider.incremental = str(spider.incremental).lower() in ('1', 'true', 'yes')
+        if spider.incremental:
+            spider.fingerprints = FingerprintStore(data_path(crawler.settings.get('FINGERPRINT_STORE')))
+        crawler.signals.connect(spider.record_frontier_stats, signal=signals.spider_closed)
+        return spider
+
+    def build_frontier(self, settings) -> CrawlFrontier:
+        get_int = settings.getint if settings is not None else (lambda name, default: default)
+        get_float = settings.getfloat if settings is not None else (lambda name, default: default)
+
+        max_depth = self.budget['max_pages'] or self.default_max_pages or get_int('FRONTIER_MAX_DEPTH', 5)
+        min_score = self.budget['min_score']
+        if min_score is None:
+            min_score = get_float('FRONTIER_MIN_SCORE', 50.0)
+        return CrawlFrontier(
+            max_depth=max_depth,
+            max_items=self.budget['max_items'] or get_int('FRONTIER_MAX_ITEMS', 500),
+            # Scores are only comparable across pages when market stats are cached
+            min_score=min_score if self.price_stats else None,
+            patience=get_int('FRONTIER_PATIENCE', 2),
+            max_queued=get_int('FRONTIER_MAX_QUEUED', 100)
+        )
+
+    @property
+    def frontier(self) -> CrawlFrontier:
+        """Frontier of the first (for single-query crawls, the only) query"""
+        return self.frontiers[self.query]
+
+    def first_page_url(self, query: str) -> str:
+        raise NotImplementedError
+
+    def parse_listings(self, response) -> Iterable[Listing]:
+        raise NotImplementedError
+
+    def next_page_urls(self, response) -> List[str]:
+        """Links to further result pages; defaults to bumping page_param"""
+        if not self.page_param:
+            return []
+        return [add_or_replace_parameter(response.url, self.page_param, str(response.meta.get('page', 1) + 1))]
+
+    async def start(self):
+        # Scrapy >= 2.13 entry point; older versions call start_requests()
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        for query in self.queries:
+            self.frontiers[query].push(self.first_page_url(query), depth=1)
+            yield from self.next_page_requests(query)
+
+    def next_page_requests(self, query: str):
+        concurrency = self.settings.getint('FRONTIER_CONCURRENCY', 1) if hasattr(self, 'crawler') else 1
+        frontier = self.frontiers[query]
+        while self._in_flight[query] < concurrency:
+            entry = frontier.pop()
+            if entry is None:
+                return
+            url, depth = entry
+            self._in_flight[query] += 1
+            yield scrapy.Request(
+                url=url,
+                callback=self.parse_search_results,
+                errback=self.page_failed,
+                meta={'query': query, 'page': depth}
+            )
+
+    def parse_search_results(self, response):
+        """Parse one result page, score its listings and queue the pages it links to"""
+        query = response.meta.get('query', self.query)
+        frontier = self.frontiers[query]
+        self._in_flight[query] = max(0, self._in_flight[query] - 1)
+        depth = response.meta.get('page', 1)
+
+        listings = list(self.parse_listings(response))[:frontier.remaining_items]
+        for listing in listings:
+            listing.query = query
+        if listings and self.price_stats:
+            score_listings(listings, self.price_stats)
+        priority = frontier.record_page([listing.score_overall for listing in listings])
+        yield from self.filter_unchanged(listings)
+
+        for url in self.next_page_urls(response):
+            frontier.push(response.urljoin(url), depth + 1, priority)
+        yield from self.next_page_requests(query)
+
+    def filter_unchanged(self, listings: List[Listing]) -> List[Listing]:
+        """Drop listings seen unchanged by an earlier crawl; flag the rest as new or changed"""
+        if self.fingerprints is None:
+            return listings
+        fresh = []
+        for listing in listings:
+            if not listing.url:
+                fresh.append(listing)
+                continue
+            status, delta = self.fingerprints.classify(listing)
+            self.crawler.stats.inc_value(f'incremental/{status}')
+            if status == STATUS_UNCHANGED:
+                continue
+            listing.change, listing.delta = status, delta
+            fresh.append(listing)
+        return fresh
+
+    def page_failed(self, failure):
+        query = failure.request.meta.get('query', self.query)
+        self._in_flight[query] = max(0, self._in_flight[query] - 1)
+        self.logger.warning(f"Result page failed: {failure.request.url} ({failure.value!r})")
+        self.frontiers[query].record_page([])
+        yield from self.next_page_requests(query)
+
+    def record_frontier_stats(self, spider):
+        pages = sum(frontier.stats.pages_crawled for frontier in self.frontiers.values())
+        items = sum(frontier.stats.items_accepted for frontier in self.frontiers.values())
+        self.crawler.stats.set_value('frontier/pages_crawled', pages)
+        self.crawler.stats.set_value('frontier/items_accepted', items)
+        self.crawler.stats.set_value('frontier/queries', len(self.frontiers))
+        if len(self.frontiers) == 1:
+            self.crawler.stats.set_value('frontier/stop_reason', self.frontier.stats.stop_reason or 'exhausted')
+        self.logger.info(f"Frontier done: {len(self.frontiers)} queries, {pages} pages, {items} items")
+        for query, frontier in self.frontiers.items():
+            self.logger.debug(f"  {query!r}: stop reason {frontier.stats.stop_reason or 'exhausted'}")
+        if self.fingerprints is not None:
+            self.fingerprints.close()
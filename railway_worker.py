@@ -2,20 +2,44 @@
 """
 Railway Worker for LaserMatch Data Updates
 This script runs periodically to scrape and update LaserMatch data
+
+By default it runs one update, recrawl and cleanup pass and exits. With
+--daemon it stays up as the crawl service: periodic jobs per source share
+one connection pool, chunked crawls checkpoint their progress so a redeploy
+resumes mid-crawl, SIGTERM lets running jobs finish their current chunk, and
+/health and /metrics are served on $PORT.
 """
 
+import argparse
 import asyncio
+import json
 import os
+import signal
+import socket
 import sys
 import logging
+import time
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 import asyncpg
 
 # Add the api directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from api.models.database import get_db_connection, init_db
-from api.routers.lasermatch import scrape_lasermatch_data
+from api.models.checkpoints import load_checkpoint, save_checkpoint, clear_checkpoint
+from api.models.crawl_queue import CrawlJob, CrawlQueue, DEFAULT_LEASE, get_crawl_queue
+from api.models.generations import start_generation, finish_generation, finish_queued_generation
+from api.models.database import get_db_connection, init_db, close_pool
+from api.models.stats import refresh_stats
+from api.models.price_stats import refresh_price_stats
+from api.models.price_history import maintain_price_history
+from api.models.listings import upsert_listings
+from api.models.recrawl import run_due_recrawls
+from api.utils.metrics import REGISTRY
+from laser_intelligence.items import Listing
+from laser_intelligence.marketplaces import SOURCE_SPIDERS
+from api.routers.lasermatch import load_lasermatch_file
 
 # Configure logging
 logging.basicConfig(
@@ -24,14 +48,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+SPIDER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "laser-equipment-intelligence")
+
+# Daemon job intervals in seconds
+LASERMATCH_INTERVAL = int(os.getenv("WORKER_LASERMATCH_INTERVAL", "3600"))
+RECRAWL_INTERVAL = int(os.getenv("WORKER_RECRAWL_INTERVAL", "300"))
+DISCOVERY_INTERVAL = int(os.getenv("WORKER_DISCOVERY_INTERVAL", "21600"))
+ROLLUP_INTERVAL = int(os.getenv("WORKER_ROLLUP_INTERVAL", "900"))
+CLEANUP_INTERVAL = int(os.getenv("WORKER_CLEANUP_INTERVAL", "86400"))
+LIVENESS_INTERVAL = int(os.getenv("WORKER_LIVENESS_INTERVAL", "600"))
+# Spider processes (and pooled connections) in use at once
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+# Standing queries per discovery crawl; progress is checkpointed after each
+DISCOVERY_CHUNK = 10
+SHUTDOWN_GRACE = float(os.getenv("WORKER_SHUTDOWN_GRACE", "60"))
+# Seconds an idle queue consumer waits before polling for jobs again
+QUEUE_POLL_INTERVAL = float(os.getenv("WORKER_QUEUE_POLL_INTERVAL", "5"))
+
+# Crawl generations are scoped by Listing.source, discovery jobs by spider
+SPIDER_SOURCES = {spider: source for source, spider in SOURCE_SPIDERS.items()}
+
+WORKER_JOB_RUNS = REGISTRY.counter("worker_job_runs_total", "Worker job runs", ("job", "outcome"))
+WORKER_JOB_DURATION = REGISTRY.histogram("worker_job_duration_seconds", "Worker job wall time", ("job",))
+WORKER_URL_CHECKS = REGISTRY.counter("worker_url_checks_total", "Listing url liveness checks", ("status",))
+WORKER_QUEUE_JOBS = REGISTRY.counter("worker_queue_jobs_total", "Queued crawl jobs run by this worker", ("source", "outcome"))
+
 async def update_lasermatch_data():
     """Update LaserMatch data from the scraper"""
     try:
         logger.info("🚀 Starting LaserMatch data update...")
         
-        # Initialize database
-        await init_db()
-        
         # Get database connection
         conn = await get_db_connection()
         if not conn:
@@ -42,85 +88,37 @@ async def update_lasermatch_data():
         current_count = await conn.fetchval("SELECT COUNT(*) FROM lasermatch_items")
         logger.info(f"📊 Current items in database: {current_count}")
         
-        # Run the scraper
-        logger.info("🕷️ Running LaserMatch scraper...")
-        scraped_data = await scrape_lasermatch_data()
+        # Load the newest scraper output
+        logger.info("🕷️ Loading LaserMatch scraper output...")
+        listings = load_lasermatch_file(prefer_api_data=False)
         
-        if not scraped_data or not scraped_data.get('items'):
+        if not listings:
             logger.warning("⚠️ No data returned from scraper")
             await conn.close()
             return False
         
-        items = scraped_data['items']
-        logger.info(f"📥 Scraped {len(items)} items from LaserMatch")
+        logger.info(f"📥 Scraped {len(listings)} items from LaserMatch")
         
-        # Update database with new data
-        updated_count = 0
-        new_count = 0
+        # Update database with new data in one batched upsert keyed by url
+        for listing in listings:
+            listing.source = listing.source or 'LaserMatch.io'
+            listing.category = listing.category or 'Laser System'
+            listing.availability = listing.availability or 'Available'
         
-        for item in items:
-            try:
-                # Check if item already exists
-                existing = await conn.fetchrow(
-                    "SELECT id FROM lasermatch_items WHERE url = $1",
-                    item.get('url', '')
-                )
-                
-                if existing:
-                    # Update existing item
-                    await conn.execute("""
-                        UPDATE lasermatch_items SET
-                            title = $1,
-                            brand = $2,
-                            model = $3,
-                            condition = $4,
-                            price = $5,
-                            location = $6,
-                            description = $7,
-                            last_updated = NOW()
-                        WHERE url = $8
-                    """, 
-                    item.get('title', ''),
-                    item.get('brand', ''),
-                    item.get('model', ''),
-                    item.get('condition', ''),
-                    item.get('price', 0),
-                    item.get('location', ''),
-                    item.get('description', ''),
-                    item.get('url', '')
-                    )
-                    updated_count += 1
-                else:
-                    # Insert new item
-                    await conn.execute("""
-                        INSERT INTO lasermatch_items (
-                            title, brand, model, condition, price, location, 
-                            description, url, images, source, status, category, availability
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
-                    """,
-                    item.get('title', ''),
-                    item.get('brand', ''),
-                    item.get('model', ''),
-                    item.get('condition', ''),
-                    item.get('price', 0),
-                    item.get('location', ''),
-                    item.get('description', ''),
-                    item.get('url', ''),
-                    item.get('images', []),
-                    item.get('source', 'LaserMatch.io'),
-                    item.get('status', 'active'),
-                    item.get('category', 'Laser System'),
-                    item.get('availability', 'Available')
-                    )
-                    new_count += 1
-                    
-            except Exception as e:
-                logger.error(f"❌ Error processing item {item.get('title', 'Unknown')}: {e}")
-                continue
+        # Rows whose content hash is unchanged are skipped, not rewritten, but still stamped as seen
+        generation = await start_generation(conn, 'LaserMatch.io')
+        written = await upsert_listings(conn, listings, generation=generation)
+        new_count = await conn.fetchval("SELECT COUNT(*) FROM lasermatch_items") - current_count
+        updated_count = max(0, written - new_count)
+        skipped_count = len(listings) - written
+        stale_count = await finish_generation(conn, generation)
         
+        # Refresh dashboard rollups and scoring price stats once for the whole batch
+        await refresh_stats(conn)
+        await refresh_price_stats(conn)
         await conn.close()
         
-        logger.info(f"✅ Update complete: {new_count} new items, {updated_count} updated items")
+        logger.info(f"✅ Update complete: {new_count} new items, {updated_count} updated items, {skipped_count} unchanged or merged, {stale_count} marked stale")
         return True
         
     except Exception as e:
@@ -137,32 +135,521 @@ async def cleanup_old_data():
             logger.error("❌ Failed to connect to database")
             return False
         
-        # Remove items older than 30 days that are inactive
-        result = await conn.execute("""
-            DELETE FROM lasermatch_items 
-            WHERE status = 'inactive' 
-            AND last_updated < NOW() - INTERVAL '30 days'
-        """)
-        
-        deleted_count = int(result.split()[-1])
-        logger.info(f"🗑️ Cleaned up {deleted_count} old inactive items")
-        
-        await conn.close()
+        try:
+            # Price history retention drops whole months instead of deleting rows
+            expired = await maintain_price_history(conn)
+            
+            # Remove inactive or swept-stale items no crawl has seen for 30 days
+            # (last_updated only moves when the content changes)
+            # (their price history is not cascaded; it ages out with its partitions)
+            result = await conn.execute("""
+                DELETE FROM lasermatch_items 
+                WHERE status IN ('inactive', 'stale') 
+                AND COALESCE(last_seen_at, last_updated) < NOW() - INTERVAL '30 days'
+            """)
+            
+            deleted_count = int(result.split()[-1])
+            logger.info(f"🗑️ Cleaned up {deleted_count} old inactive or stale items, {len(expired)} price history months")
+            
+            if deleted_count:
+                await refresh_stats(conn)
+        finally:
+            await conn.close()
         return True
         
     except Exception as e:
         logger.error(f"❌ Cleanup failed: {e}")
         return False
 
+async def crawl_queries(spider: str, queries: List[str], budget: Optional[Dict[str, Any]] = None,
+                        raise_errors: bool = False) -> List[Listing]:
+    """One crawl of a source over a batch of queries (by default the live-page recrawl budget)"""
+    from api.routers.spiders import RECRAWL_CRAWL_BUDGET, run_single_scrapy_spider
+    budget = dict(budget or RECRAWL_CRAWL_BUDGET)
+    budget["timeout"] = min(budget["max_timeout"], budget["timeout"] + budget["timeout_per_query"] * len(queries))
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, run_single_scrapy_spider, SPIDER_DIR,
+        {"name": spider, "queries": queries, "budget": budget, "raise_errors": raise_errors}
+    )
+
+async def recrawl_due_listings(spiders: Optional[List[str]] = None):
+    """Re-check tracked listings that are due (ending auctions first) within per-source budgets"""
+    try:
+        logger.info("⏰ Checking recrawl schedule...")
+        
+        conn = await get_db_connection()
+        if not conn:
+            logger.error("❌ Failed to connect to database")
+            return False
+        
+        try:
+            stats = await run_due_recrawls(conn, crawl_queries, spiders=spiders)
+        finally:
+            await conn.close()
+        
+        logger.info(
+            f"✅ Recrawl complete: {stats['due']} due, {stats['requests']} requests, "
+            f"{stats['changed']} changed, {stats['missing']} not found, {stats['retired']} retired"
+        )
+        return stats
+        
+    except Exception as e:
+        logger.error(f"❌ Recrawl failed: {e}")
+        return False
+
+async def check_url_liveness(stopping: Optional[asyncio.Event] = None,
+                             on_written: Optional[Callable[[], None]] = None):
+    """Check every listing url that is due in leased batches, until none is left"""
+    from api.models.url_checks import check_due_urls, register_listing_urls
+    from laser_intelligence.liveness import open_session
+    owner = f"{socket.gethostname()}:{os.getpid()}:liveness"
+    try:
+        conn = await get_db_connection()
+        if not conn:
+            logger.error("❌ Failed to connect to database")
+            return False
+        try:
+            registered = await register_listing_urls(conn)
+        finally:
+            await conn.close()
+        
+        totals = {"registered": registered, "checked": 0, "live": 0, "dead": 0, "error": 0}
+        started = time.monotonic()
+        async with open_session() as session:
+            while stopping is None or not stopping.is_set():
+                stats = await check_due_urls(session, owner)
+                if stats is None:
+                    break
+                for status in ("live", "dead", "error"):
+                    WORKER_URL_CHECKS.inc(stats[status], status=status)
+                totals = {key: totals[key] + stats.get(key, 0) for key in totals}
+        if totals["dead"] and on_written is not None:
+            on_written()
+        
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"✅ Checked {totals['checked']} urls in {elapsed:.0f}s: {totals['live']} live, "
+            f"{totals['dead']} dead, {totals['error']} errors ({registered} newly tracked)"
+        )
+        return totals
+        
+    except Exception as e:
+        logger.error(f"❌ URL liveness check failed: {e}")
+        return False
+
+async def standing_queries(conn) -> List[str]:
+    """Searches the daemon keeps running: active saved searches' queries and brand/model"""
+    rows = await conn.fetch("""
+        SELECT DISTINCT COALESCE(NULLIF(TRIM(query), ''), TRIM(CONCAT_WS(' ', brand, model))) AS query
+        FROM saved_searches
+        WHERE active AND (query IS NOT NULL OR brand IS NOT NULL)
+    """)
+    return sorted(row['query'] for row in rows if row['query'])
+
+async def discover_listings(spider: str, stopping: Optional[asyncio.Event] = None):
+    """Run the standing queries through one source in checkpointed chunks"""
+    from api.routers.spiders import BATCH_CRAWL_BUDGET
+    job = f"discover:{spider}"
+    try:
+        conn = await get_db_connection()
+        if not conn:
+            logger.error("❌ Failed to connect to database")
+            return False
+        try:
+            checkpoint = await load_checkpoint(conn, job)
+            if checkpoint:
+                queries, done = checkpoint["queries"], checkpoint["done"]
+                generation = checkpoint.get("generation")
+                logger.info(f"↩️ Resuming {job} at query {done}/{len(queries)}")
+            else:
+                queries, done, generation = await standing_queries(conn), 0, None
+                # One full pass over the standing queries is one crawl generation of the source
+                if queries:
+                    generation = await start_generation(conn, SPIDER_SOURCES.get(spider, spider))
+        finally:
+            await conn.close()
+        
+        written = 0
+        while done < len(queries):
+            if stopping is not None and stopping.is_set():
+                logger.info(f"⏸️ {job} stopped at query {done}/{len(queries)}; will resume")
+                return {"written": written, "done": done, "total": len(queries)}
+            chunk = queries[done:done + DISCOVERY_CHUNK]
+            try:
+                listings = await crawl_queries(spider, chunk, BATCH_CRAWL_BUDGET, raise_errors=True)
+            except Exception:
+                # A pass with a failed chunk did not see the whole source, so it must never sweep;
+                # the run resumes at this chunk without a generation
+                if generation is not None:
+                    generation = None
+                    conn = await get_db_connection()
+                    if conn:
+                        try:
+                            await save_checkpoint(conn, job, {"queries": queries, "done": done, "generation": None})
+                        finally:
+                            await conn.close()
+                raise
+            conn = await get_db_connection()
+            if not conn:
+                logger.error("❌ Failed to connect to database")
+                return False
+            try:
+                written += await upsert_listings(conn, listings, generation=generation)
+                done += len(chunk)
+                await save_checkpoint(conn, job, {"queries": queries, "done": done, "generation": generation})
+            finally:
+                await conn.close()
+        
+        conn = await get_db_connection()
+        if conn:
+            try:
+                if generation is not None:
+                    await finish_generation(conn, generation)
+                await clear_checkpoint(conn, job)
+            finally:
+                await conn.close()
+        logger.info(f"✅ {job}: {len(queries)} queries, {written} listings written")
+        return {"written": written, "done": done, "total": len(queries)}
+        
+    except Exception as e:
+        logger.error(f"❌ {job} failed: {e}")
+        return False
+
+async def enqueue_discovery(queue: CrawlQueue, spider: str):
+    """Queue the standing queries for one source as chunked crawl jobs any worker can claim"""
+    from api.routers.spiders import BATCH_CRAWL_BUDGET
+    try:
+        conn = await get_db_connection()
+        if not conn:
+            logger.error("❌ Failed to connect to database")
+            return False
+        try:
+            # A pass still pending from an earlier run (or another node) is left to finish first
+            pending = (await queue.stats()).get(spider, {})
+            if pending.get("queued", 0) or pending.get("running", 0):
+                logger.info(f"📬 discover:{spider}: previous pass still queued or running")
+                return {"queued": 0, "jobs": 0}
+            queries = await standing_queries(conn)
+            # The pass is a crawl generation once every chunk is done; only the Postgres queue can tell
+            generation = None
+            if queries and queue.name == "postgres":
+                generation = await start_generation(conn, SPIDER_SOURCES.get(spider, spider))
+        finally:
+            await conn.close()
+        jobs = [
+            CrawlJob(spider=spider, queries=queries[start:start + DISCOVERY_CHUNK], budget=BATCH_CRAWL_BUDGET,
+                     generation=generation)
+            for start in range(0, len(queries), DISCOVERY_CHUNK)
+        ]
+        added = await queue.enqueue(jobs)
+        logger.info(f"📬 discover:{spider}: queued {added} of {len(jobs)} crawl jobs")
+        return {"queued": added, "jobs": len(jobs)}
+    except Exception as e:
+        logger.error(f"❌ discover:{spider} enqueue failed: {e}")
+        return False
+
+async def run_queue_consumer(queue: CrawlQueue, owner: str, slots: asyncio.Semaphore, stopping: asyncio.Event,
+                             on_written: Optional[Callable[[], None]] = None):
+    """Claim and run queued crawl jobs until the worker stops"""
+    while not stopping.is_set():
+        try:
+            job = await queue.claim(owner)
+        except Exception as e:
+            logger.error(f"❌ Crawl queue claim failed: {e}")
+            job = None
+        if job is None:
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=QUEUE_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        
+        heartbeat = asyncio.create_task(_keep_lease(queue, job))
+        try:
+            async with slots:
+                listings = await crawl_queries(job.spider, job.queries, job.budget or None, raise_errors=True)
+            # upsert_listings is keyed by url and content hash, and runs only while the lease is held
+            completed = await queue.complete(
+                job, lambda conn: upsert_listings(conn, listings, generation=job.generation)
+            )
+            WORKER_QUEUE_JOBS.inc(source=job.spider, outcome="done" if completed else "lease_lost")
+            if not completed:
+                logger.warning(f"⚠️ Lost the lease on crawl job {job.id}; results discarded")
+                continue
+            if job.generation is not None:
+                await _finish_queued_pass(job.generation)
+            if on_written is not None:
+                on_written()
+        except Exception as e:
+            WORKER_QUEUE_JOBS.inc(source=job.spider, outcome="failed")
+            logger.error(f"❌ Crawl job {job.id} ({job.spider}) failed: {e}")
+            try:
+                await queue.fail(job, str(e))
+            except Exception as release_error:
+                logger.error(f"❌ Could not release crawl job {job.id}: {release_error}")
+        finally:
+            heartbeat.cancel()
+
+async def _finish_queued_pass(generation: int):
+    """Close a queued discovery pass (and sweep its source) once its last job is done"""
+    try:
+        conn = await get_db_connection()
+        if not conn:
+            return
+        try:
+            await finish_queued_generation(conn, generation)
+        finally:
+            await conn.close()
+    except Exception as e:
+        logger.error(f"❌ Could not finish crawl generation {generation}: {e}")
+
+async def _keep_lease(queue: CrawlQueue, job: CrawlJob):
+    delay = DEFAULT_LEASE / 3
+    while True:
+        await asyncio.sleep(delay)
+        try:
+            if not await queue.extend(job):
+                return
+            delay = DEFAULT_LEASE / 3
+        except Exception as e:
+            # A database blip must not end the heartbeat; retry well before the lease runs out
+            logger.warning(f"⚠️ Could not extend the lease on crawl job {job.id}, retrying: {e}")
+            delay = min(30.0, DEFAULT_LEASE / 10)
+
+async def refresh_rollups():
+    """Refresh dashboard rollups and scoring price stats after daemon writes"""
+    try:
+        conn = await get_db_connection()
+        if not conn:
+            logger.error("❌ Failed to connect to database")
+            return False
+        try:
+            await refresh_stats(conn)
+            await refresh_price_stats(conn)
+        finally:
+            await conn.close()
+        return True
+    except Exception as e:
+        logger.error(f"❌ Rollup refresh failed: {e}")
+        return False
+
+@dataclass
+class WorkerJob:
+    name: str
+    interval: float
+    run: Callable[[], Awaitable[Any]]
+    crawls: bool = True            # holds a spider slot (WORKER_CONCURRENCY) while running
+    writes: bool = True            # successful runs leave the rollups to refresh
+    next_run: float = 0.0
+    running: bool = False
+    runs: int = 0
+    failures: int = 0
+    last_success: Optional[float] = None
+    last_error: Optional[str] = None
+    last_result: Any = None
+
+class CrawlDaemon:
+    """Runs worker jobs on their intervals until SIGTERM"""
+    
+    def __init__(self, jobs: Optional[List[WorkerJob]] = None, concurrency: int = WORKER_CONCURRENCY,
+                 queue: Optional[CrawlQueue] = None):
+        self.jobs = list(jobs or [])
+        self.queue = queue
+        self.concurrency = concurrency
+        self.stopping = asyncio.Event()
+        self.started = time.time()
+        self.slots = asyncio.Semaphore(concurrency)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._consumers: List[asyncio.Task] = []
+        self._rollups_due = False
+    
+    def stop(self):
+        if not self.stopping.is_set():
+            logger.info("🛑 Shutdown requested; finishing running jobs...")
+            self.stopping.set()
+    
+    async def _run_job(self, job: WorkerJob):
+        started = time.monotonic()
+        try:
+            if job.crawls:
+                async with self.slots:
+                    if self.stopping.is_set():
+                        return
+                    result = await job.run()
+            else:
+                result = await job.run()
+            job.runs += 1
+            if result is False:
+                job.failures += 1
+                job.last_error = "job reported failure"
+                WORKER_JOB_RUNS.inc(job=job.name, outcome="failure")
+            else:
+                job.last_success, job.last_error, job.last_result = time.time(), None, result
+                self._rollups_due = self._rollups_due or job.writes
+                WORKER_JOB_RUNS.inc(job=job.name, outcome="success")
+        except Exception as e:
+            job.runs += 1
+            job.failures += 1
+            job.last_error = str(e)
+            WORKER_JOB_RUNS.inc(job=job.name, outcome="failure")
+            logger.error(f"❌ Job {job.name} failed: {e}")
+        finally:
+            WORKER_JOB_DURATION.observe(time.monotonic() - started, job=job.name)
+            job.running = False
+            job.next_run = time.monotonic() + job.interval
+            self._tasks.pop(job.name, None)
+    
+    def mark_written(self):
+        self._rollups_due = True
+    
+    async def refresh_rollups_if_written(self):
+        """Rollup job body: skipped when nothing was written since the last refresh"""
+        if not self._rollups_due:
+            return None
+        self._rollups_due = False
+        return await refresh_rollups()
+    
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self.stop)
+        if self.queue is not None:
+            owner = f"{socket.gethostname()}:{os.getpid()}"
+            self._consumers = [
+                asyncio.create_task(run_queue_consumer(self.queue, f"{owner}:{n}", self.slots, self.stopping, self.mark_written))
+                for n in range(self.concurrency)
+            ]
+        
+        while not self.stopping.is_set():
+            now = time.monotonic()
+            for job in self.jobs:
+                if not job.running and job.next_run <= now:
+                    job.running = True
+                    self._tasks[job.name] = asyncio.create_task(self._run_job(job))
+            idle = [job.next_run for job in self.jobs if not job.running]
+            wake = max(1.0, min(idle) - now) if idle else 60.0
+            try:
+                await asyncio.wait_for(self.stopping.wait(), timeout=wake)
+            except asyncio.TimeoutError:
+                pass
+        
+        # Chunked jobs and queue consumers see the stop flag; give them a grace period
+        # (a cancelled queued crawl is retried elsewhere once its lease expires)
+        tasks = list(self._tasks.values()) + self._consumers
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=SHUTDOWN_GRACE)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning(f"⚠️ Cancelled {len(pending)} jobs still running after {SHUTDOWN_GRACE:.0f}s")
+        logger.info("👋 Worker daemon stopped")
+    
+    def health(self) -> Dict[str, Any]:
+        failing = [job.name for job in self.jobs if job.last_error]
+        return {
+            "status": "stopping" if self.stopping.is_set() else ("degraded" if failing else "healthy"),
+            "service": "laser-intelligence-worker",
+            "uptime_seconds": round(time.time() - self.started),
+            "failing_jobs": failing,
+            "crawl_queue": self.queue.name if self.queue is not None else None,
+            "jobs": {
+                job.name: {
+                    "running": job.running,
+                    "runs": job.runs,
+                    "failures": job.failures,
+                    "last_success": datetime.fromtimestamp(job.last_success).isoformat() if job.last_success else None,
+                    "last_error": job.last_error,
+                    "next_run_in": None if job.running else max(0, round(job.next_run - time.monotonic()))
+                }
+                for job in self.jobs
+            }
+        }
+
+def daemon_jobs(daemon: CrawlDaemon) -> List[WorkerJob]:
+    """LaserMatch import, a recrawl and a discovery job per source, url liveness checks, and upkeep"""
+    jobs = [WorkerJob("lasermatch_update", LASERMATCH_INTERVAL, update_lasermatch_data, crawls=False)]
+    for spider in sorted(set(SOURCE_SPIDERS.values())):
+        jobs.append(WorkerJob(f"recrawl:{spider}", RECRAWL_INTERVAL, lambda spider=spider: recrawl_due_listings([spider])))
+        if daemon.queue is not None:
+            jobs.append(WorkerJob(
+                f"discover:{spider}", DISCOVERY_INTERVAL,
+                lambda spider=spider: enqueue_discovery(daemon.queue, spider), crawls=False, writes=False
+            ))
+        else:
+            jobs.append(WorkerJob(
+                f"discover:{spider}", DISCOVERY_INTERVAL,
+                lambda spider=spider: discover_listings(spider, daemon.stopping)
+            ))
+    jobs.append(WorkerJob(
+        "url_liveness", LIVENESS_INTERVAL,
+        lambda: check_url_liveness(daemon.stopping, daemon.mark_written), crawls=False, writes=False
+    ))
+    jobs.append(WorkerJob("rollups", ROLLUP_INTERVAL, daemon.refresh_rollups_if_written, crawls=False, writes=False))
+    jobs.append(WorkerJob("cleanup", CLEANUP_INTERVAL, cleanup_old_data, crawls=False, writes=False))
+    return jobs
+
+async def serve_health(daemon: CrawlDaemon, port: int):
+    """Minimal HTTP server for the platform health check and Prometheus scrapes"""
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            path = request_line[1].split("?")[0] if len(request_line) > 1 else "/"
+            if path == "/health":
+                health = daemon.health()
+                status = "503 Service Unavailable" if health["status"] == "stopping" else "200 OK"
+                body, content_type = json.dumps(health).encode(), "application/json"
+            elif path == "/metrics":
+                status, body, content_type = "200 OK", REGISTRY.render().encode(), "text/plain; version=0.0.4"
+            else:
+                status, body, content_type = "404 Not Found", b'{"detail":"Not Found"}', "application/json"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    return await asyncio.start_server(handle, "0.0.0.0", port)
+
+async def run_daemon():
+    """Long-running worker: periodic jobs per source on one pool until SIGTERM"""
+    logger.info("🏗️ Railway Worker starting in daemon mode...")
+    if not await init_db():
+        logger.error("❌ Worker failed: database unavailable")
+        sys.exit(1)
+    
+    # With CRAWL_QUEUE set, discovery crawls go through the shared queue and
+    # every worker node runs WORKER_CONCURRENCY consumers of it
+    daemon = CrawlDaemon(queue=get_crawl_queue())
+    daemon.jobs.extend(daemon_jobs(daemon))
+    
+    server = await serve_health(daemon, int(os.getenv("PORT", "8080")))
+    try:
+        await daemon.run()
+    finally:
+        server.close()
+        await server.wait_closed()
+        await close_pool()
+
 async def main():
     """Main worker function"""
     logger.info("🏗️ Railway Worker starting...")
     
+    # Apply pending migrations (a single SELECT when the schema is current)
+    await init_db()
+    
     # Update LaserMatch data
     success = await update_lasermatch_data()
     
     if success:
-        # Clean up old data
+        # Re-check due listings, then clean up old data
+        await recrawl_due_listings()
         await cleanup_old_data()
         logger.info("✅ Worker completed successfully")
     else:
@@ -170,4 +657,7 @@ async def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="LaserMatch crawl worker")
+    parser.add_argument("--daemon", action="store_true", help="keep running periodic crawl jobs until SIGTERM")
+    args = parser.parse_args()
+    asyncio.run(run_daemon() if args.daemon or os.getenv("WORKER_DAEMON") == "1" else main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Serialization Benchmark
+Compares the old listing response path (isoformat loop + jsonable_encoder +
+stdlib json) against FastJSONResponse (orjson) for a 1k-item listing payload
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, Dict, Any, Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api.utils.responses import FastJSONResponse
+
+BRANDS = ['Aerolase', 'Candela', 'Cynosure', 'Lumenis', 'Syneron', 'Alma', 'Cutera', 'Sciton']
+
+
+def build_rows(count: int) -> List[Dict[str, Any]]:
+    """Build rows shaped like asyncpg lasermatch_items records"""
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(count):
+        brand = BRANDS[i % len(BRANDS)]
+        rows.append({
+            "id": i + 1,
+            "title": f"{brand} Model {i} Laser System",
+            "brand": brand,
+            "model": f"Model {i}",
+            "condition": "Used - Good",
+            "price": Decimal(f"{25000 + i * 17}.00"),
+            "location": "California, USA",
+            "description": f"Professional {brand} laser system listing number {i} in good condition.",
+            "url": f"https://lasermatch.io/listing/{i}",
+            "images": [f"https://lasermatch.io/images/{i}-1.jpg", f"https://lasermatch.io/images/{i}-2.jpg"],
+            "discovered_at": now - timedelta(minutes=i),
+            "last_updated": now,
+            "source": "LaserMatch.io",
+            "status": "active",
+            "category": "Laser System",
+            "availability": "Available",
+            "assigned_rep": None,
+            "target_price": None,
+            "notes": None,
+            "spider_urls": None
+        })
+    return rows
+
+
+def serialize_before(rows: List[Dict[str, Any]]) -> bytes:
+    """Previous path: manual isoformat per row, then jsonable_encoder and stdlib json"""
+    items = []
+    for row in rows:
+        item = dict(row)
+        if item.get('discovered_at'):
+            item['discovered_at'] = item['discovered_at'].isoformat()
+        if item.get('last_updated'):
+            item['last_updated'] = item['last_updated'].isoformat()
+        items.append(item)
+    content = jsonable_encoder({"items": items, "total": len(items), "source": "database"})
+    return JSONResponse(content).body
+
+
+def serialize_after(rows: List[Dict[str, Any]]) -> bytes:
+    """Current path: rows handed straight to FastJSONResponse"""
+    items = [dict(row) for row in rows]
+    return FastJSONResponse({"items": items, "total": len(items), "source": "database"}).body
+
+
+def measure(fn: Callable, rows: List[Dict[str, Any]], iterations: int) -> Dict[str, float]:
+    """Time fn over rows and return p50/p99 in milliseconds"""
+    fn(rows)  # warm up
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(rows)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": statistics.median(timings),
+        "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        "mean_ms": statistics.fmean(timings)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark listing response serialization")
+    parser.add_argument("--items", type=int, default=1000, help="Listings per response")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed iterations per path")
+    args = parser.parse_args()
+
+    rows = build_rows(args.items)
+    before = measure(serialize_before, rows, args.iterations)
+    after = measure(serialize_after, rows, args.iterations)
+
+    print(f"📊 Serialization benchmark: {args.items} items x {args.iterations} iterations")
+    print(f"{'path':<28}{'p50 (ms)':>12}{'p99 (ms)':>12}{'mean (ms)':>12}")
+    print(f"{'jsonable_encoder + json':<28}{before['p50_ms']:>12.2f}{before['p99_ms']:>12.2f}{before['mean_ms']:>12.2f}")
+    print(f"{'FastJSONResponse (orjson)':<28}{after['p50_ms']:>12.2f}{after['p99_ms']:>12.2f}{after['mean_ms']:>12.2f}")
+    print(f"⚡ p50 speedup: {before['p50_ms'] / after['p50_ms']:.1f}x, p99 speedup: {before['p99_ms'] / after['p99_ms']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
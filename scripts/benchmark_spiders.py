@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Offline Spider Parse Benchmark
+Replays search result pages through every spider's parse_search_results as
+HtmlResponse fixtures and reports items/sec, CPU time and peak RSS per source.
+
+Pages come from <fixtures-dir>/<spider>*.html when recorded pages exist,
+otherwise synthetic pages shaped like each source's result grid are built.
+The crawl captures in the tree (*_results.json) are parsed feed exports, not
+HTML, so they cannot be replayed. Each source runs in its own subprocess so
+peak RSS is per source.
+
+    python3 scripts/benchmark_spiders.py --save-baseline scripts/bench_spiders_baseline.json
+    python3 scripts/benchmark_spiders.py --baseline scripts/bench_spiders_baseline.json --threshold 0.2
+
+`npm run bench:spiders` runs the second form against the committed baseline.
+
+Absolute items/sec depends on the host, so the gate compares a relative
+cost instead: each source's parse time divided by the time a plain
+Selector pass (every text node and link of the same pages) takes in the
+same process. Exits with status 1 when any source's relative cost rises
+more than threshold above the baseline, or it parses a different number of
+listings from the same pages, so it can gate CI. Re-baseline with
+--save-baseline after an intended change to a spider or to the page
+generators, and commit the file with that change.
+"""
+
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+SPIDER_DIR = os.path.join(os.path.dirname(__file__), '..', 'laser-equipment-intelligence')
+sys.path.insert(0, SPIDER_DIR)
+
+from scrapy.http import HtmlResponse, Request
+from scrapy.selector import Selector
+from scrapy.utils.test import get_crawler
+
+from laser_intelligence.marketplaces import MARKETPLACES, MarketplaceConfig
+from laser_intelligence.items import Listing
+
+SPIDERS = ["ebay_laser", *MARKETPLACES]
+TITLES = [
+    'Candela GentleMax Pro Alexandrite Nd:YAG laser system',
+    'Cynosure PicoSure 755nm picosecond laser',
+    'Lumenis M22 IPL ResurFX aesthetic platform',
+    'Sciton Joule BBL HALO laser workstation',
+    'Cutera Excel V vascular laser',
+    'Aerolase Neo Elite 650 microsecond laser',
+]
+
+
+def spider_class(name: str):
+    if name == "ebay_laser":
+        from laser_intelligence.spiders.ebay_laser import EbayLaserSpider
+        return EbayLaserSpider
+    from laser_intelligence.spiders import marketplace
+    return next(
+        cls for cls in vars(marketplace).values()
+        if isinstance(cls, type) and getattr(cls, 'name', None) == name
+    )
+
+
+def _css_class(selector: str) -> str:
+    """Class name of the first alternative of a '.foo::text' style selector"""
+    first = selector.split(',')[0].strip().split('::')[0]
+    return first.split('.')[-1]
+
+
+def synthetic_ebay_page(page: int, items: int) -> str:
+    # The eBay spider keeps every <div> holding an /itm/ link, so each card has
+    # exactly one div and the grid is a list; nested divs would count twice
+    cards = []
+    for i in range(items):
+        n = page * items + i
+        cards.append(
+            f'<li class="s-item"><div class="s-item__info">'
+            f'<a href="https://www.ebay.com/itm/{100000 + n}">{TITLES[n % len(TITLES)]} #{n}</a>'
+            f'<span class="s-item__price">${15000 + n * 37:,}.00</span><span>Used</span>'
+            f'<img src="https://i.ebayimg.com/{n}.jpg"></div></li>'
+        )
+    return f'<html><body><ul class="srp-results">{"".join(cards)}</ul></body></html>'
+
+
+def synthetic_marketplace_page(config: MarketplaceConfig, page: int, items: int) -> str:
+    tag, _, item_class = config.item_selector.split(',')[0].strip().partition('.')
+    title_tag = config.title_selector.split(',')[0].strip().split()[0].lstrip('.')
+    price_class = _css_class(config.price_selector)
+    location_class = _css_class(config.location_selector)
+    condition_class = _css_class(config.condition_selector)
+    cards = []
+    for i in range(items):
+        n = page * items + i
+        cards.append(
+            f'<{tag} class="{item_class}"><{title_tag}><a href="/listing/{n}">{TITLES[n % len(TITLES)]} #{n}</a></{title_tag}>'
+            f'<span class="{price_class}">${15000 + n * 37:,}.00</span>'
+            f'<span class="{condition_class}">Used - Good</span>'
+            f'<span class="{location_class}">Dallas, TX</span>'
+            f'<img src="/img/{n}.jpg"></{tag}>'
+        )
+    return f'<html><body><div class="results">{"".join(cards)}</div></body></html>'
+
+
+def load_pages(name: str, fixtures_dir: str, pages: int, items: int) -> List[bytes]:
+    recorded = sorted(glob.glob(os.path.join(fixtures_dir, f"{name}*.html"))) if fixtures_dir else []
+    if recorded:
+        bodies = []
+        for path in recorded:
+            with open(path, 'rb') as f:
+                bodies.append(f.read())
+        return bodies
+    if name == "ebay_laser":
+        return [synthetic_ebay_page(page, items).encode() for page in range(pages)]
+    return [synthetic_marketplace_page(MARKETPLACES[name], page, items).encode() for page in range(pages)]
+
+
+def reference_parse(bodies: List[bytes]) -> int:
+    """Spider-independent parse of the pages: every text node and link"""
+    found = 0
+    for body in bodies:
+        selector = Selector(text=body.decode('utf-8'))
+        found += len(selector.css('::text').getall()) + len(selector.css('a::attr(href)').getall())
+    return found
+
+
+def run_source(name: str, fixtures_dir: str, pages: int, items: int, rounds: int) -> Dict[str, Any]:
+    """Benchmark one spider in this process; call from a fresh subprocess"""
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    cls = spider_class(name)
+    bodies = load_pages(name, fixtures_dir, pages, items)
+    best_wall = best_cpu = best_reference = None
+    parsed = 0
+    for _ in range(rounds):
+        spider = cls.from_crawler(get_crawler(cls, {'FRONTIER_MAX_ITEMS': 10 ** 9}))
+        spider.price_stats = None  # parse cost only; scoring has its own benchmark
+        url = spider.first_page_url(spider.query)
+        responses = [
+            HtmlResponse(url, body=body, encoding='utf-8', request=Request(url, meta={'page': 1, 'query': spider.query}))
+            for body in bodies
+        ]
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        parsed = 0
+        for response in responses:
+            for output in spider.parse_search_results(response):
+                if isinstance(output, Listing):
+                    parsed += 1
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        best_wall = wall if best_wall is None else min(best_wall, wall)
+        best_cpu = cpu if best_cpu is None else min(best_cpu, cpu)
+
+        reference_start = time.perf_counter()
+        reference_parse(bodies)
+        reference = time.perf_counter() - reference_start
+        best_reference = reference if best_reference is None else min(best_reference, reference)
+
+    return {
+        "pages": len(bodies),
+        "items": parsed,
+        "items_per_sec": parsed / best_wall if best_wall else 0.0,
+        "wall_ms": best_wall * 1000,
+        "cpu_ms": best_cpu * 1000,
+        "relative_cost": best_wall / best_reference if best_reference else 0.0,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "fixtures": "recorded" if fixtures_dir and glob.glob(os.path.join(fixtures_dir, f"{name}*.html")) else "synthetic"
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    """Sources whose relative cost rose more than threshold above the baseline, or whose item count changed"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name, {})
+        before = previous.get("relative_cost")
+        if before and result["relative_cost"] > before * (1 + threshold):
+            regressions.append(f"{name}: relative cost {result['relative_cost']:.2f} vs baseline {before:.2f}")
+        if previous.get("pages") == result["pages"] and previous.get("items") != result["items"]:
+            regressions.append(f"{name}: parsed {result['items']} listings vs baseline {previous.get('items')}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark spider parsing against offline fixtures")
+    parser.add_argument("--spiders", nargs="*", default=SPIDERS, help="Spiders to benchmark")
+    parser.add_argument("--fixtures-dir", default=None, help="Directory of recorded <spider>*.html pages")
+    parser.add_argument("--pages", type=int, default=20, help="Synthetic pages per source")
+    parser.add_argument("--items", type=int, default=50, help="Synthetic listings per page")
+    parser.add_argument("--rounds", type=int, default=3, help="Timed rounds per source (best is kept)")
+    parser.add_argument("--baseline", help="Report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative cost rise vs baseline")
+    parser.add_argument("--save-baseline", help="Write this run's report to a file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_source(args.worker, args.fixtures_dir, args.pages, args.items, args.rounds)))
+        return
+
+    results = {}
+    for name in args.spiders:
+        cmd = [sys.executable, __file__, "--worker", name, "--pages", str(args.pages),
+               "--items", str(args.items), "--rounds", str(args.rounds)]
+        if args.fixtures_dir:
+            cmd += ["--fixtures-dir", os.path.abspath(args.fixtures_dir)]
+        proc = subprocess.run(cmd, capture_output=True, text=True, cwd=SPIDER_DIR)
+        if proc.returncode != 0:
+            print(f"❌ {name} failed:\n{proc.stderr}")
+            sys.exit(1)
+        results[name] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    print(f"📊 Spider parse benchmark (best of {args.rounds} rounds)")
+    print(f"{'spider':<18}{'items':>8}{'items/s':>12}{'wall (ms)':>12}{'cpu (ms)':>12}{'relative':>10}{'peak RSS (MB)':>15}")
+    for name, r in results.items():
+        print(f"{name:<18}{r['items']:>8}{r['items_per_sec']:>12.0f}{r['wall_ms']:>12.1f}{r['cpu_ms']:>12.1f}"
+              f"{r['relative_cost']:>10.2f}{r['peak_rss_mb']:>15.1f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Saved report to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"❌ Parse cost regressed more than {args.threshold:.0%} or item counts changed:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"✅ No source regressed more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+API Cold Start Check
+Measures how long `import api.main` takes (via python -X importtime) and the
+time from interpreter start to the first successful /health response, and
+fails if either exceeds its budget or if a heavy dependency is imported at
+startup instead of on first use.
+
+    python3 scripts/check_import_time.py --import-budget-ms 800 --health-budget-ms 2000
+
+Each measurement runs in a fresh interpreter so nothing is already cached in
+sys.modules; the best of --runs is reported to smooth out disk cache noise.
+Leave DATABASE_URL unset to measure the app alone, or point it at a migrated
+database to include the startup migration check. Exits with status 1 on any
+violation, so it can gate CI.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+# Imported on first use (spider runs, dedup, Selenium fallback); never at API startup
+DEFERRED_MODULES = ["scrapy", "twisted", "selenium", "numpy", "lxml"]
+
+HEALTH_PROBE = """
+import time
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+from api.main import app
+with TestClient(app) as client:
+    response = client.get("/health")
+    elapsed = time.perf_counter() - started
+print(response.status_code, elapsed * 1000)
+"""
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Cumulative microseconds per module from -X importtime output"""
+    cumulative: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative
+
+
+def measure_import(env: Dict[str, str]) -> Dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import api.main"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import api.main failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def measure_health(env: Dict[str, str]) -> float:
+    result = subprocess.run([sys.executable, "-c", HEALTH_PROBE], cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"/health probe failed:\n{result.stderr[-2000:]}")
+    status, elapsed_ms = result.stdout.strip().splitlines()[-1].split()
+    if status != "200":
+        raise RuntimeError(f"/health returned {status}")
+    return float(elapsed_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check API import time and time-to-first-/health")
+    parser.add_argument("--import-budget-ms", type=float, default=800, help="Budget for `import api.main`")
+    parser.add_argument("--health-budget-ms", type=float, default=2000, help="Budget for interpreter start to /health")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    parser.add_argument("--output", help="Write the measurements as JSON")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.getenv("PYTHONPATH")])))
+    env.pop("OTEL_SERVICE_NAME", None)
+
+    imports = [measure_import(env) for _ in range(args.runs)]
+    best = min(imports, key=lambda modules: modules.get("api.main", 0))
+    import_ms = best.get("api.main", 0) / 1000
+    health_ms = min(measure_health(env) for _ in range(args.runs))
+
+    print(f"⏱️ import api.main: {import_ms:.0f}ms (budget {args.import_budget_ms:.0f}ms)")
+    print(f"⏱️ first /health:   {health_ms:.0f}ms (budget {args.health_budget_ms:.0f}ms)")
+    print("🐢 Slowest imports (cumulative):")
+    for name, us in sorted(best.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"   {us / 1000:>8.1f}ms  {name}")
+
+    failures: List[str] = []
+    if import_ms > args.import_budget_ms:
+        failures.append(f"import api.main took {import_ms:.0f}ms (budget {args.import_budget_ms:.0f}ms)")
+    if health_ms > args.health_budget_ms:
+        failures.append(f"first /health took {health_ms:.0f}ms (budget {args.health_budget_ms:.0f}ms)")
+    eager = sorted(module for module in DEFERRED_MODULES if module in best)
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "import_ms": round(import_ms, 1),
+                "health_ms": round(health_ms, 1),
+                "eager_imports": eager,
+                "slowest": {name: round(us / 1000, 1) for name, us in sorted(best.items(), key=lambda item: -item[1])[:args.top]}
+            }, f, indent=2, sort_keys=True)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Cold start within budget")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
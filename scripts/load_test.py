@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+API Load Test
+Seeds lasermatch_items with synthetic listings at several table sizes and
+drives the main read endpoints at a fixed request rate, recording latency
+percentiles and error rates per endpoint and table size.
+
+    DATABASE_URL=postgresql://localhost/laser_loadtest \\
+        python3 scripts/load_test.py --rows 10000,100000,1000000 --rps 50 --duration 30
+
+Point DATABASE_URL at a throwaway database. Synthetic rows are tagged with
+source 'LoadTest' and replaced on every run; other rows are left alone.
+Without --base-url an API server is started with uvicorn against the same
+database (or run in-process with --in-process). The JSON report is written
+with sorted keys so runs can be diffed across releases.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import asyncpg
+import httpx
+
+SOURCE_TAG = 'LoadTest'
+COPY_CHUNK = 100_000
+BRAND_MODELS = {
+    'Candela': ['GentleMax Pro', 'GentleLase Pro', 'VBeam Perfecta'],
+    'Cynosure': ['PicoSure', 'SmartLipo', 'Elite+'],
+    'Lumenis': ['M22', 'LightSheer Duet', 'UltraPulse'],
+    'Sciton': ['Joule', 'Profile', 'Halo'],
+    'Cutera': ['Excel V', 'Xeo', 'Titan'],
+    'Alma': ['Harmony XL', 'Soprano ICE', 'Accent'],
+    'Aerolase': ['LightPod Neo', 'Neo Elite'],
+    'Syneron': ['eTwo', 'VelaShape III'],
+}
+BRANDS = list(BRAND_MODELS)
+CONDITIONS = ['New', 'Used - Excellent', 'Used - Good', 'Used - Fair', 'Refurbished']
+LOCATIONS = ['Dallas, TX', 'Miami, FL', 'Los Angeles, CA', 'Chicago, IL', 'New York, NY', 'Denver, CO']
+COLUMNS = [
+    'title', 'brand', 'model', 'condition', 'price', 'location', 'description', 'url', 'images',
+    'discovered_at', 'source', 'status', 'category', 'availability', 'dedupe_bands'
+]
+
+
+def synthetic_rows(start: int, count: int, seed: int):
+    rng = random.Random(seed + start)
+    now = datetime.now(timezone.utc)
+    for i in range(start, start + count):
+        brand = rng.choice(BRANDS)
+        model = rng.choice(BRAND_MODELS[brand])
+        yield (
+            f"{brand} {model} Laser System #{i}", brand, model, rng.choice(CONDITIONS),
+            Decimal(rng.randrange(8_000, 150_000)), rng.choice(LOCATIONS),
+            f"Synthetic {brand} {model} listing {i} for load testing", f"https://loadtest.invalid/listing/{i}",
+            [f"https://loadtest.invalid/images/{i}.jpg"], now - timedelta(minutes=rng.randrange(0, 60 * 24 * 90)),
+            SOURCE_TAG, 'active' if rng.random() < 0.9 else 'sold', 'Laser System', 'Available',
+            []   # empty, not NULL, so init_db's dedupe backfill skips synthetic rows
+        )
+
+
+async def seed(database_url: str, rows: int, seed_value: int) -> float:
+    """Replace the synthetic rows with `rows` fresh ones via COPY; returns seconds taken"""
+    from api.models.database import init_db
+    from api.models.stats import refresh_stats
+    from api.models.price_stats import refresh_price_stats
+
+    os.environ['DATABASE_URL'] = database_url
+    await init_db()
+    started = time.perf_counter()
+    conn = await asyncpg.connect(database_url)
+    try:
+        await conn.execute(
+            "DELETE FROM sources WHERE item_id IN (SELECT id FROM lasermatch_items WHERE source = $1)", SOURCE_TAG
+        )
+        await conn.execute("DELETE FROM lasermatch_items WHERE source = $1", SOURCE_TAG)
+        for start in range(0, rows, COPY_CHUNK):
+            await conn.copy_records_to_table(
+                'lasermatch_items', columns=COLUMNS,
+                records=synthetic_rows(start, min(COPY_CHUNK, rows - start), seed_value)
+            )
+        await conn.execute("ANALYZE lasermatch_items")
+        await refresh_stats(conn)
+        await refresh_price_stats(conn)
+    finally:
+        await conn.close()
+    return time.perf_counter() - started
+
+
+def endpoint_requests(rng: random.Random) -> Dict[str, Any]:
+    """Request factories for the endpoints under test"""
+    return {
+        "search_equipment": lambda: ("POST", "/api/v1/search/equipment",
+                                     {"query": rng.choice(BRANDS + ['GentleMax', 'PicoSure', 'M22']), "limit": 50}),
+        "lasermatch_items": lambda: ("GET", f"/api/v1/lasermatch/items?limit=100&offset={rng.randrange(0, 1000)}", None),
+        "dashboard_stats": lambda: ("GET", "/api/v1/dashboard/stats", None),
+    }
+
+
+async def drive(client: httpx.AsyncClient, make_request, rps: float, duration: float, timeout: float) -> Dict[str, Any]:
+    """Open-loop load at a fixed rate; latency is measured from each request's scheduled send time"""
+    latencies: List[float] = []
+    errors = 0
+    total = int(rps * duration)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    async def one(scheduled: float):
+        nonlocal errors
+        method, path, body = make_request()
+        try:
+            response = await client.request(method, path, json=body, timeout=timeout)
+            if response.status_code >= 400:
+                errors += 1
+        except httpx.HTTPError:
+            errors += 1
+        latencies.append((loop.time() - scheduled) * 1000)
+
+    tasks = []
+    for i in range(total):
+        scheduled = started + i / rps
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(scheduled)))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - started
+
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 2) if latencies else 0.0
+
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "achieved_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": pct(0.50), "p90_ms": pct(0.90), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_url: str) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=database_url)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.join(os.path.dirname(__file__), '..'), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return proc, base_url
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("API server did not become healthy within 60s")
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+async def run(args) -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        "revision": git_revision(),
+        "rps": args.rps,
+        "duration_s": args.duration,
+        "endpoints": args.endpoints,
+        "results": {}
+    }
+    rng = random.Random(args.seed)
+    factories = endpoint_requests(rng)
+
+    for rows in args.rows:
+        print(f"🌱 Seeding {rows:,} synthetic listings...")
+        seed_seconds = await seed(args.database_url, rows, args.seed)
+        print(f"   seeded in {seed_seconds:.1f}s")
+
+        server = None
+        if args.in_process:
+            from api.main import app
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest")
+        else:
+            base_url = args.base_url
+            if not base_url:
+                server, base_url = start_server(args.database_url)
+            client = httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_connections=args.max_connections))
+
+        results = {"seed_seconds": round(seed_seconds, 2)}
+        try:
+            for name in args.endpoints:
+                make_request = factories[name]
+                await drive(client, make_request, args.rps, min(args.duration, 2), args.timeout)   # warm up
+                results[name] = await drive(client, make_request, args.rps, args.duration, args.timeout)
+                r = results[name]
+                print(f"   {name:<18} p50 {r['p50_ms']:>8.1f}ms  p95 {r['p95_ms']:>8.1f}ms  "
+                      f"p99 {r['p99_ms']:>8.1f}ms  errors {r['error_rate']:.1%}  {r['achieved_rps']:.1f} rps")
+        finally:
+            await client.aclose()
+            if server:
+                server.terminate()
+                server.wait()
+        report["results"][str(rows)] = results
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API against seeded synthetic listings")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="Throwaway Postgres database")
+    parser.add_argument("--rows", default="10000,100000,1000000", help="Comma-separated table sizes")
+    parser.add_argument("--rps", type=float, default=20, help="Requests per second per endpoint")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of load per endpoint")
+    parser.add_argument("--timeout", type=float, default=10, help="Per-request timeout in seconds")
+    parser.add_argument("--max-connections", type=int, default=200, help="HTTP client connection limit")
+    parser.add_argument("--endpoints", nargs="*", default=["search_equipment", "lasermatch_items", "dashboard_stats"])
+    parser.add_argument("--base-url", help="Already running API server (must use the same database)")
+    parser.add_argument("--in-process", action="store_true", help="Serve the app in this process via ASGI")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for data and request mix")
+    parser.add_argument("--output", default="load_test_report.json", help="Report path")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("DATABASE_URL or --database-url is required")
+    args.rows = [int(value) for value in args.rows.split(",") if value]
+    unknown = set(args.endpoints) - set(endpoint_requests(random.Random()))
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"💾 Report written to {args.output}")
+
+    errors = sum(
+        r["errors"] for results in report["results"].values() for r in results.values() if isinstance(r, dict)
+    )
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()